@@ -0,0 +1,7 @@
+"""
+Performance benchmarks for the parser, attacher and I/O layers.
+
+`benchmarks.generate` builds realistic synthetic `.kicad_sym` libraries and
+`benchmarks.run` times each phase, records JSON results and compares them
+against a stored baseline.
+"""
@@ -0,0 +1,161 @@
+"""
+Synthetic `.kicad_sym` generator for benchmarks.
+
+Produces KiCAD v9-style libraries with configurable symbol count, unit
+sub-symbols, existing properties, line endings, and string values that
+contain escaped quotes and parentheses.
+
+Usage: python -m benchmarks.generate --symbols 40000 --out big.kicad_sym
+"""
+
+from __future__ import annotations
+
+import argparse
+import pathlib as _pl
+import random
+from collections.abc import Iterator
+from typing import Any
+
+BASE_PROPERTIES = ("Reference", "Value", "Footprint", "Datasheet", "Description", "ki_keywords")
+
+
+def _property(name: str, value: str, at: str) -> list[str]:
+    return [
+        f'\t\t(property "{name}" "{value}"',
+        f"\t\t\t(at {at})",
+        "\t\t\t(effects",
+        "\t\t\t\t(font",
+        "\t\t\t\t\t(size 1.27 1.27)",
+        "\t\t\t\t)",
+        "\t\t\t\t(hide yes)",
+        "\t\t\t)",
+        "\t\t)",
+    ]
+
+
+def _unit(name: str, unit: int, pins: int) -> list[str]:
+    lines = [
+        f'\t\t(symbol "{name}_{unit}_1"',
+        "\t\t\t(rectangle",
+        "\t\t\t\t(start -2.54 2.54)",
+        "\t\t\t\t(end 2.54 -2.54)",
+        "\t\t\t\t(stroke",
+        "\t\t\t\t\t(width 0.254)",
+        "\t\t\t\t\t(type default)",
+        "\t\t\t\t)",
+        "\t\t\t\t(fill",
+        "\t\t\t\t\t(type background)",
+        "\t\t\t\t)",
+        "\t\t\t)",
+    ]
+    for pin in range(1, pins + 1):
+        lines += [
+            "\t\t\t(pin passive line",
+            f"\t\t\t\t(at -5.08 {pin * 2.54:.2f} 0)",
+            "\t\t\t\t(length 2.54)",
+            f'\t\t\t\t(name "P{pin}"',
+            "\t\t\t\t\t(effects",
+            "\t\t\t\t\t\t(font",
+            "\t\t\t\t\t\t\t(size 1.27 1.27)",
+            "\t\t\t\t\t\t)",
+            "\t\t\t\t\t)",
+            "\t\t\t\t)",
+            f'\t\t\t\t(number "{pin}"',
+            "\t\t\t\t\t(effects",
+            "\t\t\t\t\t\t(font",
+            "\t\t\t\t\t\t\t(size 1.27 1.27)",
+            "\t\t\t\t\t\t)",
+            "\t\t\t\t\t)",
+            "\t\t\t\t)",
+            "\t\t\t)",
+        ]
+    lines.append("\t\t)")
+    return lines
+
+
+def iter_library_lines(
+    symbols: int,
+    *,
+    units: int = 2,
+    pins: int = 2,
+    existing: tuple[str, ...] = (),
+    existing_ratio: float = 0.5,
+    seed: int = 0,
+) -> Iterator[str]:
+    """Yield the lines of a synthetic library.
+
+    Every symbol gets `BASE_PROPERTIES` plus each name in `existing` with probability
+    `existing_ratio`, and `units` unit sub-symbols with `pins` pins each. Descriptions
+    contain escaped quotes and parentheses to exercise string handling.
+    """
+    rng = random.Random(seed)
+    yield "(kicad_symbol_lib"
+    yield "\t(version 20241209)"
+    yield '\t(generator "kicad_symbol_editor")'
+    yield '\t(generator_version "9.0")'
+    for i in range(symbols):
+        name = f"SYM{i:06d}"
+        yield f'\t(symbol "{name}"'
+        yield "\t\t(exclude_from_sim no)"
+        yield "\t\t(in_bom yes)"
+        yield "\t\t(on_board yes)"
+        values = {
+            "Reference": "U",
+            "Value": name,
+            "Footprint": "Package_SO:SOIC-8_3.9x4.9mm_P1.27mm",
+            "Datasheet": "~",
+            "Description": f'Part {i} \\"rev (B)\\" with (parens) and \\\\ backslash',
+            "ki_keywords": "synthetic benchmark",
+        }
+        for prop in BASE_PROPERTIES:
+            yield from _property(prop, values[prop], "0 0 0")
+        for prop in existing:
+            if rng.random() < existing_ratio:
+                yield from _property(prop, f"C{rng.randrange(1_000_000)}", "0 0 0")
+        for unit in range(units):
+            yield from _unit(name, unit, pins)
+        yield "\t\t(embedded_fonts no)"
+        yield "\t)"
+    yield ")"
+
+
+def generate_library(symbols: int, *, newline: str = "\n", **kwargs: Any) -> str:
+    """Return a synthetic library as one string (see `iter_library_lines` for options)."""
+    return newline.join(iter_library_lines(symbols, **kwargs)) + newline
+
+
+def write_library(path: _pl.Path, symbols: int, *, newline: str = "\n", **kwargs: Any) -> int:
+    """Stream a synthetic library to `path`; returns the size in bytes."""
+    with path.open("w", encoding="utf-8", newline="") as f:
+        for line in iter_library_lines(symbols, **kwargs):
+            f.write(line)
+            f.write(newline)
+    return path.stat().st_size
+
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--symbols", type=int, default=10_000)
+    ap.add_argument("--units", type=int, default=2)
+    ap.add_argument("--pins", type=int, default=2)
+    ap.add_argument("--existing", action="append", default=[], help="Property already present on some symbols")
+    ap.add_argument("--existing-ratio", type=float, default=0.5)
+    ap.add_argument("--crlf", action="store_true")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", type=_pl.Path, required=True)
+    args = ap.parse_args(argv)
+    size = write_library(
+        args.out,
+        args.symbols,
+        newline="\r\n" if args.crlf else "\n",
+        units=args.units,
+        pins=args.pins,
+        existing=tuple(args.existing),
+        existing_ratio=args.existing_ratio,
+        seed=args.seed,
+    )
+    print(f"Wrote {args.out} ({args.symbols} symbols, {size / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
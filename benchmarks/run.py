@@ -0,0 +1,199 @@
+"""
+Run the benchmark suite and compare against a stored baseline.
+
+Times each phase on a generated library (best of `--repeat` runs):
+- load:   `io.read_text`
+- index:  `parser.SymbolIndex.from_text`
+- splice: building the output chunks for every missing property
+- write:  `io.write_text_chunks` of the spliced output
+- write_text:   `Path.write_text` of the whole spliced output, joined
+- write_lines:  buffered `writelines` of `--mmap` chunks (slices of the mapped input)
+- writev:       `io.write_chunks` of the same chunks (`os.writev` batches)
+- cli:    end-to-end `kicad-sym-prop attach` in a fresh interpreter
+- startup: `import src.cli.main` in a fresh interpreter (the lazy-import entry point)
+
+Results are written as JSON. With `--baseline`, each benchmark's best time is
+compared to the baseline and the run exits non-zero when any ratio exceeds
+`--threshold`. Baselines are machine-specific; create one with
+`--update-baseline` on the machine that will run the comparison.
+
+Usage: python -m benchmarks.run --symbols 20000 --output results.json --baseline benchmarks/baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import pathlib as _pl
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from typing import Any
+
+from src.lib import attacher, parser
+from src.lib import io as _io
+
+from .generate import write_library
+
+PROPERTY = "SzlcscCode"
+DEFAULT_THRESHOLD = 1.25
+
+
+def _time(fn: Callable[[], object], repeat: int) -> list[float]:
+    times: list[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run_suite(workdir: _pl.Path, *, symbols: int, repeat: int, crlf: bool = False) -> dict[str, Any]:
+    lib = workdir / "bench.kicad_sym"
+    size = write_library(lib, symbols, newline="\r\n" if crlf else "\n", existing=(PROPERTY,))
+    text = _io.read_text(lib)
+    index = parser.SymbolIndex.from_text(text)
+    additions = [(span, [(pn, "") for pn in missing]) for span, missing in index.missing([PROPERTY])]
+
+    def splice() -> list[str]:
+        return list(attacher._iter_text_chunks(text, additions, newline="\n"))
+
+    chunks = splice()
+    out = workdir / "out.kicad_sym"
+
+    def write_text() -> None:
+        out.write_text("".join(chunks), encoding="utf-8")
+
+    # The `--mmap` output stage: memoryview slices of the mapped input and encoded blocks.
+    mapped = contextlib.ExitStack()
+    buf = mapped.enter_context(_io.map_file(lib))
+    view = mapped.enter_context(memoryview(buf))
+    buffer_additions = [
+        (span, [(pn, "") for pn in missing])
+        for span, missing in parser.SymbolIndex.from_buffer(buf).missing([PROPERTY])
+    ]
+    buffer_chunks = list(
+        attacher._iter_buffer_chunks(buf, view, buffer_additions, newline="\r\n" if crlf else "\n", encoding="utf-8")
+    )
+    mapped.callback(buffer_chunks.clear)  # the slices pin the mapping until dropped
+
+    def write_lines() -> None:
+        with _io.atomic_writer(out) as f:
+            f.writelines(buffer_chunks)
+
+    def writev() -> None:
+        with _io.atomic_writer(out) as f:
+            _io.write_chunks(f, buffer_chunks)
+
+    cli_copy = workdir / "cli.kicad_sym"
+
+    def cli() -> None:
+        cli_copy.write_bytes(lib.read_bytes())
+        subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "src.cli.main",
+                "attach",
+                "--input",
+                str(cli_copy),
+                "--property-name",
+                PROPERTY,
+                "--report",
+                str(workdir / "cli.report.md"),
+            ],
+            check=True,
+            capture_output=True,
+        )
+        for backup in workdir.glob("cli.kicad_sym.orig*"):
+            backup.unlink()
+
+    def startup() -> None:
+        subprocess.run([sys.executable, "-c", "import src.cli.main"], check=True)
+
+    benches: dict[str, Callable[[], object]] = {
+        "load": lambda: _io.read_text(lib),
+        "index": lambda: parser.SymbolIndex.from_text(text),
+        "splice": splice,
+        "write": lambda: _io.write_text_chunks(out, chunks),
+        "write_text": write_text,
+        "write_lines": write_lines,
+        "writev": writev,
+        "cli": cli,
+        "startup": startup,
+    }
+    results: dict[str, Any] = {}
+    with mapped:
+        for name, fn in benches.items():
+            times = _time(fn, repeat)
+            best = min(times)
+            results[name] = {
+                "best_s": best,
+                "median_s": statistics.median(times),
+                "mb_per_s": size / 1e6 / best if best else None,
+            }
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "symbols": symbols,
+            "bytes": size,
+            "crlf": crlf,
+            "repeat": repeat,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], threshold: float) -> list[str]:
+    """Return a message per benchmark whose best time regressed beyond `threshold` x baseline."""
+    regressions: list[str] = []
+    for name, base in baseline.get("results", {}).items():
+        cur = current["results"].get(name)
+        if cur is None or not base.get("best_s"):
+            continue
+        ratio = cur["best_s"] / base["best_s"]
+        if ratio > threshold:
+            regressions.append(f"{name}: {cur['best_s']:.4f}s vs baseline {base['best_s']:.4f}s ({ratio:.2f}x)")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--symbols", type=int, default=20_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--crlf", action="store_true")
+    ap.add_argument("--output", type=_pl.Path, default=None, help="Write results JSON here")
+    ap.add_argument("--baseline", type=_pl.Path, default=None, help="Baseline JSON to compare against")
+    ap.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown ratio")
+    ap.add_argument("--update-baseline", action="store_true", help="Store these results as the baseline")
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        current = run_suite(_pl.Path(tmp), symbols=args.symbols, repeat=args.repeat, crlf=args.crlf)
+
+    for name, res in current["results"].items():
+        print(f"{name:>11}: best {res['best_s']:.4f}s  median {res['median_s']:.4f}s  {res['mb_per_s'] or 0:.1f} MB/s")
+    payload = json.dumps(current, indent=2)
+    if args.output is not None:
+        args.output.write_text(payload + "\n", encoding="utf-8")
+    if args.baseline is None:
+        return 0
+    if args.update_baseline or not args.baseline.exists():
+        args.baseline.write_text(payload + "\n", encoding="utf-8")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    regressions = compare(current, json.loads(args.baseline.read_text("utf-8")), args.threshold)
+    for msg in regressions:
+        print(f"REGRESSION {msg}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,25 +8,41 @@ Markdown report with highlighted errors/warnings and skipped Symbols.
 
 from __future__ import annotations
 
-import datetime as _dt
+import contextlib
 import importlib
+import os
 import pathlib as _pl
 import sys
+from types import ModuleType
+from typing import TYPE_CHECKING, Any, BinaryIO
 
 import click
 
-# Support both "python -m src.cli.main" (package under src) and installed package imports
-try:
-    attacher = importlib.import_module("src.lib.attacher")
-    report = importlib.import_module("src.lib.report")
-except ImportError:
-    attacher = importlib.import_module("lib.attacher")
-    report = importlib.import_module("lib.report")
+if TYPE_CHECKING:
+    from src.lib.attacher import AttachStats as AttachStatsT
+    from src.lib.batch import FileResult as FileResultT
+    from src.lib.rules import RuleSet as RuleSetT
+    from src.lib.timing import Timings as TimingsT
 
-# Bind names once to avoid mypy redefinition across conditional imports
-attach_property_to_file = attacher.attach_property_to_file
-ReportOptions = report.ReportOptions
-write_markdown_report = report.write_markdown_report
+
+def _lib(name: str) -> ModuleType:
+    """Import library module `name` on first use.
+
+    Library modules (and their dependencies such as `sexpdata`, `sqlite3` or
+    `concurrent.futures`) are only loaded by the code paths that need them, so
+    `--help` and other light invocations keep interpreter startup minimal.
+    """
+    # Support both "python -m src.cli.main" (package under src) and installed package imports
+    try:
+        return importlib.import_module(f"src.lib.{name}")
+    except ImportError:
+        return importlib.import_module(f"lib.{name}")
+
+
+def _timestamp() -> str:
+    import datetime as _dt
+
+    return _dt.datetime.now().strftime("%Y%m%d-%H%M%S")
 
 
 @click.group()
@@ -35,15 +51,129 @@ def kicad_sym_prop() -> None:
 
 
 @kicad_sym_prop.command("attach")
-@click.option("--input", "input_path", type=click.Path(path_type=_pl.Path), required=True)
-@click.option("--property-name", "prop_names", type=str, multiple=True, required=True)
+@click.option(
+    "--input",
+    "input_path",
+    type=click.Path(path_type=_pl.Path),
+    required=True,
+    help=(
+        "A .kicad_sym library or .kicad_sch schematic, a directory (searched recursively), a glob pattern, "
+        "a .kicad_pro project, or - to stream from stdin."
+    ),
+)
+@click.option("--property-name", "prop_names", type=str, multiple=True)
 @click.option("--property-value", "prop_value", type=str, default="")
-@click.option("--output", "output_path", type=click.Path(path_type=_pl.Path), default=None)
+@click.option(
+    "--output",
+    "output_path",
+    type=click.Path(path_type=_pl.Path),
+    default=None,
+    help="Output file (default: the input); - for stdout, the default with --input -.",
+)
 @click.option("--in-place", "in_place", is_flag=True, default=False)
 @click.option("--backup-suffix", "backup_suffix", type=str, default=".bak")
 @click.option("--dry-run", "dry_run", is_flag=True, default=False)
 @click.option("--report", "report_path", type=click.Path(path_type=_pl.Path), default=None)
+@click.option(
+    "--report-max-names",
+    "report_max_names",
+    type=click.IntRange(min=0),
+    default=None,
+    help="List at most N symbols per report section (default: all).",
+)
+@click.option(
+    "--report-format",
+    "report_format",
+    type=click.Choice(["markdown", "json", "ndjson"]),
+    default="markdown",
+    show_default=True,
+    help="json/ndjson: one record per file (stats, timings, errors, per-symbol actions). --report - for stdout.",
+)
+@click.option(
+    "--emit-edits",
+    "emit_edits",
+    type=click.Path(dir_okay=False, path_type=_pl.Path),
+    default=None,
+    help="Write the insertions as an edit list (- for stdout) instead of rewriting libraries; see `apply`.",
+)
+@click.option(
+    "--edits-format",
+    "edits_format",
+    type=click.Choice(["json", "diff"]),
+    default="json",
+    show_default=True,
+    help="json: byte offsets + text with base hashes (for `apply`); diff: unified diff for review / git apply.",
+)
 @click.option("--encoding", "encoding", type=str, default="utf-8")
+@click.option("--validate", "validate", is_flag=True, default=False, help="Also fully parse the input with sexpdata.")
+@click.option("--mmap", "use_mmap", is_flag=True, default=False, help="Memory-map the input and process it as bytes.")
+@click.option(
+    "--jobs",
+    "jobs",
+    type=int,
+    default=None,
+    help="Worker processes for directory/glob inputs (0 = one per CPU; default 1, or one per CPU for a project).",
+)
+@click.option(
+    "--shards",
+    "shards",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    help="Split one large library into N ranges of symbols processed by worker processes (0 = one per CPU).",
+)
+@click.option(
+    "--pipeline",
+    "pipeline",
+    is_flag=True,
+    default=False,
+    help="For directory/glob inputs, overlap reads, indexing and writes across files (slow/network filesystems).",
+)
+@click.option("--read-concurrency", "read_concurrency", type=click.IntRange(min=1), default=4, show_default=True)
+@click.option("--write-concurrency", "write_concurrency", type=click.IntRange(min=1), default=2, show_default=True)
+@click.option(
+    "--cache-dir",
+    "cache_dir",
+    type=click.Path(file_okay=False, path_type=_pl.Path),
+    default=None,
+    help="Skip files whose content is known (by hash) to already have every property.",
+)
+@click.option("--cache-max-mb", "cache_max_mb", type=int, default=64, show_default=True)
+@click.option(
+    "--timings",
+    "timings",
+    is_flag=True,
+    default=False,
+    help="Record per-phase wall time, bytes, symbols/s and tracemalloc peak (printed and in the report).",
+)
+@click.option(
+    "--values-from",
+    "values_from",
+    type=click.Path(exists=True, dir_okay=False, path_type=_pl.Path),
+    default=None,
+    help="CSV/JSON mapping of symbol -> property values, applied in the same pass.",
+)
+@click.option(
+    "--rules",
+    "rules_path",
+    type=click.Path(exists=True, dir_okay=False, path_type=_pl.Path),
+    default=None,
+    help="JSON/YAML file of ordered add/set/rename/delete operations, all applied in one scan.",
+)
+@click.option(
+    "--backup-store",
+    "backup_store",
+    is_flag=True,
+    default=False,
+    help="Back up into a deduplicated .kicad_sym_backups/ store instead of numbered .orig copies.",
+)
+@click.option(
+    "--backup-keep",
+    "backup_keep",
+    type=click.IntRange(min=1),
+    default=None,
+    help="With --backup-store, keep only the newest N backups per library.",
+)
 def attach(
     input_path: _pl.Path,
     prop_names: tuple[str, ...],
@@ -53,28 +183,127 @@ def attach(
     backup_suffix: str,
     dry_run: bool,
     report_path: _pl.Path | None,
+    report_max_names: int | None,
+    report_format: str,
+    emit_edits: _pl.Path | None,
+    edits_format: str,
     encoding: str,
+    validate: bool,
+    use_mmap: bool,
+    jobs: int | None,
+    shards: int,
+    pipeline: bool,
+    read_concurrency: int,
+    write_concurrency: int,
+    cache_dir: _pl.Path | None,
+    cache_max_mb: int,
+    timings: bool,
+    values_from: _pl.Path | None,
+    rules_path: _pl.Path | None,
+    backup_store: bool,
+    backup_keep: int | None,
 ) -> None:
     """
     Attach property to all Symbols. Skips existing same-name properties regardless of value.
     Produces Markdown report with summary and highlighted errors/warnings.
     """
 
+    if not prop_names and values_from is None and rules_path is None:
+        raise click.UsageError("Give at least one --property-name, a --values-from mapping or a --rules file.")
+    stream = str(input_path) == "-"
+    batch = not stream and _lib("batch").is_batch_input(input_path)
+    if jobs is None:
+        # Projects run their schematics and libraries in parallel by default.
+        jobs = 0 if batch and not pipeline and _lib("batch").project_root(input_path) is not None else 1
+    _check_attach_modes(
+        batch=batch,
+        stream=stream,
+        backup_store=backup_store,
+        output_path=output_path,
+        emit_edits=emit_edits,
+        shards=shards,
+        pipeline=pipeline,
+        jobs=jobs,
+        use_mmap=use_mmap,
+        cache_dir=cache_dir,
+        rules=rules_path is not None,
+        values_from=values_from,
+    )
+    rules = _load_rules(rules_path, list(prop_names), prop_value, encoding) if rules_path is not None else None
+    if stream:
+        _attach_stream(
+            output_path,
+            prop_names=list(prop_names),
+            prop_value=prop_value,
+            values_from=values_from,
+            rules=rules,
+            dry_run=dry_run,
+            report_path=report_path,
+            report_max_names=report_max_names,
+            report_format=report_format,
+            encoding=encoding,
+            validate=validate,
+            timings=timings,
+        )
+        return
+    if emit_edits is not None:
+        _emit_edits(
+            input_path,
+            emit_edits,
+            edits_format,
+            prop_names=list(prop_names),
+            prop_value=prop_value,
+            values_from=values_from,
+            encoding=encoding,
+            rules=rules,
+        )
+        return
+    if batch:
+        _attach_batch(
+            input_path,
+            prop_names=list(prop_names),
+            prop_value=prop_value,
+            dry_run=dry_run,
+            report_path=report_path,
+            report_max_names=report_max_names,
+            report_format=report_format,
+            encoding=encoding,
+            validate=validate,
+            use_mmap=use_mmap,
+            jobs=jobs,
+            pipeline=(read_concurrency, write_concurrency) if pipeline else None,
+            cache_dir=cache_dir,
+            cache_max_bytes=cache_max_mb * 1024 * 1024,
+            timings=timings,
+            values_path=values_from,
+            backup_store=backup_store,
+            backup_keep=backup_keep,
+            rules=rules,
+        )
+        return
+
     # New spec: --output 可以不提供参数，默认为输入文件路径与文件名。
     # 若同时提供 --in-place，以输入路径为准；保持兼容但不再强制互斥。
     if output_path is None:
         output_path = input_path
 
+    attacher = _lib("attacher")
+    report = _lib("report")
     # Default report path next to target file with timestamp
     if report_path is None:
-        ts = _dt.datetime.now().strftime("%Y%m%d-%H%M%S")
+        ts = _timestamp()
         base = (output_path or input_path).with_suffix("")
-        report_path = base.parent / f"{base.name}.{ts}.report.md"
+        report_path = base.parent / f"{base.name}.{ts}.report{report.REPORT_SUFFIXES[report_format]}"
 
-    ropts = ReportOptions(report_path=report_path)
+    ropts = report.ReportOptions(report_path=report_path, max_listed=report_max_names, format=report_format)
+    inventory_cache = (
+        _lib("cache").InventoryCache(cache_dir, cache_max_mb * 1024 * 1024) if cache_dir is not None else None
+    )
+    timing = _lib("timing").Timings() if timings else None
 
     try:
-        stats = attach_property_to_file(
+        values = _lib("mapping").load_values(values_from, encoding) if values_from is not None else None
+        stats = attacher.attach_property_to_file(
             input_path=input_path,
             output_path=output_path,
             in_place=True,  # 始终按新规范备份输入原始文件并写出到输出（默认同输入）
@@ -84,25 +313,640 @@ def attach(
             dry_run=dry_run,
             encoding=encoding,
             report_options=ropts,
+            validate=validate,
+            use_mmap=use_mmap,
+            shards=shards,
+            cache=inventory_cache,
+            timings=timing,
+            values=values,
+            backup_store=_lib("backups").BackupStore.beside(input_path, backup_keep) if backup_store else None,
+            rules=rules,
         )
     except Exception as exc:  # noqa: BLE001
         # Failure path should still generate a report per SC-005
         from contextlib import suppress
 
         with suppress(Exception):
-            write_markdown_report(
-                report_path=ropts.report_path,
-                input_path=str(input_path),
-                output_path=str(output_path or input_path),
+            _write_single_report(
+                report, ropts.report_path, report_format, str(input_path), str(output_path), None, str(exc)
+            )
+        click.echo(f"Error: {exc}", err=True)
+        sys.exit(2)
+    finally:
+        if inventory_cache is not None:
+            inventory_cache.close()
+        if timing is not None:
+            timing.close()
+
+    # Success; keep stdout clean when the report itself goes there.
+    click.echo(_counts(stats), err=str(report_path) == "-")
+    _echo_timings(stats.timings)
+
+
+def _attach_batch(
+    spec: _pl.Path,
+    *,
+    prop_names: list[str],
+    prop_value: str,
+    dry_run: bool,
+    report_path: _pl.Path | None,
+    report_max_names: int | None,
+    report_format: str,
+    encoding: str,
+    validate: bool,
+    use_mmap: bool,
+    jobs: int,
+    pipeline: tuple[int, int] | None,
+    cache_dir: _pl.Path | None,
+    cache_max_bytes: int,
+    timings: bool,
+    values_path: _pl.Path | None,
+    backup_store: bool,
+    backup_keep: int | None,
+    rules: RuleSetT | None = None,
+) -> None:
+    batch = _lib("batch")
+    report = _lib("report")
+    paths = batch.expand_inputs(spec)
+    if report_path is None:
+        ts = _timestamp()
+        base_dir = batch.project_root(spec) or (spec if spec.is_dir() else _pl.Path.cwd())
+        report_path = base_dir / f"kicad-sym-prop.{ts}.report{report.REPORT_SUFFIXES[report_format]}"
+    if not paths:
+        message = f"No {' or '.join(batch.input_suffixes(spec))} files matched {spec}"
+        if report_format == "markdown":
+            report.write_markdown_report(
+                report_path=report_path,
+                input_path=str(spec),
+                output_path=str(spec),
                 stats=None,
-                errors=[str(exc)],
+                errors=[message],
                 warnings=[],
+                file_count=0,
             )
-        click.echo(f"Error: {exc}", err=True)
+        else:
+            report.write_records(report_path, [report.file_record(str(spec), None, message)], report_format)
+        click.echo(f"Error: {message}", err=True)
+        sys.exit(2)
+
+    options: dict[str, Any] = {
+        "dry_run": dry_run,
+        "encoding": encoding,
+        "validate": validate,
+        "timings": timings,
+        "values_path": values_path,
+        "backup_store": backup_store,
+        "backup_keep": backup_keep,
+    }
+    if pipeline is not None:
+        run = _lib("pipeline").run_pipelined
+        options.update(read_concurrency=pipeline[0], write_concurrency=pipeline[1])
+    else:
+        run = batch.run_batch
+        options.update(jobs=jobs, use_mmap=use_mmap, cache_dir=cache_dir, cache_max_bytes=cache_max_bytes)
+        if rules is not None:
+            options["rules"] = rules
+    if report_format == "markdown":
+        result = run(paths, prop_names, prop_value, **options)
+        errors = result.errors
+        report.write_markdown_report(
+            report_path=report_path,
+            input_path=str(spec),
+            output_path=str(spec),
+            stats=result.stats,
+            errors=errors,
+            warnings=[],
+            file_count=len(paths),
+            max_listed=report_max_names,
+        )
+    else:
+        # Stream one record per file as results arrive; nothing per-file is retained.
+        errors = []
+        with report.RecordWriter(report_path, report_format) as writer:
+
+            def on_result(file_result: FileResultT) -> None:
+                if file_result.error is not None:
+                    errors.append(f"{file_result.path}: {file_result.error}")
+                writer.write(report.file_record(str(file_result.path), file_result.stats, file_result.error))
+
+            result = run(paths, prop_names, prop_value, on_result=on_result, **options)
+    for err in errors:
+        click.echo(f"Error: {err}", err=True)
+    stats = result.stats
+    click.echo(f"Files={len(paths)} failed={len(errors)} {_counts(stats)}", err=str(report_path) == "-")
+    _echo_timings(stats.timings)
+    if errors:
+        sys.exit(2)
+
+
+def _attach_stream(
+    output_path: _pl.Path | None,
+    *,
+    prop_names: list[str],
+    prop_value: str,
+    values_from: _pl.Path | None,
+    rules: RuleSetT | None,
+    dry_run: bool,
+    report_path: _pl.Path | None,
+    report_max_names: int | None,
+    report_format: str,
+    encoding: str,
+    validate: bool,
+    timings: bool,
+) -> None:
+    """`attach --input -`: stream stdin to stdout (or `--output`); a report only with `--report`."""
+    to_stdout = output_path is None or str(output_path) == "-"
+    if to_stdout and not dry_run and report_path is not None and str(report_path) == "-":
+        raise click.UsageError("--report - cannot share stdout with the streamed library; give a report file.")
+    report = _lib("report")
+    values = _lib("mapping").load_values(values_from, encoding) if values_from is not None else None
+    timing = _lib("timing").Timings() if timings else None
+    out: BinaryIO
+    with contextlib.ExitStack() as stack:
+        if timing is not None:
+            stack.callback(timing.close)
+        if dry_run:
+            out = stack.enter_context(open(os.devnull, "wb"))
+        elif to_stdout:
+            out = click.get_binary_stream("stdout")
+        else:
+            assert output_path is not None
+            out = stack.enter_context(_lib("io").atomic_writer(output_path))
+        try:
+            stats = _lib("stream").attach_stream(
+                click.get_binary_stream("stdin"),
+                out,
+                prop_names,
+                prop_value,
+                values=values,
+                rules=rules,
+                encoding=encoding,
+                validate=validate,
+                timings=timing,
+            )
+        except ValueError as exc:
+            if report_path is not None:
+                _write_single_report(report, report_path, report_format, "-", str(output_path or "-"), None, str(exc))
+            click.echo(f"Error: {exc}", err=True)
+            sys.exit(2)
+    if report_path is not None:
+        _write_single_report(
+            report, report_path, report_format, "-", str(output_path or "-"), stats, None, report_max_names
+        )
+    click.echo(_counts(stats), err=True)
+    _echo_timings(stats.timings)
+
+
+def _write_single_report(
+    report: ModuleType,
+    report_path: _pl.Path,
+    report_format: str,
+    input_name: str,
+    output_name: str,
+    stats: AttachStatsT | None,
+    error: str | None,
+    max_listed: int | None = None,
+) -> None:
+    if report_format == "markdown":
+        report.write_markdown_report(
+            report_path=report_path,
+            input_path=input_name,
+            output_path=output_name,
+            stats=stats,
+            errors=[error] if error is not None else [],
+            warnings=[],
+            max_listed=max_listed,
+        )
+    else:
+        report.write_records(report_path, [report.file_record(input_name, stats, error)], report_format)
+
+
+def _check_attach_modes(
+    *,
+    batch: bool,
+    stream: bool = False,
+    backup_store: bool = False,
+    output_path: _pl.Path | None,
+    emit_edits: _pl.Path | None,
+    shards: int,
+    pipeline: bool,
+    jobs: int,
+    use_mmap: bool,
+    cache_dir: _pl.Path | None,
+    rules: bool = False,
+    values_from: _pl.Path | None = None,
+) -> None:
+    if emit_edits is not None and (output_path is not None or pipeline or shards != 1):
+        raise click.UsageError("--emit-edits cannot be combined with --output, --pipeline or --shards.")
+    if rules and (values_from is not None or pipeline or shards != 1):
+        raise click.UsageError("--rules cannot be combined with --values-from, --pipeline or --shards.")
+    if stream and (
+        emit_edits is not None
+        or shards != 1
+        or jobs != 1
+        or use_mmap
+        or pipeline
+        or cache_dir is not None
+        or backup_store
+    ):
+        raise click.UsageError(
+            "--input - cannot be combined with --emit-edits, --shards, --jobs, --mmap, --pipeline, --cache-dir "
+            "or --backup-store."
+        )
+    if not batch:
+        return
+    if output_path is not None:
+        raise click.UsageError("--output cannot be used with a directory or glob --input.")
+    if shards != 1:
+        raise click.UsageError("--shards applies to a single-file --input; use --jobs for directories and globs.")
+    if pipeline and (jobs != 1 or use_mmap or cache_dir is not None):
+        raise click.UsageError("--pipeline cannot be combined with --jobs, --mmap or --cache-dir.")
+
+
+def _emit_edits(
+    spec: _pl.Path,
+    dest: _pl.Path,
+    edits_format: str,
+    *,
+    prop_names: list[str],
+    prop_value: str,
+    values_from: _pl.Path | None,
+    encoding: str,
+    rules: RuleSetT | None = None,
+) -> None:
+    edits = _lib("edits")
+    values = _lib("mapping").load_values(values_from, encoding) if values_from is not None else None
+    paths = _lib("batch").expand_inputs(spec)
+    total = _lib("attacher").AttachStats()
+    planned = []
+    failed = 0
+    for path in paths:
+        try:
+            file_edits, stats = edits.plan_file_edits(
+                path, prop_names, prop_value, values=values, encoding=encoding, rules=rules
+            )
+        except (OSError, ValueError) as exc:
+            click.echo(f"Error: {path}: {exc}", err=True)
+            failed += 1
+            continue
+        total.merge(stats, symbols=False)
+        if file_edits.edits:
+            planned.append(file_edits)
+
+    to_stdout = str(dest) == "-"
+    out = sys.stdout if to_stdout else dest.open("w", encoding="utf-8", newline="")
+    try:
+        if edits_format == "json":
+            edits.dump_json(planned, out)
+        else:
+            for file_edits in planned:
+                out.writelines(edits.unified_diff(file_edits))
+    finally:
+        if not to_stdout:
+            out.close()
+    click.echo(f"Files={len(paths)} failed={failed} changed={len(planned)} {_counts(total)}", err=True)
+    if failed:
+        sys.exit(2)
+
+
+def _load_rules(path: _pl.Path, prop_names: list[str], prop_value: str, encoding: str) -> RuleSetT:
+    """The rules of `path`, followed by plain additions for any --property-name."""
+    rules = _lib("rules")
+    try:
+        loaded: RuleSetT = rules.load_rules(path, encoding)
+    except ValueError as exc:
+        raise click.UsageError(str(exc)) from exc
+    if prop_names:
+        loaded += rules.RuleSet.adding(prop_names, prop_value)
+    return loaded
+
+
+def _counts(stats: AttachStatsT) -> str:
+    line = f"Processed={stats.symbols_processed} added={stats.properties_added} skipped={stats.properties_skipped}"
+    for label in ("updated", "renamed", "deleted"):
+        count = getattr(stats, f"properties_{label}")
+        if count:
+            line += f" {label}={count}"
+    return line
+
+
+@kicad_sym_prop.command("apply")
+@click.option(
+    "--edits",
+    "edits_path",
+    type=click.Path(exists=True, dir_okay=False, path_type=_pl.Path),
+    required=True,
+    help="A JSON edit list written by `attach --emit-edits`.",
+)
+@click.option(
+    "--input",
+    "input_path",
+    type=click.Path(dir_okay=False, path_type=_pl.Path),
+    default=None,
+    help="Apply to this library instead of the recorded path (single-file edit lists only).",
+)
+@click.option(
+    "--backup-store",
+    "backup_store",
+    is_flag=True,
+    default=False,
+    help="Back up into a deduplicated .kicad_sym_backups/ store instead of numbered .orig copies.",
+)
+@click.option(
+    "--backup-keep",
+    "backup_keep",
+    type=click.IntRange(min=1),
+    default=None,
+    help="With --backup-store, keep only the newest N backups per library.",
+)
+def apply(edits_path: _pl.Path, input_path: _pl.Path | None, backup_store: bool, backup_keep: int | None) -> None:
+    """
+    Apply an edit list in place. Each library must still have the content the edits were computed from
+    (checked by SHA-256); libraries that changed since are left untouched and reported.
+    """
+    edits = _lib("edits")
+    try:
+        files = edits.load_json(edits_path)
+    except ValueError as exc:
+        raise click.UsageError(str(exc)) from exc
+    if input_path is not None and len(files) != 1:
+        raise click.UsageError("--input can only be used with an edit list for a single library.")
+    failed = 0
+    for file_edits in files:
+        target = input_path or _pl.Path(file_edits.path)
+        store = _lib("backups").BackupStore.beside(target, backup_keep) if backup_store else None
+        try:
+            count = edits.apply_file_edits(file_edits, target, backup_store=store)
+        except (OSError, ValueError) as exc:
+            click.echo(f"Error: {exc}", err=True)
+            failed += 1
+            continue
+        click.echo(f"{target}: applied {count} edit(s)")
+    if failed:
         sys.exit(2)
 
-    # Success
-    click.echo(f"Processed={stats.symbols_processed} added={stats.properties_added} skipped={stats.properties_skipped}")
+
+@kicad_sym_prop.command("watch")
+@click.option(
+    "--input",
+    "input_path",
+    type=click.Path(path_type=_pl.Path),
+    required=True,
+    help="A .kicad_sym or .kicad_sch file, a directory (searched recursively), a glob pattern or a .kicad_pro project.",
+)
+@click.option("--property-name", "prop_names", type=str, multiple=True)
+@click.option("--property-value", "prop_value", type=str, default="")
+@click.option(
+    "--values-from",
+    "values_from",
+    type=click.Path(exists=True, dir_okay=False, path_type=_pl.Path),
+    default=None,
+    help="CSV/JSON mapping of symbol -> property values, applied in the same pass.",
+)
+@click.option("--encoding", "encoding", type=str, default="utf-8")
+@click.option("--mmap", "use_mmap", is_flag=True, default=False, help="Memory-map the input and process it as bytes.")
+@click.option("--interval", "interval", type=float, default=1.0, show_default=True, help="Seconds between polls.")
+@click.option(
+    "--debounce",
+    "debounce",
+    type=float,
+    default=0.5,
+    show_default=True,
+    help="Seconds a change must stay stable before the file is processed.",
+)
+@click.option(
+    "--backup-store",
+    "backup_store",
+    is_flag=True,
+    default=False,
+    help="Back up into a deduplicated .kicad_sym_backups/ store instead of numbered .orig copies.",
+)
+@click.option(
+    "--backup-keep",
+    "backup_keep",
+    type=click.IntRange(min=1),
+    default=None,
+    help="With --backup-store, keep only the newest N backups per library.",
+)
+def watch(
+    input_path: _pl.Path,
+    prop_names: tuple[str, ...],
+    prop_value: str,
+    values_from: _pl.Path | None,
+    encoding: str,
+    use_mmap: bool,
+    interval: float,
+    debounce: float,
+    backup_store: bool,
+    backup_keep: int | None,
+) -> None:
+    """
+    Watch libraries and backfill missing properties whenever they change (Ctrl-C to stop).
+    Indexes stay in memory; only changed files are re-indexed, and only incomplete ones are written.
+    """
+    if not prop_names and values_from is None:
+        raise click.UsageError("Give at least one --property-name or a --values-from mapping.")
+    values = _lib("mapping").load_values(values_from, encoding) if values_from is not None else None
+    watcher = _lib("watch").Watcher(
+        input_path,
+        list(prop_names),
+        prop_value,
+        values=values,
+        encoding=encoding,
+        use_mmap=use_mmap,
+        debounce=debounce,
+        backup_store=backup_store,
+        backup_keep=backup_keep,
+    )
+    click.echo(f"Watching {input_path} (interval={interval}s, debounce={debounce}s)", err=True)
+    from contextlib import suppress
+
+    with suppress(KeyboardInterrupt):
+        watcher.run(interval, on_result=_echo_watch_result)
+
+
+@kicad_sym_prop.command("check")
+@click.option(
+    "--input",
+    "input_path",
+    type=click.Path(path_type=_pl.Path),
+    required=True,
+    help="A .kicad_sym or .kicad_sch file, a directory (searched recursively), a glob pattern or a .kicad_pro project.",
+)
+@click.option("--property-name", "prop_names", type=str, multiple=True)
+@click.option(
+    "--values-from",
+    "values_from",
+    type=click.Path(exists=True, dir_okay=False, path_type=_pl.Path),
+    default=None,
+    help="CSV/JSON mapping of symbol -> property values; mapped properties are required too.",
+)
+@click.option("--encoding", "encoding", type=str, default="utf-8")
+@click.option(
+    "--fail-fast", "fail_fast", is_flag=True, default=False, help="Stop at the first symbol missing a property."
+)
+def check(
+    input_path: _pl.Path,
+    prop_names: tuple[str, ...],
+    values_from: _pl.Path | None,
+    encoding: str,
+    fail_fast: bool,
+) -> None:
+    """
+    Check that every symbol has the given properties, without writing anything (for CI).
+    Exits 0 when complete, 1 when a symbol lacks a property, 2 when a library cannot be read or scanned.
+    """
+    if not prop_names and values_from is None:
+        raise click.UsageError("Give at least one --property-name or a --values-from mapping.")
+    values = _lib("mapping").load_values(values_from, encoding) if values_from is not None else None
+    paths = _expand_inputs_or_exit(input_path)
+
+    def on_missing(path: _pl.Path, name: str, absent: list[str]) -> None:
+        click.echo(f"{path}: {name}: missing {', '.join(absent)}")
+
+    def on_error(path: _pl.Path, message: str) -> None:
+        click.echo(f"Error: {path}: {message}", err=True)
+
+    summary = _lib("check").check_paths(
+        paths,
+        list(prop_names),
+        values=values,
+        encoding=encoding,
+        fail_fast=fail_fast,
+        on_missing=on_missing,
+        on_error=on_error,
+    )
+    click.echo(
+        f"Files={summary.files} symbols={summary.symbols} incomplete={summary.incomplete} errors={summary.errors}",
+        err=True,
+    )
+    if summary.errors:
+        sys.exit(2)
+    if summary.incomplete:
+        sys.exit(1)
+
+
+@kicad_sym_prop.command("scan")
+@click.option(
+    "--input",
+    "input_path",
+    type=click.Path(path_type=_pl.Path),
+    required=True,
+    help="A .kicad_sym or .kicad_sch file, a directory (searched recursively), a glob pattern or a .kicad_pro project.",
+)
+@click.option(
+    "--property-name",
+    "prop_names",
+    type=str,
+    multiple=True,
+    help="Only inventory these properties (default: all); each is listed in the coverage even where absent.",
+)
+@click.option("--format", "fmt", type=click.Choice(["csv", "ndjson"]), default="csv", show_default=True)
+@click.option(
+    "--output",
+    "output_path",
+    type=click.Path(dir_okay=False, path_type=_pl.Path),
+    default="-",
+    show_default=True,
+    help="Inventory table: one row per (library, symbol, property, value_len, value_hash); - for stdout.",
+)
+@click.option(
+    "--coverage",
+    "coverage_path",
+    type=click.Path(dir_okay=False, path_type=_pl.Path),
+    default=None,
+    help="Write per-property coverage counts here in --format (default: print them to stderr).",
+)
+@click.option(
+    "--jobs",
+    "jobs",
+    type=int,
+    default=0,
+    show_default=True,
+    help="Worker processes across files (0 = one per CPU).",
+)
+@click.option("--encoding", "encoding", type=str, default="utf-8")
+def scan(
+    input_path: _pl.Path,
+    prop_names: tuple[str, ...],
+    fmt: str,
+    output_path: _pl.Path,
+    coverage_path: _pl.Path | None,
+    jobs: int,
+    encoding: str,
+) -> None:
+    """
+    Inventory which properties exist on which symbols, scanning every library once (read-only).
+    Exits 0 on success and 2 when a library cannot be read or scanned, or when nothing matched.
+    """
+    scan_lib = _lib("scan")
+    paths = _expand_inputs_or_exit(input_path)
+    to_stdout = str(output_path) == "-"
+    if to_stdout and coverage_path is not None and str(coverage_path) == "-":
+        raise click.UsageError("--output and --coverage cannot both go to stdout.")
+
+    with contextlib.ExitStack() as stack:
+        f = sys.stdout if to_stdout else stack.enter_context(output_path.open("w", encoding="utf-8", newline=""))
+        table = scan_lib.TableWriter(f, fmt, scan_lib.ROW_FIELDS)
+
+        def on_file(inventory: Any) -> None:
+            if inventory.error is not None:
+                click.echo(f"Error: {inventory.path}: {inventory.error}", err=True)
+            else:
+                table.write_rows(inventory.rows())
+
+        summary = scan_lib.scan_paths(
+            paths, prop_names=list(prop_names) or None, encoding=encoding, jobs=jobs, on_file=on_file
+        )
+
+    coverage = summary.coverage(list(dict.fromkeys(prop_names)) or None)
+    if coverage_path is not None:
+        if str(coverage_path) == "-":
+            scan_lib.TableWriter(sys.stdout, fmt, scan_lib.COVERAGE_FIELDS).write_records(coverage)
+        else:
+            with coverage_path.open("w", encoding="utf-8", newline="") as f:
+                scan_lib.TableWriter(f, fmt, scan_lib.COVERAGE_FIELDS).write_records(coverage)
+    else:
+        for record in coverage:
+            click.echo(
+                f"{record['property']}: {record['symbols']}/{record['total']} symbols "
+                f"({record['coverage']:.1%}), non-empty {record['non_empty']}",
+                err=True,
+            )
+    click.echo(f"Files={summary.files} symbols={summary.symbols} rows={summary.rows} errors={summary.errors}", err=True)
+    if summary.errors:
+        sys.exit(2)
+
+
+def _expand_inputs_or_exit(spec: _pl.Path) -> list[_pl.Path]:
+    """`batch.expand_inputs(spec)`; exits 2 when nothing matched, so a mistyped path cannot pass."""
+    batch = _lib("batch")
+    paths: list[_pl.Path] = batch.expand_inputs(spec)
+    if not paths:
+        click.echo(f"Error: No {' or '.join(batch.input_suffixes(spec))} files matched {spec}", err=True)
+        sys.exit(2)
+    return paths
+
+
+def _echo_watch_result(result: FileResultT) -> None:
+    if result.error is not None:
+        click.echo(f"Error: {result.path}: {result.error}", err=True)
+    elif result.stats is None:
+        click.echo(f"{result.path}: up to date")
+    else:
+        stats = result.stats
+        click.echo(f"{result.path}: added={stats.properties_added} skipped={stats.properties_skipped}")
+
+
+def _echo_timings(timings: TimingsT | None) -> None:
+    if timings is None:
+        return
+    for ph in timings.phases:
+        rate = f" {ph.symbols_per_s:,.0f} sym/s" if ph.symbols_per_s is not None else ""
+        peak = f" peak={ph.peak_bytes / 1e6:.1f}MB" if ph.peak_bytes is not None else ""
+        click.echo(f"  {ph.name:<13} {ph.seconds:8.4f}s {ph.bytes:>12,} B{rate}{peak}", err=True)
+    if timings.traced:
+        click.echo("  (times taken under tracemalloc are inflated)", err=True)
 
 
 def main() -> None:  # Entry point for console_scripts
@@ -6,12 +6,28 @@ write in-place with backup or to a new file.
 
 from __future__ import annotations
 
+import contextlib
 import dataclasses as _dc
+import functools
+import mmap
 import pathlib as _pl
+import re
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from typing import TYPE_CHECKING, BinaryIO, overload
 
 from . import io as _io
 from . import parser
-from .report import ReportOptions, write_markdown_report
+from .report import ReportOptions, file_record, write_markdown_report, write_records
+from .timing import Timings
+from .timing import phase as _phase
+
+if TYPE_CHECKING:
+    from . import cache as _cache
+    from .backups import BackupStore
+    from .rules import RuleSet
+
+# (symbol span, [(prop_name, prop_value), ...]) in text order
+Additions = list[tuple[parser.SymbolSpan, list[tuple[str, str]]]]
 
 
 @_dc.dataclass
@@ -19,8 +35,186 @@ class AttachStats:
     symbols_processed: int = 0
     properties_added: int = 0
     properties_skipped: int = 0
-    skipped_symbols: list[str] = _dc.field(default_factory=list)
-    added_symbols: list[str] = _dc.field(default_factory=list)
+    # Rule runs only (`rules.RuleSet`): existing properties whose value was changed, renamed or removed.
+    properties_updated: int = 0
+    properties_renamed: int = 0
+    properties_deleted: int = 0
+    # Compact per-symbol record. Property `property_names[i]` owns bits 2i (added) and
+    # 2i+1 (skipped) of `symbol_masks[j]`, the mask of `symbol_names[j]`. Symbols with
+    # nothing added or skipped are not recorded, and equal masks share one int object.
+    property_names: list[str] = _dc.field(default_factory=list, repr=False)
+    symbol_names: list[str] = _dc.field(default_factory=list, repr=False)
+    symbol_masks: list[int] = _dc.field(default_factory=list, repr=False)
+    _shared_masks: dict[int, int] = _dc.field(default_factory=dict, init=False, repr=False, compare=False)
+    # Index the stats were computed from; lets callers query the library without re-parsing.
+    index: parser.SymbolIndex | None = _dc.field(default=None, repr=False, compare=False)
+    # True when the file was skipped because the inventory cache showed nothing to add.
+    cached: bool = False
+    # Keys of a `values` mapping that matched no symbol; None when no mapping was used.
+    unmatched_mapping_keys: list[str] | None = None
+    timings: Timings | None = _dc.field(default=None, repr=False, compare=False)
+
+    def merge(self, other: AttachStats, *, symbols: bool = True) -> None:
+        """Accumulate `other` (e.g. from another file of a batch) into these stats.
+
+        With `symbols=False` only counters, unmatched keys and timings are merged.
+        """
+        self.symbols_processed += other.symbols_processed
+        self.properties_added += other.properties_added
+        self.properties_skipped += other.properties_skipped
+        self.properties_updated += other.properties_updated
+        self.properties_renamed += other.properties_renamed
+        self.properties_deleted += other.properties_deleted
+        if symbols:
+            self._merge_symbols(other)
+        if other.unmatched_mapping_keys is not None:
+            # Across files, a key is unmatched only if no file matched it.
+            if self.unmatched_mapping_keys is None:
+                self.unmatched_mapping_keys = list(other.unmatched_mapping_keys)
+            else:
+                still = set(other.unmatched_mapping_keys)
+                self.unmatched_mapping_keys = [k for k in self.unmatched_mapping_keys if k in still]
+        if other.timings is not None:
+            if self.timings is None:
+                self.timings = Timings(trace_memory=other.timings.trace_memory)
+            self.timings.merge(other.timings)
+
+    def _merge_symbols(self, other: AttachStats) -> None:
+        bits = [self.property_bit(name) for name in other.property_names]
+        if bits == [1 << 2 * i for i in range(len(bits))]:
+            self.symbol_names.extend(other.symbol_names)
+            self.symbol_masks.extend(other.symbol_masks)
+        else:
+            for name, mask in zip(other.symbol_names, other.symbol_masks):
+                self.record(name, _remap(mask, bits), _remap(mask >> 1, bits))
+
+    def property_bit(self, prop_name: str) -> int:
+        """The mask bit for `prop_name`, assigning the next one on first use."""
+        try:
+            return 1 << 2 * self.property_names.index(prop_name)
+        except ValueError:
+            self.property_names.append(prop_name)
+            return 1 << 2 * (len(self.property_names) - 1)
+
+    def record(self, symbol: str, added_mask: int, skipped_mask: int) -> None:
+        """Record the properties (ORed `property_bit`s) added to / skipped on `symbol`."""
+        mask = added_mask | skipped_mask << 1
+        if mask:
+            self.symbol_names.append(symbol or "<unnamed>")
+            self.symbol_masks.append(self._shared_masks.setdefault(mask, mask))
+
+    def iter_added(self) -> Iterator[tuple[str, list[str]]]:
+        """Yield (symbol, added property names) for symbols that got properties."""
+        return self._iter_masks(0)
+
+    def iter_skipped(self) -> Iterator[tuple[str, list[str]]]:
+        """Yield (symbol, skipped property names) for symbols that already had properties."""
+        return self._iter_masks(1)
+
+    @property
+    def added_symbols(self) -> list[str]:
+        """Symbol names, once per added property (materialised on demand)."""
+        return [name for name, props in self.iter_added() for _ in props]
+
+    @property
+    def skipped_symbols(self) -> list[str]:
+        """Symbol names, once per skipped property (materialised on demand)."""
+        return [name for name, props in self.iter_skipped() for _ in props]
+
+    def _iter_masks(self, shift: int) -> Iterator[tuple[str, list[str]]]:
+        names = self.property_names
+        for symbol, mask in zip(self.symbol_names, self.symbol_masks):
+            props = [pn for i, pn in enumerate(names) if mask >> (2 * i + shift) & 1]
+            if props:
+                yield symbol, props
+
+
+def _remap(mask: int, bits: list[int]) -> int:
+    # Translate the even (per-property) bits of `mask` to `bits`.
+    out = 0
+    for i, bit in enumerate(bits):
+        if mask >> 2 * i & 1:
+            out |= bit
+    return out
+
+
+@overload
+def attach_properties(
+    source: str,
+    prop_names: Iterable[str] = (),
+    prop_value: str = "",
+    *,
+    values: Mapping[str, Mapping[str, str]] | None = None,
+    rules: RuleSet | None = None,
+    encoding: str = "utf-8",
+    validate: bool = False,
+    timings: Timings | None = None,
+) -> tuple[str, AttachStats]: ...
+
+
+@overload
+def attach_properties(
+    source: bytes,
+    prop_names: Iterable[str] = (),
+    prop_value: str = "",
+    *,
+    values: Mapping[str, Mapping[str, str]] | None = None,
+    rules: RuleSet | None = None,
+    encoding: str = "utf-8",
+    validate: bool = False,
+    timings: Timings | None = None,
+) -> tuple[bytes, AttachStats]: ...
+
+
+def attach_properties(
+    source: str | bytes,
+    prop_names: Iterable[str] = (),
+    prop_value: str = "",
+    *,
+    values: Mapping[str, Mapping[str, str]] | None = None,
+    rules: RuleSet | None = None,
+    encoding: str = "utf-8",
+    validate: bool = False,
+    timings: Timings | None = None,
+) -> tuple[str | bytes, AttachStats]:
+    """Attach properties to the library content `source` in memory and return (output, stats).
+
+    Nothing is read, backed up or written: this is the core of `attach_property_to_file`,
+    for callers that keep libraries elsewhere than in files. `str` input is processed like
+    the default text path; `bytes` input like `use_mmap` (offsets in bytes, line endings kept,
+    only the inserted blocks encoded with `encoding`). The output has the type of `source`.
+    `prop_names`, `prop_value`, `values` and `rules` behave as in `attach_property_to_file`.
+    """
+    if rules is not None:
+        from .edits import splice
+        from .rules import plan_source
+
+        stats, edits = plan_source(source, rules, encoding=encoding, validate=validate, timings=timings)
+        with _phase(timings, "splice", symbols=len(edits)) as ph:
+            output = splice(source, edits, encoding)
+            ph.bytes = len(output)
+    else:
+        stats, to_add = _plan_source(
+            source,
+            len(source),
+            list(prop_names),
+            prop_value,
+            validate=validate,
+            timings=timings,
+            values=values,
+            encoding=encoding,
+        )
+        with _phase(timings, "splice", symbols=len(to_add)) as ph:
+            if isinstance(source, str):
+                newline = "\r\n" if "\r\n" in source else "\n"
+                output = "".join(_iter_text_chunks(source, to_add, newline=newline))
+            else:
+                newline = "\r\n" if b"\r\n" in source else "\n"
+                with memoryview(source) as view:
+                    output = b"".join(_iter_buffer_chunks(source, view, to_add, newline=newline, encoding=encoding))
+            ph.bytes = len(output)
+    stats.timings = timings
+    return output, stats
 
 
 def attach_property_to_file(
@@ -34,159 +228,429 @@ def attach_property_to_file(
     dry_run: bool = False,
     encoding: str = "utf-8",
     report_options: ReportOptions | None = None,
+    validate: bool = False,
+    use_mmap: bool = False,
+    cache: _cache.InventoryCache | None = None,
+    timings: Timings | None = None,
+    values: Mapping[str, Mapping[str, str]] | None = None,
+    backup_store: BackupStore | None = None,
+    shards: int = 1,
+    rules: RuleSet | None = None,
 ) -> AttachStats:
-    lib = parser.load_s_expr(input_path, encoding=encoding)
-    stats = AttachStats()
-    # Map symbol name -> list of property names to add
-    to_add: dict[str, list[str]] = {}
+    """Attach `prop_names` (with `prop_value`) to every top-level symbol lacking them.
 
-    for sym_sx, _idx in parser.iter_symbols(lib):
-        stats.symbols_processed += 1
-        name = parser.symbol_name(sym_sx)
-        props_to_add: list[str] = []
-        for pn in prop_names:
-            if parser.has_property(sym_sx, pn):
-                stats.properties_skipped += 1
-                stats.skipped_symbols.append(name or "<unnamed>")
-            else:
-                parser.add_property(sym_sx, pn, prop_value)
-                stats.properties_added += 1
-                stats.added_symbols.append(name or "<unnamed>")
-                props_to_add.append(pn)
-        if name and props_to_add:
-            to_add[name] = props_to_add
+    The file counterpart of `attach_properties`: the same planning and splicing, with the
+    input read (or mapped) from `input_path` and the output streamed to the target.
 
-    # Write output if not dry-run
-    if not dry_run:
-        # 新规范：在保存前，始终对 input 文件在同目录下做原始备份；备份不覆盖，使用递增编号。
-        _io.make_numbered_backup(input_path, base_suffix=".orig")
-        # 输出路径：若未显式提供 --output，则默认与输入同路径同文件名。
-        target = output_path or input_path
-        original = _io.read_text(input_path, encoding=encoding)
-        newline = "\r\n" if "\r\n" in original else "\n"
-        updated = _insert_properties_textual_multi(
-            original_text=original,
-            additions=[(sn, pn, prop_value) for sn, pns in to_add.items() for pn in pns],
-            newline=newline,
+    With `use_mmap` the input is memory-mapped and scanned as bytes: unchanged regions are
+    written straight from buffer slices without being decoded, and original line endings
+    are kept byte-for-byte. With `shards` other than 1 (0 = one per CPU), a large library
+    is additionally split into ranges of whole top-level symbols that are processed by
+    worker processes and stitched back in order (see `shard.attach_sharded`); the output
+    is the same as with `use_mmap`.
+
+    With `cache`, a file whose content hash is known to already carry every property is
+    skipped without parsing, backup or write (only when writing back in place or dry-running);
+    the inventory of the result is recorded for the next run.
+
+    With `values` (symbol name -> {property: value}, see `mapping.load_values`), each mapped
+    symbol also gets its mapped properties, with mapped values overriding `prop_value`; all
+    assignments are applied in the same single pass, and mapping keys that match no symbol
+    are listed in `stats.unmatched_mapping_keys`. Existing properties are never overwritten.
+
+    With `rules` (see `rules.load_rules`), the ordered add/set/rename/delete operations run
+    instead, in one scan over the memory-mapped input; `prop_names`, `prop_value`, `values`,
+    `use_mmap`, `shards` and `cache` are then ignored.
+
+    The input is backed up before it is written: into `backup_store` when given (content
+    addressed, deduplicated), otherwise as a numbered `.orig` copy next to it.
+
+    With `timings`, each phase (cache lookup, read, validate, index, plan, backup, the
+    streamed splice+write, cache store, report) is recorded there and on `stats.timings`.
+    """
+    cache = cache if rules is None else None
+    if cache is not None:
+        from . import cache as _cache
+    target = output_path or input_path
+    digest: str | None = None
+    stats: AttachStats | None = None
+    if cache is not None and (dry_run or target.resolve() == input_path.resolve()):
+        with _phase(timings, "cache_lookup") as ph:
+            ph.bytes = input_path.stat().st_size
+            digest = _io.file_digest(input_path)
+            inventory = cache.lookup(digest, encoding)
+            if inventory is not None and inventory.is_complete(prop_names, values):
+                stats = _stats_from_inventory(inventory, prop_names, values)
+
+    if stats is None and rules is not None:
+        from .rules import apply_rules_to_file
+
+        stats, _edits = apply_rules_to_file(
+            input_path,
+            rules,
+            output_path=output_path,
+            dry_run=dry_run,
+            encoding=encoding,
+            validate=validate,
+            timings=timings,
+            backup_store=backup_store,
         )
-        _io.write_text(target, updated, encoding=encoding)
+    if stats is None:
+        attach_impl: Callable[..., tuple[AttachStats, Additions]] = _attach_mapped if use_mmap else _attach_text
+        if shards != 1:
+            from .shard import attach_sharded
+
+            attach_impl = functools.partial(attach_sharded, shards=shards)
+        stats, to_add = attach_impl(
+            input_path,
+            prop_names,
+            prop_value,
+            output_path=output_path,
+            dry_run=dry_run,
+            encoding=encoding,
+            validate=validate,
+            timings=timings,
+            values=values,
+            backup_store=backup_store,
+        )
+        if cache is not None and stats.index is not None:
+            with _phase(timings, "cache_store"):
+                if dry_run:
+                    digest = digest or _io.file_digest(input_path)
+                    cache.store(digest, _cache.Inventory.from_index(stats.index), encoding)
+                else:
+                    cache.store(_io.file_digest(target), _inventory_after(stats.index, to_add), encoding)
+    stats.timings = timings
 
     # Report
     if report_options is not None:
-        write_markdown_report(
-            report_path=report_options.report_path,
-            input_path=str(input_path),
-            output_path=str(output_path or input_path),
-            stats=stats,
-            errors=[],
-            warnings=[],
-        )
+        with _phase(timings, "report"):
+            if report_options.format == "markdown":
+                write_markdown_report(
+                    report_path=report_options.report_path,
+                    input_path=str(input_path),
+                    output_path=str(output_path or input_path),
+                    stats=stats,
+                    errors=[],
+                    warnings=[],
+                    max_listed=report_options.max_listed,
+                )
+            else:
+                write_records(report_options.report_path, [file_record(str(input_path), stats)], report_options.format)
 
     return stats
 
 
-def _insert_properties_textual_multi(  # noqa: PLR0915
+def _stats_from_inventory(
+    inventory: _cache.Inventory, prop_names: list[str], values: Mapping[str, Mapping[str, str]] | None
+) -> AttachStats:
+    stats = AttachStats(cached=True)
+    for name, _props in inventory.symbols:
+        stats.symbols_processed += 1
+        skipped = 0
+        for pn in _props_for(name, prop_names, values):
+            stats.properties_skipped += 1
+            skipped |= stats.property_bit(pn)
+        stats.record(name, 0, skipped)
+    if values is not None:
+        names = {name for name, _props in inventory.symbols}
+        stats.unmatched_mapping_keys = [k for k in values if k not in names]
+    return stats
+
+
+def _inventory_after(index: parser.SymbolIndex, to_add: Additions) -> _cache.Inventory:
+    from . import cache as _cache
+
+    added = {span.start: [pn for pn, _pv in props] for span, props in to_add}
+    return _cache.Inventory((span.name, span.properties.union(added.get(span.start, ()))) for span in index)
+
+
+def _attach_text(
+    input_path: _pl.Path,
+    prop_names: list[str],
+    prop_value: str,
     *,
+    output_path: _pl.Path | None,
+    dry_run: bool,
+    encoding: str,
+    validate: bool,
+    timings: Timings | None,
+    values: Mapping[str, Mapping[str, str]] | None,
+    backup_store: BackupStore | None,
+) -> tuple[AttachStats, Additions]:
+    original, size = _read_text(input_path, encoding, timings)
+    stats, to_add = _plan_source(
+        original, size, prop_names, prop_value, validate=validate, timings=timings, values=values
+    )
+
+    # Write output if not dry-run
+    if not dry_run:
+        _write_text(
+            input_path,
+            original,
+            size,
+            to_add,
+            output_path=output_path,
+            encoding=encoding,
+            timings=timings,
+            backup_store=backup_store,
+        )
+    return stats, to_add
+
+
+# The text path in stages, so a pipelined batch (`pipeline.py`) can overlap one file's
+# read or write with another file's indexing.
+
+
+def _read_text(input_path: _pl.Path, encoding: str, timings: Timings | None) -> tuple[str, int]:
+    """The decoded text and its size on disk."""
+    with _phase(timings, "read") as ph:
+        original = _io.read_text(input_path, encoding=encoding)
+        ph.bytes = size = input_path.stat().st_size
+    return original, size
+
+
+def _plan_source(
+    original: str | mmap.mmap | bytes,
+    size: int,
+    prop_names: list[str],
+    prop_value: str,
+    *,
+    validate: bool,
+    timings: Timings | None,
+    values: Mapping[str, Mapping[str, str]] | None,
+    encoding: str = "utf-8",
+) -> tuple[AttachStats, Additions]:
+    """Validate, index and plan `original` (text, or a buffer with byte offsets); no I/O."""
+    if validate:
+        with _phase(timings, "validate", bytes=size):
+            parser.validate_s_expr(original if isinstance(original, str) else bytes(original).decode(encoding))
+    with _phase(timings, "index", bytes=size) as ph:
+        index = parser.SymbolIndex(parser.iter_library_symbols(original, encoding))
+        ph.symbols = len(index)
+    stats = AttachStats(index=index)
+    with _phase(timings, "plan", symbols=len(index)):
+        to_add = _plan_additions(index, prop_names, prop_value, stats, values)
+    return stats, to_add
+
+
+def _write_text(
+    input_path: _pl.Path,
+    original: str,
+    size: int,
+    to_add: Additions,
+    *,
+    output_path: _pl.Path | None,
+    encoding: str,
+    timings: Timings | None,
+    backup_store: BackupStore | None,
+) -> None:
+    # 新规范：在保存前，始终对 input 文件在同目录下做原始备份；备份不覆盖，使用递增编号。
+    with _phase(timings, "backup", bytes=size):
+        _make_backup(input_path, backup_store)
+    # 输出路径：若未显式提供 --output，则默认与输入同路径同文件名。
+    target = output_path or input_path
+    newline = "\r\n" if "\r\n" in original else "\n"
+    # Splicing is lazy, so it is timed together with the write it streams into.
+    with _phase(timings, "splice_write", symbols=len(to_add)) as ph:
+        chunks = _iter_text_chunks(original, to_add, newline=newline)
+        _io.write_text_chunks(target, chunks, encoding=encoding)
+        ph.bytes = target.stat().st_size
+
+
+def _attach_mapped(
+    input_path: _pl.Path,
+    prop_names: list[str],
+    prop_value: str,
+    *,
+    output_path: _pl.Path | None,
+    dry_run: bool,
+    encoding: str,
+    validate: bool,
+    timings: Timings | None,
+    values: Mapping[str, Mapping[str, str]] | None,
+    backup_store: BackupStore | None,
+) -> tuple[AttachStats, Additions]:
+    target = output_path or input_path
+    # The writer wraps the mapping so the target is only replaced after the source is unmapped.
+    writer: contextlib.AbstractContextManager[BinaryIO | None] = (
+        contextlib.nullcontext() if dry_run else _io.atomic_writer(target)
+    )
+    with writer as out, _io.map_file(input_path) as buf:
+        size = len(buf)
+        stats, to_add = _plan_source(
+            buf, size, prop_names, prop_value, validate=validate, timings=timings, values=values, encoding=encoding
+        )
+        if out is not None:
+            with _phase(timings, "backup", bytes=size):
+                _make_backup(input_path, backup_store)
+            newline = "\r\n" if buf.find(b"\r\n") != -1 else "\n"
+            with _phase(timings, "splice_write", symbols=len(to_add)) as ph, memoryview(buf) as view:
+                chunks = _iter_buffer_chunks(buf, view, to_add, newline=newline, encoding=encoding)
+                ph.bytes = _io.write_chunks(out, chunks)
+    return stats, to_add
+
+
+def _make_backup(input_path: _pl.Path, backup_store: BackupStore | None) -> _pl.Path:
+    if backup_store is not None:
+        return backup_store.backup(input_path)
+    return _io.make_numbered_backup(input_path, base_suffix=".orig")
+
+
+def _plan_additions(
+    index: parser.SymbolIndex,
+    prop_names: list[str],
+    prop_value: str,
+    stats: AttachStats,
+    values: Mapping[str, Mapping[str, str]] | None = None,
+) -> Additions:
+    """Return (symbol span, [(prop_name, prop_value)] to add) in text order, updating `stats`."""
+    to_add: Additions = []
+    bits = {pn: stats.property_bit(pn) for pn in prop_names}
+    for span in index:
+        stats.symbols_processed += 1
+        name = span.name
+        mapped = values.get(name) if values else None
+        props_to_add: list[tuple[str, str]] = []
+        added = skipped = 0
+        for pn in _props_for(name, prop_names, values):
+            bit = bits.get(pn) or bits.setdefault(pn, stats.property_bit(pn))
+            if pn in span.properties:
+                stats.properties_skipped += 1
+                skipped |= bit
+            else:
+                stats.properties_added += 1
+                added |= bit
+                props_to_add.append((pn, mapped.get(pn, prop_value) if mapped else prop_value))
+        stats.record(name, added, skipped)
+        if props_to_add:
+            to_add.append((span, props_to_add))
+    if values is not None:
+        stats.unmatched_mapping_keys = [k for k in values if k not in index]
+    return to_add
+
+
+def _props_for(name: str, prop_names: list[str], values: Mapping[str, Mapping[str, str]] | None) -> list[str]:
+    mapped = values.get(name) if values else None
+    if not mapped:
+        return prop_names
+    return list(dict.fromkeys([*prop_names, *mapped]))
+
+
+def _iter_text_chunks(
     original_text: str,
-    additions: list[tuple[str, str, str]],  # (symbol_name, prop_name, prop_value)
+    additions: Additions,
+    *,
     newline: str,
-) -> str:
-    """Insert multiple property blocks into the original text.
+) -> Iterator[str]:
+    """Yield the output text as chunks: original slices interleaved with property blocks.
+
+    Each addition pairs a symbol span (from `parser.SymbolIndex`, in text order) with the
+    (prop_name, prop_value) pairs to append as full multi-line KiCAD-validated property blocks
+    before its closing parenthesis. Preserves formatting by deriving indentation from the block.
 
-    Each addition is a tuple of (symbol_name, prop_name, prop_value). For each symbol occurrence,
-    append a full multi-line KiCAD-validated property block before the closing parenthesis.
-    Preserves formatting by deriving indentation from the block.
+    Chunks are meant to be streamed to `_io.write_text_chunks`, so the full output is never
+    built in memory and the cost is linear in the file size.
     """
+    pos = 0
+    for span, props in additions:
+        end_idx = span.end - 1  # the closing parenthesis
+        # insert just before the closing paren, respecting line structure
+        yield original_text[pos:end_idx]
+        yield _insertion_text(original_text, span, props, newline)
+        pos = end_idx
+    yield original_text[pos:]
 
-    def find_all_symbol_starts(text: str, name: str) -> list[int]:
-        pattern = f'(symbol "{name}"'
-        starts: list[int] = []
-        pos = 0
-        while True:
-            idx = text.find(pattern, pos)
-            if idx == -1:
-                break
-            # back up to the leading '(' of this symbol form
-            paren_idx = text.rfind("(", 0, idx + 1)
-            if paren_idx != -1:
-                starts.append(paren_idx)
-            pos = idx + len(pattern)
-        return starts
-
-    def find_matching_paren(text: str, start_idx: int) -> int:
-        depth = 0
-        in_str = False
-        i = start_idx
-        while i < len(text):
-            ch = text[i]
-            if ch == '"':
-                # toggle string state if not escaped
-                esc = i > 0 and text[i - 1] == "\\"
-                if not esc:
-                    in_str = not in_str
-            elif not in_str:
-                if ch == "(":
-                    depth += 1
-                elif ch == ")":
-                    depth -= 1
-                    if depth == 0:
-                        return i
-            i += 1
-        return -1
-
-    def indent_for_block(text: str, start_idx: int, end_idx: int) -> str:
-        # Try to reuse indent from an existing property line within the block
-        block = text[start_idx:end_idx]
-        for line in block.splitlines():
-            ls = line.lstrip()
-            if ls.startswith("(property "):
-                return line[: len(line) - len(ls)]
-        # Fallback: use indent of the closing line
-        # Find start of closing line
-        line_start = text.rfind("\n", start_idx, end_idx)
-        if line_start == -1:
-            return "  "  # default two spaces
-        # indent equals the whitespace prefix of the closing line
-        j = line_start + 1
-        indent = ""
-        while j < len(text) and text[j] in (" ", "\t"):
-            indent += text[j]
-            j += 1
-        return indent or "  "
-
-    out = original_text
-    for name, prop_name, prop_value in additions:
-        search_pos = 0
-        while True:
-            starts = find_all_symbol_starts(out[search_pos:], name)
-            if not starts:
-                break
-            # adjust to absolute positions
-            start_idx = search_pos + starts[0]
-            end_idx = find_matching_paren(out, start_idx)
-            if end_idx == -1:
-                # malformed; skip this occurrence
-                search_pos = start_idx + 1
-                continue
-            indent = indent_for_block(out, start_idx, end_idx)
-            # Build a full property block per KiCAD-checked template (official-prop-template.txt)
-            # We preserve indentation by nesting subsequent lines with two extra spaces.
-            ind2 = indent + ("  " if indent else "  ")
-            ind3 = ind2 + "  "
-            ind4 = ind3 + "  "
-            block = (
-                f'{indent}(property "{prop_name}" "{prop_value}"{newline}'
-                f"{ind2}(at 0 0 0){newline}"
-                f"{ind2}(effects{newline}"
-                f"{ind3}(font{newline}"
-                f"{ind4}(size 1.27 1.27){newline}"
-                f"{ind3}){newline}"
-                f"{ind3}(hide yes){newline}"
-                f"{ind2}){newline}"
-                f"{indent}){newline}"
-            )
-            # insert just before the closing paren, respecting line structure
-            out = out[:end_idx] + block + out[end_idx:]
-            # advance search position past the inserted content to avoid infinite loop
-            search_pos = end_idx + len(block) + 1
-    return out
+
+def _iter_buffer_chunks(
+    buf: mmap.mmap | bytes,
+    view: memoryview,
+    additions: Additions,
+    *,
+    newline: str,
+    encoding: str,
+    start: int = 0,
+    end: int | None = None,
+) -> Iterator[bytes | memoryview]:
+    """Bytes counterpart of `_iter_text_chunks` over byte-offset spans.
+
+    Unchanged regions are yielded as zero-copy slices of `view`; only the inserted
+    property blocks are encoded. `start`/`end` limit the output to that byte range.
+    """
+    pos = start
+    for span, props in additions:
+        end_idx = span.end - 1  # the closing parenthesis
+        yield view[pos:end_idx]
+        yield _insertion_text(buf, span, props, newline).encode(encoding)
+        pos = end_idx
+    yield view[pos:end]
+
+
+def _insertion_text(
+    text: str | mmap.mmap | bytes, span: parser.SymbolSpan, props: list[tuple[str, str]], newline: str
+) -> str:
+    """The property blocks inserted just before the closing parenthesis of `span`."""
+    indent = _indent_for_block(text, span.start, span.end - 1)
+    return "".join(_property_block(prop_name, prop_value, indent, newline) for prop_name, prop_value in props)
+
+
+def _indent_for_block(text: str | mmap.mmap | bytes, start_idx: int, end_idx: int) -> str:
+    if not isinstance(text, str):
+        return _indent_for_block_bytes(text, start_idx, end_idx)
+    # Try to reuse indent from an existing property line within the block
+    m = _PROPERTY_LINE_RE.search(text, start_idx, end_idx)
+    if m is not None:
+        return m.group(1)
+    # Fallback: use indent of the closing line
+    # Find start of closing line
+    line_start = text.rfind("\n", start_idx, end_idx)
+    if line_start == -1:
+        return "  "  # default two spaces
+    # indent equals the whitespace prefix of the closing line
+    m = _LEADING_WS_RE.match(text, line_start + 1)
+    indent = m.group() if m is not None else ""
+    return indent or "  "
+
+
+def _indent_for_block_bytes(buf: mmap.mmap | bytes, start_idx: int, end_idx: int) -> str:
+    m = _PROPERTY_LINE_RE_BYTES.search(buf, start_idx, end_idx)
+    if m is not None:
+        return m.group(1).decode("ascii")
+    line_start = buf.rfind(b"\n", start_idx, end_idx)
+    if line_start == -1:
+        return "  "
+    m = _LEADING_WS_RE_BYTES.match(buf, line_start + 1)
+    indent = m.group().decode("ascii") if m is not None else ""
+    return indent or "  "
+
+
+_PROPERTY_LINE_RE = re.compile(r"^([ \t]*)\(property ", re.MULTILINE)
+_LEADING_WS_RE = re.compile(r"[ \t]*")
+_PROPERTY_LINE_RE_BYTES = re.compile(rb"^([ \t]*)\(property ", re.MULTILINE)
+_LEADING_WS_RE_BYTES = re.compile(rb"[ \t]*")
+
+
+def _escape(value: str) -> str:
+    # KiCAD strings escape backslashes and double quotes.
+    if "\\" in value or '"' in value:
+        return value.replace("\\", "\\\\").replace('"', '\\"')
+    return value
+
+
+def _property_block(prop_name: str, prop_value: str, indent: str, newline: str) -> str:
+    # Build a full property block per KiCAD-checked template (official-prop-template.txt)
+    # We preserve indentation by nesting subsequent lines with two extra spaces.
+    ind2 = indent + ("  " if indent else "  ")
+    ind3 = ind2 + "  "
+    ind4 = ind3 + "  "
+    return (
+        f'{indent}(property "{_escape(prop_name)}" "{_escape(prop_value)}"{newline}'
+        f"{ind2}(at 0 0 0){newline}"
+        f"{ind2}(effects{newline}"
+        f"{ind3}(font{newline}"
+        f"{ind4}(size 1.27 1.27){newline}"
+        f"{ind3}){newline}"
+        f"{ind3}(hide yes){newline}"
+        f"{ind2}){newline}"
+        f"{indent}){newline}"
+    )
@@ -0,0 +1,181 @@
+"""
+Content-addressed backup store (`--backup-store`).
+
+Backups of `foo.kicad_sym` go to `.kicad_sym_backups/` next to it: one
+`objects/<sha256>` file per distinct content and a small `foo.kicad_sym.json`
+index of numbered entries. Identical content is stored once, the next backup
+number is read from the index instead of probing the directory, and old entries
+can be pruned with a retention count. Index updates and pruning hold the
+store's lock file, so concurrent writers (e.g. `--jobs` workers) neither lose
+entries nor delete an object another one is about to reference.
+
+Objects are reflinked to the library (a copy-on-write clone sharing its
+blocks) where the filesystem supports it, e.g. Btrfs or XFS on Linux, and
+copied otherwise. A clone is unaffected by later edits of either file.
+`link=True` hardlinks instead, which is only safe while every writer replaces
+libraries by renaming a new file over them, as this tool does, since an
+in-place edit by another program would change the backup too.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import pathlib as _pl
+import shutil
+import sys
+import time
+from collections.abc import Iterator
+from typing import Any
+
+from . import io as _io
+
+STORE_DIR = ".kicad_sym_backups"
+LOCK_FILE = ".lock"
+
+
+class BackupStore:
+    """Backup store rooted at `root`; `keep` retains only the newest N entries per library."""
+
+    def __init__(self, root: _pl.Path, keep: int | None = None, *, link: bool = False) -> None:
+        if keep is not None and keep < 1:
+            raise ValueError("keep must be at least 1")
+        self.root = root
+        self.keep = keep
+        self.link = link
+
+    @classmethod
+    def beside(cls, library: _pl.Path, keep: int | None = None, *, link: bool = False) -> BackupStore:
+        """The store in the library's own directory."""
+        return cls(library.parent / STORE_DIR, keep, link=link)
+
+    def backup(self, library: _pl.Path) -> _pl.Path:
+        """Record the current content of `library` and return its stored object path.
+
+        Nothing is stored when the newest entry already has this content.
+        """
+        digest = _io.file_digest(library)
+        obj = self.root / "objects" / digest
+        with self._locked():
+            index = self._load_index(library.name)
+            entries: list[dict[str, Any]] = index["entries"]
+            if entries and entries[-1]["sha256"] == digest and obj.exists():
+                return obj
+            if not obj.exists():
+                obj.parent.mkdir(parents=True, exist_ok=True)
+                _store_object(library, obj, link=self.link)
+            entries.append({"n": index["next"], "sha256": digest, "size": obj.stat().st_size, "time": time.time()})
+            index["next"] += 1
+            removed: list[dict[str, Any]] = []
+            if self.keep is not None and len(entries) > self.keep:
+                removed = entries[: -self.keep]
+                del entries[: -self.keep]
+            self._save_index(library.name, index)
+            if removed:
+                self._collect({e["sha256"] for e in removed})
+        return obj
+
+    def entries(self, library_name: str) -> list[dict[str, Any]]:
+        """Index entries (`n`, `sha256`, `size`, `time`) for a library, oldest first."""
+        entries: list[dict[str, Any]] = self._load_index(library_name)["entries"]
+        return entries
+
+    def object_path(self, digest: str) -> _pl.Path:
+        return self.root / "objects" / digest
+
+    @contextlib.contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the store's lock file, blocking until other processes release it."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / LOCK_FILE, "a+b") as f:
+            _lock(f.fileno())
+            try:
+                yield
+            finally:
+                _unlock(f.fileno())
+
+    def _index_path(self, library_name: str) -> _pl.Path:
+        return self.root / f"{library_name}.json"
+
+    def _load_index(self, library_name: str) -> dict[str, Any]:
+        try:
+            data: dict[str, Any] = json.loads(self._index_path(library_name).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {"next": 1, "entries": []}
+        return data
+
+    def _save_index(self, library_name: str, index: dict[str, Any]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        _io.write_text(self._index_path(library_name), json.dumps(index, indent=1))
+
+    def _collect(self, candidates: set[str]) -> None:
+        """Delete candidate objects no longer referenced by any library's index (lock held)."""
+        for index_path in self.root.glob("*.json"):
+            data = json.loads(index_path.read_text(encoding="utf-8"))
+            candidates.difference_update(e["sha256"] for e in data["entries"])
+            if not candidates:
+                return
+        for digest in candidates:
+            self.object_path(digest).unlink(missing_ok=True)
+
+
+if sys.platform == "win32":
+    import msvcrt
+
+    def _lock(fd: int) -> None:
+        os.lseek(fd, 0, os.SEEK_SET)
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                return
+            except OSError:  # LK_LOCK gives up after ten one-second retries
+                continue
+
+    def _unlock(fd: int) -> None:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+    def _reflink(src_fd: int, dst_fd: int) -> None:
+        raise OSError("reflinks are not supported on Windows")
+
+else:
+    import fcntl
+
+    def _lock(fd: int) -> None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+    def _unlock(fd: int) -> None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+    # Linux `FICLONE`: make `dst_fd` share `src_fd`'s extents copy-on-write. Other systems and
+    # filesystems without reflinks fail the ioctl with OSError.
+    _FICLONE = 0x40049409
+
+    def _reflink(src_fd: int, dst_fd: int) -> None:
+        fcntl.ioctl(dst_fd, _FICLONE, src_fd)
+
+
+def _store_object(src: _pl.Path, obj: _pl.Path, *, link: bool) -> None:
+    tmp = obj.with_name(f".{obj.name}.{os.getpid()}.tmp")
+    tmp.unlink(missing_ok=True)
+    try:
+        if not link:
+            raise OSError
+        os.link(src, tmp)
+    except OSError:
+        _clone_or_copy(src, tmp)
+    # Another process may store the same content concurrently; either copy is correct.
+    os.replace(tmp, obj)
+    # rename() is a no-op when both names already link the same inode.
+    tmp.unlink(missing_ok=True)
+
+
+def _clone_or_copy(src: _pl.Path, dst: _pl.Path) -> None:
+    """Reflink `src` to `dst` where the filesystem allows it, else copy; metadata as `copy2`."""
+    try:
+        with src.open("rb") as fsrc, dst.open("wb") as fdst:
+            _reflink(fsrc.fileno(), fdst.fileno())
+    except OSError:
+        shutil.copyfile(src, dst)
+    shutil.copystat(src, dst)
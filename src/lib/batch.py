@@ -0,0 +1,238 @@
+"""
+Batch processing of many `.kicad_sym` files.
+
+Expands directory/glob inputs and runs `attach_property_to_file` per file,
+optionally in a process pool, merging the per-file stats into one aggregate.
+A KiCad project (a `.kicad_pro` file, or a directory holding one) expands to
+every schematic and library under the project directory.
+"""
+
+from __future__ import annotations
+
+import dataclasses as _dc
+import functools
+import glob
+import os
+import pathlib as _pl
+from collections.abc import Callable, Iterator
+from typing import TYPE_CHECKING, TypeVar
+
+from .attacher import AttachStats, attach_property_to_file
+from .timing import Timings
+
+if TYPE_CHECKING:
+    from .cache import InventoryCache
+    from .rules import RuleSet
+
+_T = TypeVar("_T")
+
+LIBRARY_SUFFIX = ".kicad_sym"
+SCHEMATIC_SUFFIX = ".kicad_sch"
+PROJECT_SUFFIX = ".kicad_pro"
+
+
+@_dc.dataclass
+class FileResult:
+    path: _pl.Path
+    stats: AttachStats | None = None
+    error: str | None = None
+
+
+@_dc.dataclass
+class BatchResult:
+    files: list[FileResult] = _dc.field(default_factory=list)
+    stats: AttachStats = _dc.field(default_factory=AttachStats)
+
+    @property
+    def errors(self) -> list[str]:
+        return [f"{r.path}: {r.error}" for r in self.files if r.error is not None]
+
+
+def is_batch_input(spec: _pl.Path) -> bool:
+    """True when `spec` names a directory, a glob pattern or a project rather than a single file."""
+    return spec.is_dir() or spec.suffix == PROJECT_SUFFIX or any(ch in str(spec) for ch in "*?[")
+
+
+def project_root(spec: _pl.Path) -> _pl.Path | None:
+    """The project directory when `spec` is a `.kicad_pro` file or a directory holding one."""
+    if spec.suffix == PROJECT_SUFFIX and spec.is_file():
+        return spec.parent
+    if spec.is_dir() and any(p.is_file() for p in spec.glob(f"*{PROJECT_SUFFIX}")):
+        return spec
+    return None
+
+
+def input_suffixes(spec: _pl.Path) -> tuple[str, ...]:
+    """The file types `expand_inputs(spec)` collects from directories."""
+    return (SCHEMATIC_SUFFIX, LIBRARY_SUFFIX) if project_root(spec) is not None else (LIBRARY_SUFFIX,)
+
+
+def expand_inputs(spec: _pl.Path) -> list[_pl.Path]:
+    """Resolve a file, directory (searched recursively), glob pattern or project to input paths.
+
+    A project yields every `.kicad_sch` and `.kicad_sym` under its directory; other
+    directories yield their libraries only.
+    """
+    root = project_root(spec)
+    if root is not None:
+        return sorted(p for suffix in input_suffixes(spec) for p in root.rglob(f"*{suffix}") if p.is_file())
+    if spec.is_dir():
+        return sorted(p for p in spec.rglob(f"*{LIBRARY_SUFFIX}") if p.is_file())
+    if is_batch_input(spec):
+        return sorted(_pl.Path(p) for p in glob.glob(str(spec), recursive=True) if os.path.isfile(p))
+    return [spec]
+
+
+def run_batch(
+    paths: list[_pl.Path],
+    prop_names: list[str],
+    prop_value: str,
+    *,
+    jobs: int = 1,
+    dry_run: bool = False,
+    encoding: str = "utf-8",
+    validate: bool = False,
+    use_mmap: bool = False,
+    cache_dir: _pl.Path | None = None,
+    cache_max_bytes: int | None = None,
+    timings: bool = False,
+    values_path: _pl.Path | None = None,
+    backup_store: bool = False,
+    backup_keep: int | None = None,
+    rules: RuleSet | None = None,
+    on_result: Callable[[FileResult], None] | None = None,
+) -> BatchResult:
+    """Attach properties to every file in `paths`, writing each back in place.
+
+    With `jobs > 1` files are processed by a `ProcessPoolExecutor`, so interpreter startup and
+    imports are paid once per worker. `jobs <= 0` uses one worker per CPU. With `timings`,
+    per-file phase timings are recorded and merged into `result.stats.timings`. A
+    `values_path` mapping (see `mapping.load_values`) is loaded once per worker process.
+    With `backup_store`, each file is backed up into the `BackupStore` of its directory.
+    With `rules`, the rules run instead of the plain property addition (see `rules.RuleSet`).
+
+    With `on_result`, each `FileResult` is handed to it as soon as it is ready instead of
+    being kept in `result.files`, and `result.stats` accumulates only counters and timings,
+    so memory stays flat however many files are processed.
+    """
+    worker = functools.partial(
+        _attach_one,
+        prop_names=prop_names,
+        prop_value=prop_value,
+        dry_run=dry_run,
+        encoding=encoding,
+        validate=validate,
+        use_mmap=use_mmap,
+        cache_dir=cache_dir,
+        cache_max_bytes=cache_max_bytes,
+        timings=timings,
+        values_path=values_path,
+        backup_store=backup_store,
+        backup_keep=backup_keep,
+        rules=rules,
+    )
+    result = BatchResult()
+    try:
+        for file_result in _map(worker, paths, jobs):
+            if on_result is None:
+                result.files.append(file_result)
+            else:
+                on_result(file_result)
+            if file_result.stats is not None:
+                result.stats.merge(file_result.stats, symbols=on_result is None)
+    finally:
+        _close_caches()
+    return result
+
+
+def _map(worker: Callable[[_pl.Path], _T], paths: list[_pl.Path], jobs: int) -> Iterator[_T]:
+    """`worker` over `paths`, in order, in up to `jobs` worker processes (`<= 0`: one per CPU)."""
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, len(paths))
+    if jobs <= 1:
+        yield from map(worker, paths)
+        return
+    # Hand out files in small batches to amortise IPC without starving workers on the tail.
+    chunksize = max(1, len(paths) // (jobs * 8))
+    import concurrent.futures as _cf
+
+    with _cf.ProcessPoolExecutor(max_workers=jobs) as pool:
+        yield from pool.map(worker, paths, chunksize=chunksize)
+
+
+def _attach_one(
+    path: _pl.Path,
+    *,
+    prop_names: list[str],
+    prop_value: str,
+    dry_run: bool,
+    encoding: str,
+    validate: bool,
+    use_mmap: bool,
+    cache_dir: _pl.Path | None,
+    cache_max_bytes: int | None,
+    timings: bool,
+    values_path: _pl.Path | None = None,
+    backup_store: bool = False,
+    backup_keep: int | None = None,
+    rules: RuleSet | None = None,
+) -> FileResult:
+    cache = _open_cache(cache_dir, cache_max_bytes) if cache_dir is not None else None
+    timing = Timings() if timings else None
+    try:
+        values = None
+        if values_path is not None:
+            from .mapping import load_values_cached
+
+            values = load_values_cached(values_path, encoding)
+        store = None
+        if backup_store:
+            from .backups import BackupStore
+
+            store = BackupStore.beside(path, backup_keep)
+        stats = attach_property_to_file(
+            path,
+            prop_names,
+            prop_value,
+            dry_run=dry_run,
+            encoding=encoding,
+            validate=validate,
+            use_mmap=use_mmap,
+            cache=cache,
+            timings=timing,
+            values=values,
+            backup_store=store,
+            rules=rules,
+        )
+    except Exception as exc:  # noqa: BLE001
+        return FileResult(path=path, error=str(exc))
+    finally:
+        if timing is not None:
+            timing.close()
+    # The index is only meaningful next to the file's text; don't ship it back to the parent.
+    stats.index = None
+    return FileResult(path=path, stats=stats)
+
+
+# Inventory caches opened by this process, so a worker opens its database once rather than
+# once per file. Keyed by pid as well: a forked worker must not reuse its parent's connection.
+_CACHES: dict[tuple[int, _pl.Path, int | None], InventoryCache] = {}
+
+
+def _open_cache(cache_dir: _pl.Path, max_bytes: int | None) -> InventoryCache:
+    key = (os.getpid(), cache_dir, max_bytes)
+    cache = _CACHES.get(key)
+    if cache is None:
+        from .cache import DEFAULT_MAX_BYTES, InventoryCache
+
+        cache = _CACHES[key] = InventoryCache(cache_dir, max_bytes or DEFAULT_MAX_BYTES)
+    return cache
+
+
+def _close_caches() -> None:
+    """Close the caches this process opened. Workers leave theirs to process exit; every
+    write is committed, so nothing is lost."""
+    pid = os.getpid()
+    for key in [key for key in _CACHES if key[0] == pid]:
+        _CACHES.pop(key).close()
@@ -0,0 +1,113 @@
+"""
+Persistent content-hash cache of library inventories.
+
+Maps the SHA-256 of a `.kicad_sym` file to its symbol/property inventory so
+that re-runs can skip files that already carry every requested property
+without parsing or backing them up. Stored in SQLite under a cache
+directory, with least-recently-used eviction once the stored inventories
+exceed a size budget.
+"""
+
+from __future__ import annotations
+
+import json
+import pathlib as _pl
+import sqlite3
+import time
+import zlib
+from collections.abc import Iterable, Mapping
+
+from . import parser
+
+DB_NAME = "inventory.sqlite3"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class Inventory:
+    """Symbol names with their property names, as recorded for one file content."""
+
+    __slots__ = ("symbols",)
+
+    def __init__(self, symbols: Iterable[tuple[str, frozenset[str]]]) -> None:
+        self.symbols: list[tuple[str, frozenset[str]]] = list(symbols)
+
+    @classmethod
+    def from_index(cls, index: parser.SymbolIndex) -> Inventory:
+        return cls((span.name, span.properties) for span in index)
+
+    def is_complete(self, prop_names: Iterable[str], values: Mapping[str, Mapping[str, str]] | None = None) -> bool:
+        """True when every symbol already has all of `prop_names` (and its mapped properties)."""
+        wanted = frozenset(prop_names)
+        if not values:
+            return all(wanted <= props for _name, props in self.symbols)
+        return all(wanted.union(values.get(name, ())) <= props for name, props in self.symbols)
+
+    def to_bytes(self) -> bytes:
+        data = [[name, sorted(props)] for name, props in self.symbols]
+        return zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> Inventory:
+        data = json.loads(zlib.decompress(blob).decode("utf-8"))
+        return cls((name, frozenset(props)) for name, props in data)
+
+
+class InventoryCache:
+    """SQLite-backed map of content digest -> `Inventory` with size-based LRU eviction."""
+
+    def __init__(self, cache_dir: _pl.Path, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        # Batch workers share the database; wait for their writes instead of failing.
+        self._db = sqlite3.connect(cache_dir / DB_NAME, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS inventory ("
+            "key TEXT PRIMARY KEY, data BLOB NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> InventoryCache:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def lookup(self, digest: str, encoding: str = "utf-8") -> Inventory | None:
+        key = _key(digest, encoding)
+        row = self._db.execute("SELECT data FROM inventory WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        with self._db:
+            self._db.execute("UPDATE inventory SET last_used = ? WHERE key = ?", (time.time(), key))
+        return Inventory.from_bytes(row[0])
+
+    def store(self, digest: str, inventory: Inventory, encoding: str = "utf-8") -> None:
+        blob = inventory.to_bytes()
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO inventory (key, data, size, last_used) VALUES (?, ?, ?, ?)",
+                (_key(digest, encoding), blob, len(blob), time.time()),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        (total,) = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM inventory").fetchone()
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute("SELECT key, size FROM inventory ORDER BY last_used").fetchall()
+        doomed: list[tuple[str]] = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        self._db.executemany("DELETE FROM inventory WHERE key = ?", doomed)
+
+
+def _key(digest: str, encoding: str) -> str:
+    # Names are decoded with the run's encoding, so it is part of the identity.
+    return f"{digest}:{encoding.lower()}"
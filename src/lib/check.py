@@ -0,0 +1,88 @@
+"""
+Read-only completeness check for CI (`check`).
+
+Scans each library (or schematic) over a memory map with the `parser.iter_symbol_spans`
+tokenizer and reports top-level symbols lacking required properties as they
+are found. Nothing is parsed with sexpdata, decoded beyond symbol and property
+names, written or reported to a file, and the scan can stop at the first hit.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import dataclasses as _dc
+import pathlib as _pl
+from collections.abc import Callable, Generator, Iterable, Mapping
+
+from . import io as _io
+from . import parser
+from .attacher import _props_for
+
+
+@_dc.dataclass
+class CheckSummary:
+    files: int = 0
+    symbols: int = 0
+    # Symbols lacking at least one required property.
+    incomplete: int = 0
+    errors: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return not self.incomplete and not self.errors
+
+
+def iter_missing(
+    path: _pl.Path,
+    prop_names: list[str],
+    *,
+    values: Mapping[str, Mapping[str, str]] | None = None,
+    encoding: str = "utf-8",
+    summary: CheckSummary | None = None,
+) -> Generator[tuple[str, list[str]], None, None]:
+    """Yield (symbol name, missing property names) for each top-level symbol of `path` lacking any.
+
+    Required properties are `prop_names` plus the symbol's keys in `values`. The scan is
+    lazy and stops when the caller stops iterating. Raises `ValueError` on malformed text
+    reached by the scan. Scanned symbols are counted on `summary`.
+    """
+    # Close the scan before unmapping: a suspended scan still holds the buffer.
+    with _io.map_file(path) as buf, contextlib.closing(parser.iter_library_symbols(buf, encoding)) as spans:
+        for span in spans:
+            if summary is not None:
+                summary.symbols += 1
+            absent = [pn for pn in _props_for(span.name, prop_names, values) if pn not in span.properties]
+            if absent:
+                yield span.name, absent
+
+
+def check_paths(
+    paths: Iterable[_pl.Path],
+    prop_names: list[str],
+    *,
+    values: Mapping[str, Mapping[str, str]] | None = None,
+    encoding: str = "utf-8",
+    fail_fast: bool = False,
+    on_missing: Callable[[_pl.Path, str, list[str]], None] | None = None,
+    on_error: Callable[[_pl.Path, str], None] | None = None,
+) -> CheckSummary:
+    """Check every library in `paths`; with `fail_fast`, stop at the first incomplete symbol or error."""
+    summary = CheckSummary()
+    for path in paths:
+        summary.files += 1
+        try:
+            missing = iter_missing(path, prop_names, values=values, encoding=encoding, summary=summary)
+            with contextlib.closing(missing):
+                for name, absent in missing:
+                    summary.incomplete += 1
+                    if on_missing is not None:
+                        on_missing(path, name, absent)
+                    if fail_fast:
+                        return summary
+        except (OSError, ValueError) as exc:
+            summary.errors += 1
+            if on_error is not None:
+                on_error(path, str(exc))
+            if fail_fast:
+                return summary
+    return summary
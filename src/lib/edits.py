@@ -0,0 +1,318 @@
+"""
+Edit lists: emit computed insertions instead of rewriting libraries (`--emit-edits`).
+
+An edit list records, per library, the SHA-256 of the content it was computed
+from and each edit as a byte offset plus the inserted text (and, for edits
+that rewrite or remove existing text, the number of bytes replaced). It can be
+written as JSON (applied later with `apply`, which refuses to touch a file
+whose content changed since) or as a unified diff for review and `git apply`.
+
+Offsets are computed on the raw bytes, as with `--mmap`: line endings are kept
+and inserted blocks use the file's own newline convention.
+"""
+
+from __future__ import annotations
+
+import dataclasses as _dc
+import hashlib
+import json
+import mmap
+import os
+import pathlib as _pl
+import re
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from typing import TYPE_CHECKING, Any, TextIO
+
+from . import io as _io
+from . import parser
+from .attacher import AttachStats, _insertion_text, _make_backup, _plan_additions
+
+if TYPE_CHECKING:
+    from .backups import BackupStore
+    from .rules import RuleSet
+
+EDITS_VERSION = 1
+EDITS_FORMATS = ("json", "diff")
+
+
+@_dc.dataclass(frozen=True, slots=True)
+class Edit:
+    """Replace `length` bytes at byte `offset` of the base content with `text` (insert when 0)."""
+
+    offset: int
+    text: str
+    length: int = 0
+
+
+@_dc.dataclass
+class FileEdits:
+    path: str
+    base_sha256: str
+    base_size: int
+    encoding: str = "utf-8"
+    edits: list[Edit] = _dc.field(default_factory=list)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "path": self.path,
+            "base_sha256": self.base_sha256,
+            "base_size": self.base_size,
+            "encoding": self.encoding,
+            "edits": [
+                (
+                    {"offset": e.offset, "length": e.length, "text": e.text}
+                    if e.length
+                    else {"offset": e.offset, "text": e.text}
+                )
+                for e in self.edits
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> FileEdits:
+        try:
+            edits = [Edit(int(e["offset"]), str(e["text"]), int(e.get("length", 0))) for e in data["edits"]]
+            return cls(
+                path=str(data["path"]),
+                base_sha256=str(data["base_sha256"]),
+                base_size=int(data["base_size"]),
+                encoding=str(data.get("encoding", "utf-8")),
+                edits=edits,
+            )
+        except (KeyError, TypeError) as exc:
+            raise ValueError(f"Malformed edit list entry: missing or invalid {exc}") from exc
+
+
+def plan_file_edits(
+    path: _pl.Path,
+    prop_names: list[str],
+    prop_value: str,
+    *,
+    values: Mapping[str, Mapping[str, str]] | None = None,
+    encoding: str = "utf-8",
+    rules: RuleSet | None = None,
+) -> tuple[FileEdits, AttachStats]:
+    """Compute the edits `attach_property_to_file(..., use_mmap=True)` would make, without writing.
+
+    With `rules`, the edits are those of the rules (see `rules.plan_rules`) instead.
+    """
+    with _io.map_file(path) as buf:
+        newline = "\r\n" if buf.find(b"\r\n") != -1 else "\n"
+        if rules is not None:
+            from .rules import plan_rules
+
+            index = parser.SymbolIndex(parser.iter_library_symbols(buf, encoding, property_spans=True))
+            stats = AttachStats(index=index)
+            edits = plan_rules(buf, index, rules, stats, newline=newline, encoding=encoding)
+        else:
+            index = parser.SymbolIndex.from_buffer(buf, encoding=encoding)
+            stats = AttachStats(index=index)
+            to_add = _plan_additions(index, prop_names, prop_value, stats, values)
+            edits = [Edit(span.end - 1, _insertion_text(buf, span, props, newline)) for span, props in to_add]
+        file_edits = FileEdits(path.as_posix(), hashlib.sha256(buf).hexdigest(), len(buf), encoding, edits)
+    return file_edits, stats
+
+
+def dump_json(files: Iterable[FileEdits], out: TextIO) -> None:
+    """Write `{"version": 1, "files": [...]}`, one file entry per line."""
+    out.write(f'{{"version": {EDITS_VERSION}, "files": [')
+    for i, file_edits in enumerate(files):
+        out.write(",\n" if i else "\n")
+        out.write(json.dumps(file_edits.as_dict(), ensure_ascii=False))
+    out.write("\n]}\n")
+
+
+def load_json(path: _pl.Path) -> list[FileEdits]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(data, dict) or data.get("version") != EDITS_VERSION:
+        raise ValueError(f"{path}: not a version {EDITS_VERSION} edit list")
+    return [FileEdits.from_dict(entry) for entry in data["files"]]
+
+
+def apply_file_edits(
+    file_edits: FileEdits,
+    path: _pl.Path | None = None,
+    *,
+    backup_store: BackupStore | None = None,
+) -> int:
+    """Apply `file_edits` to `path` (default: the recorded path) in place; return the number applied.
+
+    The file must still hash to `base_sha256`. It is backed up first (into `backup_store` when
+    given, otherwise as a numbered `.orig` copy) and replaced atomically; unchanged regions are
+    copied from the memory-mapped original.
+    """
+    target = path or _pl.Path(file_edits.path)
+    with _io.atomic_writer(target) as out, _io.map_file(target) as buf:
+        digest = hashlib.sha256(buf).hexdigest()
+        if digest != file_edits.base_sha256:
+            raise ValueError(
+                f"{target}: content (sha256 {digest[:12]}) differs from the edit list base "
+                f"(sha256 {file_edits.base_sha256[:12]}); recompute the edits"
+            )
+        _check_offsets(file_edits.edits, len(buf))
+        _make_backup(target, backup_store)
+        with memoryview(buf) as view:
+            _io.write_chunks(out, iter_edit_chunks(view, file_edits.edits, file_edits.encoding))
+    return len(file_edits.edits)
+
+
+def iter_edit_chunks(view: memoryview, edits: Sequence[Edit], encoding: str) -> Iterator[bytes | memoryview]:
+    """Unchanged slices of `view` interleaved with the encoded edit texts."""
+    pos = 0
+    for edit in edits:
+        yield view[pos : edit.offset]
+        if edit.text:
+            yield edit.text.encode(encoding)
+        pos = edit.offset + edit.length
+    yield view[pos:]
+
+
+def splice(source: str | bytes, edits: Sequence[Edit], encoding: str = "utf-8") -> str | bytes:
+    """`source` with `edits` applied, in memory (offsets in characters for `str`, bytes otherwise)."""
+    if isinstance(source, str):
+        pieces: list[str] = []
+        pos = 0
+        for edit in edits:
+            pieces += (source[pos : edit.offset], edit.text)
+            pos = edit.offset + edit.length
+        pieces.append(source[pos:])
+        return "".join(pieces)
+    with memoryview(source) as view:
+        return b"".join(iter_edit_chunks(view, edits, encoding))
+
+
+def unified_diff(file_edits: FileEdits, path: _pl.Path | None = None, *, context: int = 3) -> Iterator[str]:
+    """Yield a unified diff (`--- a/` / `+++ b/` headers) of `file_edits` against its base file.
+
+    Header paths are relative to the current directory, where `git apply` should be run.
+
+    Hunks are built directly around the touched lines, so the cost does not depend on the
+    library size beyond one pass counting line numbers.
+    """
+    source = path or _pl.Path(file_edits.path)
+    if not file_edits.edits:
+        return
+    with _io.map_file(source) as buf:
+        if hashlib.sha256(buf).hexdigest() != file_edits.base_sha256:
+            raise ValueError(f"{source}: content differs from the edit list base")
+        _check_offsets(file_edits.edits, len(buf))
+        name = _diff_name(file_edits.path)
+        yield f"--- a/{name}\n+++ b/{name}\n"
+        yield from _format_hunks(buf, file_edits, context)
+
+
+def _diff_name(path: str) -> str:
+    # Relative to the working directory, so `git apply` run there finds the file; an absolute
+    # path would become `a/tmp/...`. Paths on another drive (Windows) have no relative form.
+    try:
+        return _pl.Path(os.path.relpath(path)).as_posix()
+    except ValueError:
+        return _pl.Path(path).as_posix().lstrip("/")
+
+
+def _check_offsets(edits: list[Edit], size: int) -> None:
+    last = 0
+    for edit in edits:
+        if edit.offset < last or edit.length < 0 or edit.offset + edit.length > size:
+            raise ValueError(f"Edit at offset {edit.offset} overlaps the previous one or lies outside the file")
+        last = edit.offset + edit.length
+
+
+@_dc.dataclass
+class _Region:
+    """Whole original lines `buf[start:end]` touched by one or more edits, and their replacement."""
+
+    number: int  # 0-based line number of `start`
+    lines: int
+    start: int
+    end: int  # past the last line's newline, if any
+    new: bytes
+
+
+def _changed_regions(buf: mmap.mmap | bytes, file_edits: FileEdits) -> Iterator[_Region]:
+    size = len(buf)
+
+    def line_end(pos: int) -> int:
+        nl = buf.find(b"\n", pos)
+        return size if nl == -1 else nl + 1
+
+    region: _Region | None = None
+    pieces: list[bytes] = []
+    cursor = counted_to = number = 0
+    for edit in file_edits.edits:
+        start = buf.rfind(b"\n", 0, edit.offset) + 1
+        # The line holding the last replaced byte (or the insertion point).
+        end = line_end(max(edit.offset, edit.offset + edit.length - 1))
+        if region is not None and start < region.end:
+            region.end = max(region.end, end)
+        else:
+            if region is not None:
+                pieces.append(buf[cursor : region.end])
+                region.new = b"".join(pieces)
+                yield region
+            number += buf[counted_to:start].count(b"\n")
+            counted_to = start
+            region = _Region(number, 0, start, end, b"")
+            pieces, cursor = [], start
+        pieces.append(buf[cursor : edit.offset])
+        pieces.append(edit.text.encode(file_edits.encoding))
+        cursor = edit.offset + edit.length
+    if region is not None:
+        pieces.append(buf[cursor : region.end])
+        region.new = b"".join(pieces)
+        yield region
+
+
+def _hunks(buf: mmap.mmap | bytes, regions: Iterable[_Region], context: int) -> Iterator[list[_Region]]:
+    group: list[_Region] = []
+    for region in regions:
+        region.lines = len(_LINE_RE.findall(buf[region.start : region.end]))
+        if group and region.number - (group[-1].number + group[-1].lines) > 2 * context:
+            yield group
+            group = []
+        group.append(region)
+    if group:
+        yield group
+
+
+_LINE_RE = re.compile(rb"[^\n]*\n|[^\n]+")
+
+
+def _format_hunks(buf: mmap.mmap | bytes, file_edits: FileEdits, context: int) -> Iterator[str]:
+    delta = 0  # new-file line offset accumulated by the previous hunks
+    for group in _hunks(buf, _changed_regions(buf, file_edits), context):
+        before_start = group[0].start
+        for _ in range(context):
+            if before_start == 0:
+                break
+            before_start = buf.rfind(b"\n", 0, before_start - 1) + 1
+        after_end = group[-1].end
+        for _ in range(context):
+            if after_end >= len(buf):
+                break
+            nl = buf.find(b"\n", after_end)
+            after_end = len(buf) if nl == -1 else nl + 1
+
+        body: list[tuple[str, bytes]] = []
+        pos = before_start
+        for region in group:
+            body.extend((" ", raw) for raw in _LINE_RE.findall(buf[pos : region.start]))
+            body.extend(("-", raw) for raw in _LINE_RE.findall(buf[region.start : region.end]))
+            body.extend(("+", raw) for raw in _LINE_RE.findall(region.new))
+            pos = region.end
+        body.extend((" ", raw) for raw in _LINE_RE.findall(buf[pos:after_end]))
+
+        old_count = sum(1 for tag, _ in body if tag != "+")
+        new_count = sum(1 for tag, _ in body if tag != "-")
+        first = group[0].number - len(_LINE_RE.findall(buf[before_start : group[0].start])) + 1
+        # Per the unified format, an empty side starts at the line before the hunk.
+        old_start = first if old_count else first - 1
+        new_start = first + delta if new_count else first + delta - 1
+        yield f"@@ -{old_start},{old_count} +{new_start},{new_count} @@\n"
+        delta += new_count - old_count
+        for tag, raw in body:
+            text = raw.decode(file_edits.encoding)
+            if text.endswith("\n"):
+                yield tag + text
+            else:
+                yield tag + text + "\n\\ No newline at end of file\n"
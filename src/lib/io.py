@@ -1,16 +1,161 @@
 from __future__ import annotations
 
+import contextlib
+import hashlib
+import mmap
+import os
 import pathlib as pl
+import re
 import shutil
+import tempfile
+from collections.abc import Iterable, Iterator
+from io import TextIOWrapper
+from typing import BinaryIO
 
 
 def read_text(path: pl.Path, encoding: str = "utf-8") -> str:
     return path.read_text(encoding=encoding)
 
 
+def file_digest(path: pl.Path) -> str:
+    """SHA-256 hex digest of the file's bytes."""
+    with path.open("rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
 def write_text(path: pl.Path, text: str, encoding: str = "utf-8") -> None:
+    write_text_chunks(path, [text], encoding=encoding)
+
+
+def write_text_chunks(path: pl.Path, chunks: Iterable[str], encoding: str = "utf-8") -> None:
+    """Stream text chunks to `path` through `atomic_writer`.
+
+    Only one chunk is encoded at a time, so the full output is never held in memory.
+    Newlines are translated like `Path.write_text` does.
+    """
+    with atomic_writer(path) as f:
+        text = TextIOWrapper(f, encoding=encoding)
+        text.writelines(chunks)
+        text.flush()
+        text.detach()
+
+
+# Buffers per `os.writev` call: the platform's IOV_MAX where it is known.
+WRITEV_BATCH = 1024
+if hasattr(os, "sysconf"):
+    with contextlib.suppress(ValueError, OSError):
+        WRITEV_BATCH = max(os.sysconf("SC_IOV_MAX"), 16)
+
+
+def write_chunks(out: BinaryIO, chunks: Iterable[bytes | memoryview]) -> int:
+    """Write `chunks` (e.g. `memoryview` slices of a mapped original interleaved with encoded
+    property blocks) to `out` and return the number of bytes written.
+
+    Where `os.writev` exists and `out` has a file descriptor, the chunks go to the kernel in
+    batches of up to `WRITEV_BATCH` buffers, so unchanged regions are never copied or joined
+    in Python and there is one system call per batch rather than per chunk. Otherwise they
+    are written through `out`.
+    """
+    try:
+        fd = out.fileno() if hasattr(os, "writev") else -1
+    except (OSError, ValueError):  # io.UnsupportedOperation is both
+        fd = -1
+    if fd < 0:
+        total = 0
+        for chunk in chunks:
+            total += out.write(chunk)
+        return total
+    out.flush()
+    total = 0
+    batch: list[bytes | memoryview] = []
+    for chunk in chunks:
+        if not len(chunk):
+            continue
+        batch.append(chunk)
+        if len(batch) == WRITEV_BATCH:
+            total += _writev_all(fd, batch)
+            batch = []
+    if batch:
+        total += _writev_all(fd, batch)
+    return total
+
+
+def _writev_all(fd: int, batch: list[bytes | memoryview]) -> int:
+    """`os.writev` until every buffer of `batch` is written, resuming after short writes."""
+    total = sum(map(len, batch))
+    while batch:
+        n = os.writev(fd, batch)
+        done = 0
+        while done < len(batch) and n >= len(batch[done]):
+            n -= len(batch[done])
+            done += 1
+        batch = batch[done:]
+        if batch and n:
+            batch[0] = memoryview(batch[0])[n:]
+    return total
+
+
+@contextlib.contextmanager
+def map_file(path: pl.Path) -> Iterator[mmap.mmap | bytes]:
+    """Map `path` read-only for the duration of the block.
+
+    Yields `b""` for an empty file, which cannot be memory-mapped.
+    """
+    with path.open("rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+
+@contextlib.contextmanager
+def atomic_writer(path: pl.Path) -> Iterator[BinaryIO]:
+    """Yield a binary file that replaces `path` via `os.replace` when the block exits cleanly.
+
+    Data goes to a temp file in the same directory and is fsync'ed before the rename, so a
+    crash leaves either the old or the new library, never a truncated one. `path` is never
+    truncated in place (it may still be memory-mapped as the source) and is left untouched
+    on failure. A symlinked `path` is written through: its target is replaced and the link kept.
+    """
+    path = path.resolve()
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(text, encoding=encoding)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    tmp = pl.Path(tmp_name)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        _copy_mode(path, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            tmp.unlink()
+        raise
+    _fsync_dir(path.parent)
+
+
+def _fsync_dir(directory: pl.Path) -> None:
+    # Persist the rename itself; directories cannot be opened for fsync on Windows.
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    with contextlib.suppress(OSError):
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def _copy_mode(src: pl.Path, dst: pl.Path) -> None:
+    # mkstemp creates 0600 files; keep the target's mode, or the umask default for new files.
+    if src.is_file():
+        shutil.copymode(src, dst)
+        return
+    umask = os.umask(0)
+    os.umask(umask)
+    os.chmod(dst, 0o666 & ~umask)
 
 
 def make_backup(path: pl.Path, suffix: str = ".bak") -> pl.Path:
@@ -22,21 +167,30 @@ def make_backup(path: pl.Path, suffix: str = ".bak") -> pl.Path:
     return backup
 
 
+# ASCII digits only: `str.isdigit` also accepts e.g. "²", which `int` rejects.
+_BACKUP_NUMBER_RE = re.compile(r"[0-9]+")
+
+
 def make_numbered_backup(path: pl.Path, base_suffix: str = ".orig") -> pl.Path:
     """Create a numbered backup copy next to the input file without overwriting.
 
     Examples (for input `foo.kicad_sym`):
     - `foo.kicad_sym.orig` if available, else
-    - `foo.kicad_sym.orig.1`, `foo.kicad_sym.orig.2`, ...
+    - `foo.kicad_sym.orig.N` with N one past the highest existing number, so gaps left by
+      deleted backups are not reused.
+
+    Existing backups are found with a single directory scan rather than one `exists()`
+    call per candidate.
     """
-    candidate = path.with_name(path.name + base_suffix)
-    if not candidate.exists():
-        shutil.copy2(path, candidate)
-        return candidate
-    n = 1
-    while True:
-        numbered = path.with_name(f"{path.name}{base_suffix}.{n}")
-        if not numbered.exists():
-            shutil.copy2(path, numbered)
-            return numbered
-        n += 1
+    primary = path.name + base_suffix
+    prefix = primary + "."
+    highest = -1  # -1: no backup yet, 0: only the primary
+    with os.scandir(path.parent) as entries:
+        for entry in entries:
+            if entry.name == primary:
+                highest = max(highest, 0)
+            elif entry.name.startswith(prefix) and _BACKUP_NUMBER_RE.fullmatch(entry.name, len(prefix)):
+                highest = max(highest, int(entry.name[len(prefix) :]))
+    backup = path.with_name(primary if highest < 0 else f"{primary}.{highest + 1}")
+    shutil.copy2(path, backup)
+    return backup
@@ -0,0 +1,80 @@
+"""
+Per-symbol property value mappings (`--values-from`).
+
+Loads a symbol name -> {property: value} table from CSV or JSON into a
+dict so every assignment can be applied in one pass over a library.
+"""
+
+from __future__ import annotations
+
+import codecs
+import csv
+import functools
+import json
+import pathlib as _pl
+
+ValueMap = dict[str, dict[str, str]]
+
+_LONG_HEADER = ["symbol", "property", "value"]
+
+
+def load_values(path: _pl.Path, encoding: str = "utf-8") -> ValueMap:
+    """Load a mapping from `.json` or CSV (any other suffix).
+
+    JSON: `{"Symbol": {"Property": "Value", ...}, ...}`.
+
+    CSV, wide: a header row whose first column holds symbol names and whose other
+    columns are property names (`Symbol,SzlcscCode,SzlcscLink`); empty cells are ignored.
+    CSV, long: header exactly `symbol,property,value`, one assignment per row.
+    Later entries for the same symbol and property win.
+    """
+    if path.suffix.lower() == ".json":
+        return _load_json(path, encoding)
+    return _load_csv(path, encoding)
+
+
+@functools.lru_cache(maxsize=4)
+def load_values_cached(path: _pl.Path, encoding: str = "utf-8") -> ValueMap:
+    """`load_values`, memoised so batch workers load a mapping once per process."""
+    return load_values(path, encoding)
+
+
+def _read_encoding(encoding: str) -> str:
+    # Spreadsheet exports often start with a UTF-8 BOM; it must not become part of the first header.
+    return "utf-8-sig" if codecs.lookup(encoding).name == "utf-8" else encoding
+
+
+def _load_json(path: _pl.Path, encoding: str) -> ValueMap:
+    data = json.loads(path.read_text(encoding=_read_encoding(encoding)))
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: expected a JSON object of symbol -> {{property: value}}")
+    values: ValueMap = {}
+    for symbol, props in data.items():
+        if not isinstance(props, dict):
+            raise ValueError(f"{path}: value for symbol {symbol!r} must be an object")
+        values[str(symbol)] = {str(k): "" if v is None else str(v) for k, v in props.items()}
+    return values
+
+
+def _load_csv(path: _pl.Path, encoding: str) -> ValueMap:
+    values: ValueMap = {}
+    with path.open(newline="", encoding=_read_encoding(encoding)) as f:
+        rows = csv.reader(f)
+        header = next(rows, None)
+        if not header:
+            return values
+        header = [h.strip() for h in header]
+        if [h.lower() for h in header] == _LONG_HEADER:
+            for row in rows:
+                if len(row) >= 3 and row[0]:
+                    values.setdefault(row[0], {})[row[1]] = row[2]
+            return values
+        prop_columns = [(i, name) for i, name in enumerate(header) if i > 0 and name]
+        for row in rows:
+            if not row or not row[0]:
+                continue
+            props = values.setdefault(row[0], {})
+            for i, name in prop_columns:
+                if i < len(row) and row[i] != "":
+                    props[name] = row[i]
+    return values
@@ -1,26 +1,39 @@
 """
 S-expression parser helpers for KiCAD `.kicad_sym` files.
 
-Uses `sexpdata` for MVP to parse and serialize while aiming for round-trip
-integrity. This module abstracts reading/writing and basic navigation
-to locate `symbol` and `property` forms.
+`index_symbols` is a purpose-built tokenizer that builds a `SymbolIndex` of
+top-level `symbol` forms (name, offsets, property names, units) in one pass
+over the raw text; the attacher edits the text using those offsets. In a
+`.kicad_sch` schematic the same scan covers the symbols embedded in its
+`(lib_symbols ...)` section (`iter_library_symbols`). `sexpdata` remains available
+for full parse/serialize and as an optional validation backend; it is
+imported only when one of those helpers is called.
 """
 
 from __future__ import annotations
 
+import dataclasses as _dc
 import pathlib as _pl
-from typing import Any, cast
+import re
+import sys
+from collections.abc import Callable, Generator, Iterable, Iterator
+from typing import TYPE_CHECKING, Any, cast
 
-import sexpdata
+if TYPE_CHECKING:
+    from _typeshed import ReadableBuffer
 
 
 def load_s_expr(path: _pl.Path, encoding: str = "utf-8") -> Any:
+    import sexpdata
+
     with path.open("r", encoding=encoding) as f:
         text = f.read()
     return sexpdata.loads(text)
 
 
 def dump_s_expr(sx: Any) -> str:
+    import sexpdata
+
     return cast(str, sexpdata.dumps(sx))
 
 
@@ -29,6 +42,8 @@ def iter_symbols(library_sx: Any) -> list[tuple[Any, int]]:
 
     The library root is expected as `(kicad_symbol_lib ... (symbol ...) ...)`.
     """
+    import sexpdata
+
     if not isinstance(library_sx, list) or not library_sx:
         return []
     out: list[tuple[Any, int]] = []
@@ -46,6 +61,8 @@ def symbol_name(symbol_sx: Any) -> str:
 
 
 def has_property(symbol_sx: Any, prop_name: str) -> bool:
+    import sexpdata
+
     for node in symbol_sx:
         if (
             isinstance(node, list)
@@ -61,4 +78,308 @@ def has_property(symbol_sx: Any, prop_name: str) -> bool:
 
 def add_property(symbol_sx: Any, prop_name: str, prop_value: str) -> None:
     """Append a simple `(property "Name" "Value")` form to the symbol."""
+    import sexpdata
+
     symbol_sx.append([sexpdata.Symbol("property"), prop_name, prop_value])
+
+
+def validate_s_expr(text: str) -> None:
+    """Fully parse `text` with `sexpdata`; raises on malformed input."""
+    import sexpdata
+
+    sexpdata.loads(text)
+
+
+@_dc.dataclass(frozen=True, slots=True)
+class SymbolSpan:
+    """A `(symbol ...)` form located in the raw text.
+
+    `start` is the offset of the opening parenthesis and `end` the offset just past
+    the matching closing one, so `text[start:end]` is the whole form. `properties`
+    holds the names of direct `(property "Name" ...)` children; `units` holds the
+    nested unit sub-symbols (e.g. `"R_0_1"`) of a top-level symbol.
+    """
+
+    name: str
+    start: int
+    end: int
+    properties: frozenset[str]
+    units: tuple[SymbolSpan, ...] = ()
+    # Direct properties with their offsets; only filled when scanning with `property_spans=True`.
+    property_spans: tuple[PropertySpan, ...] = ()
+
+
+@_dc.dataclass(frozen=True, slots=True)
+class PropertySpan:
+    """A direct `(property "Name" "Value" ...)` child of a top-level symbol.
+
+    `start`/`end` delimit the whole form; `name_start`/`name_end` and `value_start`/`value_end`
+    delimit the quoted name and value literals, quotes included. A property without a value
+    literal has `value_start == value_end == end - 1`.
+    """
+
+    name: str
+    start: int
+    end: int
+    name_start: int
+    name_end: int
+    value_start: int
+    value_end: int
+
+
+class SymbolIndex:
+    """Index of the top-level symbols of a library with hash-based lookups.
+
+    Built once per library text; `attach`, dry-run and reporting all read from it,
+    and it can be queried directly without re-parsing.
+    """
+
+    __slots__ = ("_by_name", "symbols")
+
+    def __init__(self, symbols: Iterable[SymbolSpan]) -> None:
+        self.symbols: tuple[SymbolSpan, ...] = tuple(symbols)
+        self._by_name: dict[str, SymbolSpan] = {}
+        for span in self.symbols:
+            self._by_name.setdefault(span.name, span)
+
+    @classmethod
+    def from_text(cls, text: str) -> SymbolIndex:
+        return cls(iter_library_symbols(text))
+
+    @classmethod
+    def from_buffer(cls, buf: ReadableBuffer, encoding: str = "utf-8") -> SymbolIndex:
+        """Index a bytes-like buffer (e.g. an `mmap`); spans are byte offsets."""
+        return cls(iter_library_symbols(buf, encoding=encoding))
+
+    @classmethod
+    def from_path(cls, path: _pl.Path, encoding: str = "utf-8") -> SymbolIndex:
+        return cls.from_text(path.read_text(encoding=encoding))
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __iter__(self) -> Iterator[SymbolSpan]:
+        return iter(self.symbols)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._by_name
+
+    def get(self, name: str) -> SymbolSpan | None:
+        """Return the first top-level symbol called `name`, if any."""
+        return self._by_name.get(name)
+
+    def has_property(self, name: str, prop_name: str) -> bool:
+        span = self._by_name.get(name)
+        return span is not None and prop_name in span.properties
+
+    def missing(self, prop_names: Iterable[str]) -> Iterator[tuple[SymbolSpan, list[str]]]:
+        """Yield (symbol, missing property names) for every symbol lacking any of `prop_names`."""
+        wanted = list(dict.fromkeys(prop_names))
+        for span in self.symbols:
+            absent = [pn for pn in wanted if pn not in span.properties]
+            if absent:
+                yield span, absent
+
+    @property
+    def unit_count(self) -> int:
+        return sum(len(span.units) for span in self.symbols)
+
+
+# Alternatives, in order: `(symbol "Name"` / `(property "Name"` headers, complete
+# string literals, a bare opening parenthesis, a closing parenthesis, and a stray
+# quote (an unterminated string literal).
+_TOKEN_PATTERN = r'\((symbol|property)\s+"((?:[^"\\]|\\.)*)"|"(?:[^"\\]|\\.)*"|(\()|(\))|(")'
+_TOKEN_RE = re.compile(_TOKEN_PATTERN)
+_TOKEN_RE_BYTES = re.compile(_TOKEN_PATTERN.encode("ascii"))
+_ESCAPE_RE = re.compile(r"\\(.)", re.DOTALL)
+
+
+def _unescape(raw: str) -> str:
+    return _ESCAPE_RE.sub(r"\1", raw) if "\\" in raw else raw
+
+
+def iter_symbol_spans(  # noqa: PLR0912, PLR0915
+    text: str | ReadableBuffer,
+    encoding: str = "utf-8",
+    *,
+    start: int = 0,
+    end: int | None = None,
+    depth: int = 0,
+    property_spans: bool = False,
+) -> Generator[SymbolSpan, None, None]:
+    """Yield a `SymbolSpan` for every `(symbol ...)` directly under the library root.
+
+    `text` may be a `str` or a bytes-like buffer such as an `mmap`; for buffers the
+    offsets are byte offsets and only symbol/property names are decoded (with
+    `encoding`). Property names are collected from direct `(property "Name" ...)`
+    children only, and direct `(symbol ...)` children are recorded as units.
+    Parentheses inside string literals are ignored. Raises `ValueError` on unbalanced
+    parentheses or an unterminated string.
+
+    `start`/`end` restrict the scan to `text[start:end]` (offsets stay absolute), and
+    `depth` is the nesting depth at `start`, e.g. 1 for a range of whole top-level
+    symbols; the range must end at that same depth.
+
+    With `property_spans`, each symbol's direct properties are also recorded with the
+    offsets of their name and value literals (`SymbolSpan.property_spans`), for edits
+    that rewrite or remove existing properties.
+    """
+    tokens: Iterator[re.Match[Any]]
+    decode: Callable[[Any], str]
+    endpos = sys.maxsize if end is None else end
+    if isinstance(text, str):
+        tokens = _TOKEN_RE.finditer(text, start, endpos)
+        decode = _unescape
+    else:
+        tokens = _TOKEN_RE_BYTES.finditer(text, start, endpos)
+
+        def decode(raw: bytes) -> str:
+            return _unescape(raw.decode(encoding))
+
+    expected_depth = depth
+    # (name, start, property names, units) of the top-level symbol currently open
+    current: tuple[str, int, set[str], list[SymbolSpan]] | None = None
+    # (name, start, property names) of the unit sub-symbol currently open
+    unit: tuple[str, int, set[str]] | None = None
+    # With `property_spans`: the current symbol's finished properties, and the one open as
+    # [name, start, name_start, name_end, value_start, value_end] (value offsets -1 until seen).
+    props: list[PropertySpan] = []
+    prop: list[Any] | None = None
+    error: str | None = None
+    for m in tokens:
+        kind = m.lastindex
+        if kind == 2:
+            depth += 1
+            if current is None:
+                if depth == 2 and m.group(1) in ("symbol", b"symbol"):
+                    current = (decode(m.group(2)), m.start(), set(), [])
+            elif depth == 3:
+                if m.group(1) in ("property", b"property"):
+                    name = decode(m.group(2))
+                    current[2].add(name)
+                    if property_spans:
+                        prop = [name, m.start(), m.start(2) - 1, m.end(2) + 1, -1, -1]
+                else:
+                    unit = (decode(m.group(2)), m.start(), set())
+            elif depth == 4 and unit is not None and m.group(1) in ("property", b"property"):
+                unit[2].add(decode(m.group(2)))
+        elif kind == 3:
+            depth += 1
+        elif kind == 4:
+            if current is not None:
+                if depth == 2:
+                    yield SymbolSpan(
+                        current[0], current[1], m.end(), frozenset(current[2]), tuple(current[3]), tuple(props)
+                    )
+                    current = None
+                    props = []
+                elif depth == 3 and unit is not None:
+                    current[3].append(SymbolSpan(unit[0], unit[1], m.end(), frozenset(unit[2])))
+                    unit = None
+                elif depth == 3 and prop is not None:
+                    if prop[4] < 0:
+                        prop[4] = prop[5] = m.start()
+                    props.append(PropertySpan(prop[0], prop[1], m.end(), *prop[2:]))
+                    prop = None
+            depth -= 1
+            if depth < 0:
+                error = f"Unbalanced ')' at offset {m.start()}"
+                break
+        elif kind == 5:
+            error = f"Unterminated string literal at offset {m.start()}"
+            break
+        elif prop is not None and prop[4] < 0 and depth == 3:
+            # The first string literal directly inside a property is its value.
+            prop[4], prop[5] = m.start(), m.end()
+    if error is not None:
+        # The scanner and match pin a memory-mapped `text` (it cannot be closed) for as
+        # long as the traceback keeps this frame alive, so drop them before raising.
+        del tokens, m
+        raise ValueError(error)
+    if depth != expected_depth:
+        raise ValueError(f"Unbalanced parentheses: {depth - expected_depth} form(s) not closed")
+
+
+SCHEMATIC_ROOT = "kicad_sch"
+
+_ROOT_PATTERN = r"\s*\(\s*([A-Za-z_][A-Za-z0-9_]*)"
+_ROOT_RE = re.compile(_ROOT_PATTERN)
+_ROOT_RE_BYTES = re.compile(_ROOT_PATTERN.encode("ascii"))
+_LIB_SYMBOLS_PATTERN = r"lib_symbols(?=[\s)])"
+_LIB_SYMBOLS_RE = re.compile(_LIB_SYMBOLS_PATTERN)
+_LIB_SYMBOLS_RE_BYTES = re.compile(_LIB_SYMBOLS_PATTERN.encode("ascii"))
+
+
+def root_form(text: str | ReadableBuffer) -> str | None:
+    """The head of the document's root form (`"kicad_symbol_lib"`, `"kicad_sch"`, ...), if any."""
+    m = _ROOT_RE.match(text) if isinstance(text, str) else _ROOT_RE_BYTES.match(text)
+    if m is None:
+        return None
+    head = m.group(1)
+    return head if isinstance(head, str) else head.decode("ascii")
+
+
+def lib_symbols_range(
+    text: str | ReadableBuffer, *, start: int = 0, end: int | None = None, depth: int = 0
+) -> tuple[int, int] | None:
+    """`(start, end)` of the inside of a schematic's `(lib_symbols ...)` section, or None.
+
+    The range starts just past the `lib_symbols` head and ends at its closing
+    parenthesis, so it is a run of whole symbols at depth 1, as
+    `iter_symbol_spans(..., start=start, end=end, depth=1)` expects. Only the text up to
+    the end of the section is scanned. `start`/`end`/`depth` restrict the search as for
+    `iter_symbol_spans`. Raises `ValueError` when the section is not closed.
+    """
+    endpos = sys.maxsize if end is None else end
+    if isinstance(text, str):
+        tokens: Iterator[re.Match[Any]] = _TOKEN_RE.finditer(text, start, endpos)
+        head: re.Pattern[Any] = _LIB_SYMBOLS_RE
+    else:
+        tokens = _TOKEN_RE_BYTES.finditer(text, start, endpos)
+        head = _LIB_SYMBOLS_RE_BYTES
+    section: int | None = None
+    error = "The schematic's (lib_symbols ...) section is not closed"
+    for m in tokens:
+        kind = m.lastindex
+        if kind in (2, 3):
+            depth += 1
+            if section is None and kind == 3 and depth == 2 and (h := head.match(text, m.end(), endpos)) is not None:
+                section = h.end()
+        elif kind == 4:
+            if section is not None and depth == 2:
+                return section, m.start()
+            depth -= 1
+        elif kind == 5:
+            error = f"Unterminated string literal at offset {m.start()}"
+            break
+    else:
+        if section is None:
+            return None
+    # As in `iter_symbol_spans`: do not let the traceback pin a memory-mapped `text`.
+    del tokens, m
+    raise ValueError(error)
+
+
+def iter_library_symbols(
+    text: str | ReadableBuffer, encoding: str = "utf-8", *, property_spans: bool = False
+) -> Generator[SymbolSpan, None, None]:
+    """`iter_symbol_spans` over a whole document.
+
+    For a library these are its top-level symbols. For a schematic (`(kicad_sch ...)`)
+    they are the library symbols embedded in its `(lib_symbols ...)` section, named with
+    their library prefix (e.g. `"Device:R"`). Placed symbol instances and the rest of the
+    schematic are not scanned.
+    """
+    if root_form(text) != SCHEMATIC_ROOT:
+        yield from iter_symbol_spans(text, encoding, property_spans=property_spans)
+        return
+    section = lib_symbols_range(text)
+    if section is not None:
+        yield from iter_symbol_spans(
+            text, encoding, start=section[0], end=section[1], depth=1, property_spans=property_spans
+        )
+
+
+def index_symbols(text: str) -> SymbolIndex:
+    """Index all top-level symbols of a library text in a single pass."""
+    return SymbolIndex.from_text(text)
@@ -0,0 +1,171 @@
+"""
+Pipelined batch processing for slow (e.g. network) filesystems.
+
+Runs the text path of `attach_property_to_file` as three overlapping stages:
+reads and backup+writes go to a bounded thread pool with separate
+concurrency limits, and indexing/planning runs on one CPU thread, so while
+one file is being indexed the next is being read and the previous written.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import dataclasses as _dc
+import functools
+import pathlib as _pl
+from collections.abc import Callable, Mapping
+from concurrent.futures import ThreadPoolExecutor
+
+from .attacher import _plan_source, _read_text, _write_text
+from .batch import BatchResult, FileResult
+from .timing import Timings
+
+
+def run_pipelined(
+    paths: list[_pl.Path],
+    prop_names: list[str],
+    prop_value: str,
+    *,
+    read_concurrency: int = 4,
+    write_concurrency: int = 2,
+    dry_run: bool = False,
+    encoding: str = "utf-8",
+    validate: bool = False,
+    timings: bool = False,
+    values_path: _pl.Path | None = None,
+    backup_store: bool = False,
+    backup_keep: int | None = None,
+    on_result: Callable[[FileResult], None] | None = None,
+) -> BatchResult:
+    """Like `batch.run_batch`, but overlapping I/O and CPU work across files.
+
+    At most `read_concurrency` reads and `write_concurrency` backup+writes are in flight,
+    and only that many files (plus the one being indexed) are held in memory. Results
+    reach `on_result` in completion order; `result.files` is in input order. Per-file
+    timings are recorded without `tracemalloc`, whose peaks would mix across threads.
+    """
+    if read_concurrency < 1 or write_concurrency < 1:
+        raise ValueError("read_concurrency and write_concurrency must be at least 1")
+    values = None
+    if values_path is not None:
+        from .mapping import load_values
+
+        values = load_values(values_path, encoding)
+    options = _Options(
+        prop_names=prop_names,
+        prop_value=prop_value,
+        dry_run=dry_run,
+        encoding=encoding,
+        validate=validate,
+        timings=timings,
+        values=values,
+        backup_store=backup_store,
+        backup_keep=backup_keep,
+    )
+    result = BatchResult()
+    position = {path: i for i, path in enumerate(paths)}
+
+    def collect(file_result: FileResult) -> None:
+        if on_result is None:
+            result.files.append(file_result)
+        else:
+            on_result(file_result)
+        if file_result.stats is not None:
+            result.stats.merge(file_result.stats, symbols=on_result is None)
+
+    asyncio.run(_run(paths, options, read_concurrency, write_concurrency, collect))
+    result.files.sort(key=lambda r: position[r.path])
+    return result
+
+
+@_dc.dataclass(frozen=True)
+class _Options:
+    prop_names: list[str]
+    prop_value: str
+    dry_run: bool
+    encoding: str
+    validate: bool
+    timings: bool
+    values: Mapping[str, Mapping[str, str]] | None
+    backup_store: bool
+    backup_keep: int | None
+
+
+async def _run(
+    paths: list[_pl.Path],
+    options: _Options,
+    read_concurrency: int,
+    write_concurrency: int,
+    collect: Callable[[FileResult], None],
+) -> None:
+    reads = asyncio.Semaphore(read_concurrency)
+    writes = asyncio.Semaphore(write_concurrency)
+    # Files in flight: enough to keep every read and write slot busy while one is indexed.
+    limit = read_concurrency + write_concurrency + 1
+    with (
+        ThreadPoolExecutor(read_concurrency + write_concurrency, thread_name_prefix="kicad-sym-io") as io_pool,
+        ThreadPoolExecutor(1, thread_name_prefix="kicad-sym-cpu") as cpu_pool,
+    ):
+        pending: set[asyncio.Task[FileResult]] = set()
+        queue = iter(paths)
+        while True:
+            for path in queue:
+                pending.add(asyncio.create_task(_process(path, options, reads, writes, io_pool, cpu_pool)))
+                if len(pending) >= limit:
+                    break
+            if not pending:
+                return
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                collect(task.result())
+
+
+async def _process(
+    path: _pl.Path,
+    options: _Options,
+    reads: asyncio.Semaphore,
+    writes: asyncio.Semaphore,
+    io_pool: ThreadPoolExecutor,
+    cpu_pool: ThreadPoolExecutor,
+) -> FileResult:
+    loop = asyncio.get_running_loop()
+    timings = Timings(trace_memory=False) if options.timings else None
+    try:
+        async with reads:
+            original, size = await loop.run_in_executor(io_pool, _read_text, path, options.encoding, timings)
+        plan = functools.partial(
+            _plan_source,
+            original,
+            size,
+            options.prop_names,
+            options.prop_value,
+            validate=options.validate,
+            timings=timings,
+            values=options.values,
+        )
+        stats, to_add = await loop.run_in_executor(cpu_pool, plan)
+        if not options.dry_run:
+            store = None
+            if options.backup_store:
+                from .backups import BackupStore
+
+                store = BackupStore.beside(path, options.backup_keep)
+            write = functools.partial(
+                _write_text,
+                path,
+                original,
+                size,
+                to_add,
+                output_path=None,
+                encoding=options.encoding,
+                timings=timings,
+                backup_store=store,
+            )
+            async with writes:
+                await loop.run_in_executor(io_pool, write)
+    except Exception as exc:  # noqa: BLE001
+        return FileResult(path=path, error=str(exc))
+    stats.timings = timings
+    # Match `run_batch`: the index is only meaningful next to the file's text.
+    stats.index = None
+    return FileResult(path=path, stats=stats)
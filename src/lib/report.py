@@ -1,26 +1,38 @@
 """
-Markdown report generation for attachment runs.
-Highlights errors/warnings and lists skipped Symbols.
+Report generation for attachment runs.
+Markdown highlights errors/warnings and lists skipped Symbols; JSON/NDJSON
+emit one machine-readable record per file.
 """
 
 from __future__ import annotations
 
+import contextlib
 import dataclasses as _dc
-import datetime as _dt
+import json
 import pathlib as _pl
-from collections.abc import Iterable
-from typing import TYPE_CHECKING
+import sys
+from collections.abc import Callable, Iterable, Iterator
+from typing import TYPE_CHECKING, Any, TextIO
 
 if TYPE_CHECKING:
     from .attacher import AttachStats
+    from .timing import Timings
 
 
 @_dc.dataclass
 class ReportOptions:
     report_path: _pl.Path
+    # List at most this many symbols per section (None = all).
+    max_listed: int | None = None
+    # One of REPORT_FORMATS.
+    format: str = "markdown"
 
 
-def write_markdown_report(
+REPORT_FORMATS = ("markdown", "json", "ndjson")
+REPORT_SUFFIXES = {"markdown": ".md", "json": ".json", "ndjson": ".ndjson"}
+
+
+def write_markdown_report(  # noqa: PLR0912
     *,
     report_path: _pl.Path,
     input_path: str,
@@ -28,42 +40,197 @@ def write_markdown_report(
     stats: AttachStats | None,
     errors: Iterable[str],
     warnings: Iterable[str],
+    file_count: int | None = None,
+    max_listed: int | None = None,
 ) -> None:
-    lines: list[str] = []
-    ts = _dt.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    lines.append("# Attachment Report\n")
-    lines.append(f"**Input**: `{input_path}`  ")
-    lines.append(f"**Output**: `{output_path}`\n")
-    lines.append(f"**Timestamp**: `{ts}`\n")
-    lines.append("\n## Summary\n")
-    if stats is not None:
-        lines.append(f"- Processed: **{getattr(stats, 'symbols_processed', 0)}**")
-        lines.append(f"- Added: **{getattr(stats, 'properties_added', 0)}**")
-        lines.append(f"- Skipped: **{getattr(stats, 'properties_skipped', 0)}**\n")
-    else:
-        lines.append("- Processed: **0**")
-        lines.append("- Added: **0**")
-        lines.append("- Skipped: **0**\n")
-
-    lines.append("## Errors\n")
-    if errors:
-        for e in errors:
-            lines.append(f"- ❌ **ERROR**: {e}")
-    else:
-        lines.append("- None\n")
-
-    lines.append("## Warnings\n")
-    if warnings:
-        for w in warnings:
-            lines.append(f"- ⚠️ **WARNING**: {w}")
-    else:
-        lines.append("- None\n")
-
-    lines.append("## Skipped Symbols (already had property)\n")
-    if stats is not None and stats.skipped_symbols:
+    """Write the report, streaming each section to disk (or stdout for `-`) as it is produced.
+
+    Symbol lists are generated from the stats on the fly; with `max_listed`, each list
+    stops after that many symbols with a count of the rest.
+    """
+    import datetime as _dt
+
+    with _open_report(report_path) as f:
+
+        def emit(*lines: str) -> None:
+            for line in lines:
+                f.write(line)
+                f.write("\n")
+
+        ts = _dt.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        emit("# Attachment Report\n", f"**Input**: `{input_path}`  ", f"**Output**: `{output_path}`\n")
+        emit(f"**Timestamp**: `{ts}`\n", "\n## Summary\n")
+        if file_count is not None:
+            emit(f"- Files: **{file_count}**")
+        if stats is not None:
+            emit(f"- Processed: **{getattr(stats, 'symbols_processed', 0)}**")
+            index = getattr(stats, "index", None)
+            if index is not None:
+                emit(f"- Units: **{index.unit_count}**")
+            emit(f"- Added: **{getattr(stats, 'properties_added', 0)}**")
+            emit(f"- Skipped: **{getattr(stats, 'properties_skipped', 0)}**")
+            for label, attr in (("Updated", "updated"), ("Renamed", "renamed"), ("Deleted", "deleted")):
+                count = getattr(stats, f"properties_{attr}", 0)
+                if count:
+                    emit(f"- {label}: **{count}**")
+            emit("")
+            if getattr(stats, "cached", False):
+                emit("- Cache: **hit** (content unchanged and complete; not parsed, backed up or written)\n")
+        else:
+            emit("- Processed: **0**", "- Added: **0**", "- Skipped: **0**\n")
+
+        emit("## Errors\n")
+        if errors:
+            for e in errors:
+                emit(f"- ❌ **ERROR**: {e}")
+        else:
+            emit("- None\n")
+
+        emit("## Warnings\n")
+        if warnings:
+            for w in warnings:
+                emit(f"- ⚠️ **WARNING**: {w}")
+        else:
+            emit("- None\n")
+
+        timings = getattr(stats, "timings", None)
+        if timings is not None and timings.phases:
+            emit(*_timings_table(timings))
+
+        emit("## Skipped Symbols (already had property)\n")
+        _emit_list(emit, _skipped_lines(stats), max_listed)
+
+        unmatched = getattr(stats, "unmatched_mapping_keys", None)
+        if unmatched is not None:
+            emit("\n## Unmatched Mapping Keys (no symbol of that name)\n")
+            _emit_list(emit, (f"- `{name}`" for name in unmatched), max_listed)
+
+
+def file_record(path: str, stats: AttachStats | None, error: str | None = None) -> dict[str, Any]:
+    """The JSON-serialisable record for one file: stats, timings, error and per-symbol actions."""
+    record: dict[str, Any] = {"path": path, "ok": error is None, "error": error}
+    if stats is None:
+        record["stats"] = None
+        return record
+    index = stats.index
+    record["stats"] = {
+        "symbols_processed": stats.symbols_processed,
+        "properties_added": stats.properties_added,
+        "properties_skipped": stats.properties_skipped,
+        "properties_updated": stats.properties_updated,
+        "properties_renamed": stats.properties_renamed,
+        "properties_deleted": stats.properties_deleted,
+        "units": index.unit_count if index is not None else None,
+        "cached": stats.cached,
+    }
+    record["timings"] = stats.timings.as_dicts() if stats.timings is not None else None
+    actions: dict[str, dict[str, list[str]]] = {}
+    for name, props in stats.iter_added():
+        actions.setdefault(name, {"added": [], "skipped": []})["added"] = props
+    for name, props in stats.iter_skipped():
+        actions.setdefault(name, {"added": [], "skipped": []})["skipped"] = props
+    record["actions"] = [{"symbol": name, **action} for name, action in actions.items()]
+    record["unmatched_mapping_keys"] = stats.unmatched_mapping_keys
+    return record
+
+
+@contextlib.contextmanager
+def _open_report(report_path: _pl.Path) -> Iterator[TextIO]:
+    if str(report_path) == "-":
+        yield sys.stdout
+        sys.stdout.flush()
+        return
+    with report_path.open("w", encoding="utf-8") as f:
+        yield f
+
+
+class RecordWriter:
+    """Streams records as NDJSON (one per line) or a JSON array; path `-` writes to stdout.
+
+    Each record is written and flushed as soon as it is passed in, so a batch run can feed a
+    log collector without holding results in memory.
+    """
+
+    def __init__(self, report_path: _pl.Path, fmt: str) -> None:
+        if fmt not in ("json", "ndjson"):
+            raise ValueError(f"Unsupported record format: {fmt}")
+        self.fmt = fmt
+        self.count = 0
+        self._owned = str(report_path) != "-"
+        self._f: TextIO = report_path.open("w", encoding="utf-8") if self._owned else sys.stdout
+        if fmt == "json":
+            self._f.write("[")
+
+    def write(self, record: dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False)
+        if self.fmt == "json":
+            self._f.write(",\n" if self.count else "\n")
+            self._f.write(line)
+        else:
+            self._f.write(line + "\n")
+        self._f.flush()
+        self.count += 1
+
+    def close(self) -> None:
+        if self.fmt == "json":
+            self._f.write("\n]\n" if self.count else "]\n")
+        self._f.flush()
+        if self._owned:
+            self._f.close()
+
+    def __enter__(self) -> RecordWriter:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def write_records(report_path: _pl.Path, records: Iterable[dict[str, Any]], fmt: str) -> int:
+    """Write `records` through a `RecordWriter`; returns the record count."""
+    with RecordWriter(report_path, fmt) as writer:
+        for record in records:
+            writer.write(record)
+    return writer.count
+
+
+def _skipped_lines(stats: AttachStats | None) -> Iterator[str]:
+    if stats is None:
+        return
+    iter_skipped = getattr(stats, "iter_skipped", None)
+    if iter_skipped is None:
+        # Plain stats objects: one name per skipped property.
         for name in stats.skipped_symbols:
-            lines.append(f"- `{name}`")
-    else:
-        lines.append("- None\n")
+            yield f"- `{name}`"
+        return
+    several = len(stats.property_names) > 1
+    for name, props in iter_skipped():
+        yield f"- `{name}` ({', '.join(props)})" if several else f"- `{name}`"
+
+
+def _emit_list(emit: Callable[..., None], lines: Iterable[str], max_listed: int | None) -> None:
+    """Emit up to `max_listed` lines, then a count of the omitted ones (or `None` if empty)."""
+    count = 0
+    for line in lines:
+        if max_listed is None or count < max_listed:
+            emit(line)
+        count += 1
+    if count == 0:
+        emit("- None\n")
+    elif max_listed is not None and count > max_listed:
+        emit(f"- … and {count - max_listed} more")
+
 
-    report_path.write_text("\n".join(lines), encoding="utf-8")
+def _timings_table(timings: Timings) -> list[str]:
+    lines = ["## Timings\n"]
+    lines.append("| Phase | Seconds | Bytes | Symbols/s | Peak traced memory |")
+    lines.append("|---|---:|---:|---:|---:|")
+    for ph in timings.phases:
+        rate = f"{ph.symbols_per_s:,.0f}" if ph.symbols_per_s is not None else "-"
+        peak = f"{ph.peak_bytes / 1e6:,.1f} MB" if ph.peak_bytes is not None else "-"
+        lines.append(f"| {ph.name} | {ph.seconds:.4f} | {ph.bytes:,} | {rate} | {peak} |")
+    lines.append(f"| **total** | {timings.total_seconds:.4f} | | | |\n")
+    if timings.traced:
+        lines.append(
+            "Times were taken with `tracemalloc` tracing on and are inflated; compare them only with traced runs.\n"
+        )
+    return lines
@@ -0,0 +1,327 @@
+"""
+Property operations files (`--rules`): add, set, rename and delete in one pass.
+
+A rules file is an ordered list of operations on the direct properties of
+top-level symbols, each optionally limited to symbols matching a glob:
+
+    [
+      {"op": "rename", "name": "LCSC", "to": "SzlcscCode"},
+      {"op": "set", "name": "Datasheet", "value": "~", "symbols": "R_*"},
+      {"op": "add", "name": "SzlcscCode", "value": ""},
+      {"op": "delete", "name": "ki_fp_filters"}
+    ]
+
+(JSON, or YAML when PyYAML is installed.) The library is scanned once with
+property offsets recorded; every rule then runs against an in-memory view of
+each symbol's properties, in file order, and the net result becomes a list of
+byte edits spliced in a single write. Many rules cost about the same as one.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import dataclasses as _dc
+import fnmatch
+import functools
+import json
+import mmap
+import pathlib as _pl
+import re
+from collections.abc import Callable, Iterable, Iterator
+from typing import TYPE_CHECKING, Any, BinaryIO
+
+from . import io as _io
+from . import parser
+from .attacher import AttachStats, _escape, _insertion_text, _make_backup
+from .edits import Edit, iter_edit_chunks
+from .timing import Timings
+from .timing import phase as _phase
+
+if TYPE_CHECKING:
+    from .backups import BackupStore
+
+RULE_OPS = ("add", "set", "rename", "delete")
+
+
+@_dc.dataclass(frozen=True)
+class Rule:
+    """One operation. `add` only adds a missing property; `set` also overwrites the value of an
+    existing one; `rename` moves `name` to `to` unless `to` exists; `delete` removes `name`.
+    `symbols` limits the rule to symbols whose name matches the glob."""
+
+    op: str
+    name: str
+    value: str = ""
+    to: str | None = None
+    symbols: str | None = None
+
+    def __post_init__(self) -> None:
+        if self.op not in RULE_OPS:
+            raise ValueError(f"Unknown rule op {self.op!r}; expected one of {', '.join(RULE_OPS)}")
+        if not self.name:
+            raise ValueError(f"Rule {self.op!r} needs a property name")
+        if self.op == "rename" and not self.to:
+            raise ValueError(f"Rule 'rename' of {self.name!r} needs a target name ('to')")
+
+
+class RuleSet:
+    """Rules compiled once for any number of libraries.
+
+    Symbol globs are compiled to regexes, and the rules applying to a symbol name are
+    memoised, so symbols sharing a name pattern pay for matching once.
+    """
+
+    def __init__(self, rules: Iterable[Rule]) -> None:
+        self.rules: tuple[Rule, ...] = tuple(rules)
+        self._scopes: tuple[Callable[[str], Any] | None, ...] = tuple(
+            re.compile(fnmatch.translate(r.symbols)).match if r.symbols else None for r in self.rules
+        )
+        self._scoped = any(scope is not None for scope in self._scopes)
+        self.for_symbol = functools.lru_cache(maxsize=4096)(self._for_symbol)
+
+    @classmethod
+    def adding(cls, prop_names: Iterable[str], prop_value: str) -> RuleSet:
+        """The rules equivalent to plain `attach`: add each missing property with `prop_value`."""
+        return cls(Rule("add", name, prop_value) for name in prop_names)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def __add__(self, other: RuleSet) -> RuleSet:
+        return RuleSet(self.rules + other.rules)
+
+    def __reduce__(self) -> tuple[type[RuleSet], tuple[tuple[Rule, ...]]]:
+        # Recompile in worker processes instead of pickling the memo.
+        return RuleSet, (self.rules,)
+
+    def _for_symbol(self, name: str) -> tuple[Rule, ...]:
+        if not self._scoped:
+            return self.rules
+        return tuple(rule for rule, scope in zip(self.rules, self._scopes) if scope is None or scope(name))
+
+
+def load_rules(path: _pl.Path, encoding: str = "utf-8") -> RuleSet:
+    """Load a rules file: JSON, or YAML (`.yaml`/`.yml`, needs PyYAML).
+
+    The document is a list of rules or `{"rules": [...]}`; each rule is a mapping with
+    `op`, `name` and, as needed, `value`, `to` and `symbols`.
+    """
+    text = path.read_text(encoding=encoding)
+    if path.suffix.lower() in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError as exc:
+            raise ValueError(f"{path}: reading YAML rules needs PyYAML (pip install pyyaml); or use JSON") from exc
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+    if isinstance(data, dict):
+        data = data.get("rules")
+    if not isinstance(data, list):
+        raise ValueError(f"{path}: expected a list of rules or {{'rules': [...]}}")
+    rules = []
+    for i, entry in enumerate(data, 1):
+        if not isinstance(entry, dict):
+            raise ValueError(f"{path}: rule {i} is not a mapping")
+        unknown = entry.keys() - {"op", "name", "value", "to", "symbols"}
+        if unknown:
+            raise ValueError(f"{path}: rule {i} has unknown keys: {', '.join(sorted(unknown))}")
+        try:
+            rules.append(
+                Rule(
+                    op=str(entry.get("op", "")),
+                    name=str(entry.get("name", "")),
+                    value="" if entry.get("value") is None else str(entry["value"]),
+                    to=None if entry.get("to") is None else str(entry["to"]),
+                    symbols=None if entry.get("symbols") is None else str(entry["symbols"]),
+                )
+            )
+        except ValueError as exc:
+            raise ValueError(f"{path}: rule {i}: {exc}") from exc
+    return RuleSet(rules)
+
+
+@_dc.dataclass
+class _Existing:
+    span: parser.PropertySpan
+    name: str  # current name, after renames
+    value: str | None = None  # new value, when set
+
+
+class _SymbolProps:
+    """The properties of one symbol while its rules run: existing ones (by current name),
+    removed ones, and new ones in creation order."""
+
+    def __init__(self, span: parser.SymbolSpan) -> None:
+        self.live: dict[str, _Existing] = {}
+        for prop in span.property_spans:
+            self.live.setdefault(prop.name, _Existing(prop, prop.name))
+        self.deleted: list[_Existing] = []
+        self.new: dict[str, str] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.live or name in self.new
+
+    def rename(self, name: str, to: str) -> None:
+        if to in self or name not in self:
+            return
+        if name in self.live:
+            entry = self.live.pop(name)
+            entry.name = to
+            self.live[to] = entry
+        else:
+            self.new[to] = self.new.pop(name)
+
+    def delete(self, name: str) -> None:
+        if name in self.live:
+            self.deleted.append(self.live.pop(name))
+        else:
+            self.new.pop(name, None)
+
+
+def plan_rules(
+    text: str | mmap.mmap | bytes,
+    index: parser.SymbolIndex,
+    rules: RuleSet,
+    stats: AttachStats,
+    *,
+    newline: str,
+    encoding: str = "utf-8",
+) -> list[Edit]:
+    """Apply `rules` to every symbol of `index` (scanned with `property_spans=True`) and
+    return the resulting edits in offset order, updating `stats`.
+
+    Offsets and edit texts are in the units of `text` (characters for `str`, bytes for
+    buffers, with texts still to be encoded).
+    """
+    edits: list[Edit] = []
+    bits: dict[str, int] = {}
+    for span in index:
+        stats.symbols_processed += 1
+        props = _SymbolProps(span)
+        added = skipped = 0
+        for rule in rules.for_symbol(span.name):
+            name = rule.name
+            bit = bits.get(name) or bits.setdefault(name, stats.property_bit(name))
+            if rule.op == "add" and name in props:
+                stats.properties_skipped += 1
+                skipped |= bit
+            elif rule.op in ("add", "set") and name not in props.live:
+                if name not in props.new:
+                    stats.properties_added += 1
+                    added |= bit
+                props.new[name] = rule.value
+            elif rule.op == "set":
+                props.live[name].value = rule.value
+            elif rule.op == "rename":
+                assert rule.to is not None
+                props.rename(name, rule.to)
+            else:
+                props.delete(name)
+        stats.record(span.name, added, skipped)
+        edits.extend(_symbol_edits(text, span, props, stats, newline, encoding))
+    return edits
+
+
+def _symbol_edits(
+    text: str | mmap.mmap | bytes,
+    span: parser.SymbolSpan,
+    props: _SymbolProps,
+    stats: AttachStats,
+    newline: str,
+    encoding: str,
+) -> Iterator[Edit]:
+    changes: list[Edit] = []
+    for entry in props.live.values():
+        prop = entry.span
+        if entry.name != prop.name:
+            stats.properties_renamed += 1
+            changes.append(Edit(prop.name_start, _quote(entry.name), prop.name_end - prop.name_start))
+        if entry.value is not None:
+            literal = _quote(entry.value)
+            if prop.value_start == prop.value_end:
+                stats.properties_updated += 1
+                changes.append(Edit(prop.value_start, " " + literal))
+            elif text[prop.value_start : prop.value_end] != (
+                literal if isinstance(text, str) else literal.encode(encoding)
+            ):
+                stats.properties_updated += 1
+                changes.append(Edit(prop.value_start, literal, prop.value_end - prop.value_start))
+    for entry in props.deleted:
+        stats.properties_deleted += 1
+        start, end = _line_extent(text, entry.span.start, entry.span.end)
+        changes.append(Edit(start, "", end - start))
+    changes.sort(key=lambda e: e.offset)
+    yield from changes
+    if props.new:
+        yield Edit(span.end - 1, _insertion_text(text, span, list(props.new.items()), newline))
+
+
+def _quote(value: str) -> str:
+    return f'"{_escape(value)}"'
+
+
+def _line_extent(text: str | mmap.mmap | bytes, start: int, end: int) -> tuple[int, int]:
+    """`start:end`, widened to whole lines when the form is alone on its line(s)."""
+    nl: Any = "\n" if isinstance(text, str) else b"\n"
+    line_start = text.rfind(nl, 0, start) + 1
+    line_end = text.find(nl, end)
+    line_end = len(text) if line_end == -1 else line_end + 1
+    if not text[line_start:start].strip() and not text[end:line_end].strip():
+        return line_start, line_end
+    return start, end
+
+
+def plan_source(
+    source: str | mmap.mmap | bytes,
+    rules: RuleSet,
+    *,
+    encoding: str = "utf-8",
+    validate: bool = False,
+    timings: Timings | None = None,
+) -> tuple[AttachStats, list[Edit]]:
+    """Validate, scan and plan `source` in memory: the stats and the edits `rules` make to it."""
+    size = len(source)
+    if validate:
+        with _phase(timings, "validate", bytes=size):
+            parser.validate_s_expr(source if isinstance(source, str) else bytes(source).decode(encoding))
+    with _phase(timings, "index", bytes=size) as ph:
+        index = parser.SymbolIndex(parser.iter_library_symbols(source, encoding, property_spans=True))
+        ph.symbols = len(index)
+    stats = AttachStats(index=index)
+    crlf: Any = "\r\n" if isinstance(source, str) else b"\r\n"
+    newline = "\r\n" if source.find(crlf) != -1 else "\n"
+    with _phase(timings, "plan", symbols=len(index)):
+        edits = plan_rules(source, index, rules, stats, newline=newline, encoding=encoding)
+    return stats, edits
+
+
+def apply_rules_to_file(
+    input_path: _pl.Path,
+    rules: RuleSet,
+    *,
+    output_path: _pl.Path | None = None,
+    dry_run: bool = False,
+    encoding: str = "utf-8",
+    validate: bool = False,
+    timings: Timings | None = None,
+    backup_store: BackupStore | None = None,
+) -> tuple[AttachStats, list[Edit]]:
+    """Run `rules` over one library with a single scan and a single streamed write.
+
+    The input is memory-mapped, so line endings and untouched bytes are kept exactly
+    (as with `--mmap`); the target is replaced atomically after a backup.
+    """
+    target = output_path or input_path
+    writer: contextlib.AbstractContextManager[BinaryIO | None] = (
+        contextlib.nullcontext() if dry_run else _io.atomic_writer(target)
+    )
+    with writer as out, _io.map_file(input_path) as buf:
+        size = len(buf)
+        stats, edits = plan_source(buf, rules, encoding=encoding, validate=validate, timings=timings)
+        if out is not None:
+            with _phase(timings, "backup", bytes=size):
+                _make_backup(input_path, backup_store)
+            with _phase(timings, "splice_write", symbols=len(edits)) as ph, memoryview(buf) as view:
+                ph.bytes = _io.write_chunks(out, iter_edit_chunks(view, edits, encoding))
+    return stats, edits
@@ -0,0 +1,183 @@
+"""
+Property inventory across libraries (`scan`).
+
+Each library (or schematic) is scanned once over a memory map with the
+`parser.iter_library_symbols` tokenizer, property offsets included, in worker
+processes across files. A worker returns its file as columns (symbol, property,
+value length, value hash), which are cheap to pickle, plus per-property coverage
+counts. The parent writes the rows as CSV or NDJSON file by file, in input order,
+and sums the counts, so only the files in flight are held in memory.
+"""
+
+from __future__ import annotations
+
+import csv
+import dataclasses as _dc
+import functools
+import hashlib
+import json
+import pathlib as _pl
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any, TextIO
+
+from . import io as _io
+from . import parser
+from .batch import _map
+
+SCAN_FORMATS = ("csv", "ndjson")
+ROW_FIELDS = ("library", "symbol", "property", "value_len", "value_hash")
+COVERAGE_FIELDS = ("property", "symbols", "non_empty", "total", "coverage")
+
+
+@_dc.dataclass
+class FileInventory:
+    """The direct properties of every symbol of one file, column by column.
+
+    Row `i` is property `properties[i]` of symbol `symbols[i]`. Its value has
+    `value_lens[i]` characters, and `value_hashes[i]` is a short BLAKE2b digest of the
+    value (UTF-8, unescaped), or "" for a property without a value. The tokenizer records
+    only string literals as values, so a bare atom such as `(property "Qty" 10)` reads as no
+    value.
+    """
+
+    path: _pl.Path
+    symbol_count: int = 0
+    symbols: list[str] = _dc.field(default_factory=list)
+    properties: list[str] = _dc.field(default_factory=list)
+    value_lens: list[int] = _dc.field(default_factory=list)
+    value_hashes: list[str] = _dc.field(default_factory=list)
+    # Property name -> symbols having it / having it with a non-empty value.
+    having: Counter[str] = _dc.field(default_factory=Counter)
+    non_empty: Counter[str] = _dc.field(default_factory=Counter)
+    error: str | None = None
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def rows(self) -> Iterator[tuple[str, str, str, int, str]]:
+        library = str(self.path)
+        for row in zip(self.symbols, self.properties, self.value_lens, self.value_hashes):
+            yield (library, *row)
+
+
+@_dc.dataclass
+class ScanSummary:
+    files: int = 0
+    symbols: int = 0
+    rows: int = 0
+    errors: int = 0
+    having: Counter[str] = _dc.field(default_factory=Counter)
+    non_empty: Counter[str] = _dc.field(default_factory=Counter)
+
+    def add(self, inventory: FileInventory) -> None:
+        self.files += 1
+        if inventory.error is not None:
+            self.errors += 1
+            return
+        self.symbols += inventory.symbol_count
+        self.rows += len(inventory)
+        self.having.update(inventory.having)
+        self.non_empty.update(inventory.non_empty)
+
+    def coverage(self, prop_names: list[str] | None = None) -> list[dict[str, Any]]:
+        """One record per property (`prop_names`, or every property seen, most common first)."""
+        names = prop_names or [name for name, _count in self.having.most_common()]
+        return [
+            {
+                "property": name,
+                "symbols": self.having[name],
+                "non_empty": self.non_empty[name],
+                "total": self.symbols,
+                "coverage": round(self.having[name] / self.symbols, 4) if self.symbols else 0.0,
+            }
+            for name in names
+        ]
+
+
+def inventory_file(path: _pl.Path, prop_names: frozenset[str] | None = None, encoding: str = "utf-8") -> FileInventory:
+    """Scan one file; with `prop_names`, only those properties become rows and counts."""
+    inventory = FileInventory(path)
+    symbols, properties = inventory.symbols, inventory.properties
+    value_lens, value_hashes = inventory.value_lens, inventory.value_hashes
+    having, non_empty = inventory.having, inventory.non_empty
+    try:
+        with _io.map_file(path) as buf:
+            for span in parser.iter_library_symbols(buf, encoding, property_spans=True):
+                inventory.symbol_count += 1
+                seen: set[str] = set()
+                for prop in span.property_spans:
+                    name = prop.name
+                    if prop_names is not None and name not in prop_names:
+                        continue
+                    value = _decode_value(bytes(buf[prop.value_start : prop.value_end]), encoding)
+                    symbols.append(span.name)
+                    properties.append(name)
+                    value_lens.append(len(value))
+                    value_hashes.append(_value_hash(value) if prop.value_end > prop.value_start else "")
+                    if name not in seen:
+                        seen.add(name)
+                        having[name] += 1
+                        if value:
+                            non_empty[name] += 1
+    except (OSError, ValueError) as exc:
+        return FileInventory(path, error=str(exc))
+    return inventory
+
+
+def _decode_value(raw: bytes, encoding: str) -> str:
+    # `raw` is the quoted value literal, or empty when the property has none.
+    return parser._unescape(raw[1:-1].decode(encoding))
+
+
+def _value_hash(value: str) -> str:
+    return hashlib.blake2b(value.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def scan_paths(
+    paths: list[_pl.Path],
+    *,
+    prop_names: list[str] | None = None,
+    encoding: str = "utf-8",
+    jobs: int = 0,
+    on_file: Callable[[FileInventory], None] | None = None,
+) -> ScanSummary:
+    """Inventory every file of `paths` in up to `jobs` worker processes (`<= 0`: one per CPU).
+
+    Each `FileInventory` reaches `on_file` in input order as soon as it is ready; a file
+    that cannot be read or scanned has `error` set and no rows.
+    """
+    worker = functools.partial(
+        inventory_file, prop_names=frozenset(prop_names) if prop_names else None, encoding=encoding
+    )
+    summary = ScanSummary()
+    for inventory in _map(worker, paths, jobs):
+        summary.add(inventory)
+        if on_file is not None:
+            on_file(inventory)
+    return summary
+
+
+class TableWriter:
+    """Writes rows as CSV (with a header) or NDJSON objects, one block per call."""
+
+    def __init__(self, f: TextIO, fmt: str, fields: tuple[str, ...]) -> None:
+        if fmt not in SCAN_FORMATS:
+            raise ValueError(f"Unsupported table format: {fmt}")
+        self.f = f
+        self.fmt = fmt
+        self.fields = fields
+        self._csv = csv.writer(f, lineterminator="\n") if fmt == "csv" else None
+        if self._csv is not None:
+            self._csv.writerow(fields)
+
+    def write_rows(self, rows: Iterable[tuple[Any, ...]]) -> None:
+        if self._csv is not None:
+            self._csv.writerows(rows)
+        else:
+            fields = self.fields
+            self.f.writelines(json.dumps(dict(zip(fields, row)), ensure_ascii=False) + "\n" for row in rows)
+        self.f.flush()
+
+    def write_records(self, records: list[dict[str, Any]]) -> None:
+        self.write_rows([tuple(record[k] for k in self.fields) for record in records])
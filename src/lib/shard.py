@@ -0,0 +1,231 @@
+"""
+Intra-file parallelism for very large libraries (`--shards`).
+
+Top-level `(symbol ...)` forms are independent, so a memory-mapped library is
+cut into contiguous ranges of whole top-level symbols. Each range is indexed,
+planned and spliced by a worker process into a part file, and the parent
+stitches the header, the parts and the trailer back together in order.
+
+Cut points are found without parsing: they are lines that start with the
+indentation of the first top-level symbol followed by `(symbol "`. Every
+worker checks that its range is balanced at library depth; if a cut landed
+anywhere else, the file is processed serially instead.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import mmap
+import os
+import pathlib as _pl
+import re
+import tempfile
+from collections.abc import Mapping
+from typing import TYPE_CHECKING
+
+from . import io as _io
+from . import parser
+from .attacher import Additions, AttachStats, _attach_mapped, _iter_buffer_chunks, _make_backup, _plan_additions
+from .timing import Timings
+from .timing import phase as _phase
+
+if TYPE_CHECKING:
+    from .backups import BackupStore
+
+# Below this size the process pool costs more than it saves.
+MIN_SHARD_BYTES = 8 * 1024 * 1024
+_COPY_BLOCK = 1024 * 1024
+
+
+def attach_sharded(
+    input_path: _pl.Path,
+    prop_names: list[str],
+    prop_value: str,
+    *,
+    shards: int,
+    output_path: _pl.Path | None,
+    dry_run: bool,
+    encoding: str,
+    validate: bool,
+    timings: Timings | None,
+    values: Mapping[str, Mapping[str, str]] | None,
+    backup_store: BackupStore | None,
+) -> tuple[AttachStats, Additions]:
+    """`attacher._attach_mapped` split across `shards` worker processes (0 = one per CPU).
+
+    Output is byte-identical to the serial memory-mapped path, which is used instead for
+    files under `MIN_SHARD_BYTES` or whose layout does not allow safe cuts.
+    """
+    if shards <= 0:
+        shards = os.cpu_count() or 1
+
+    def serial() -> tuple[AttachStats, Additions]:
+        return _attach_mapped(
+            input_path,
+            prop_names,
+            prop_value,
+            output_path=output_path,
+            dry_run=dry_run,
+            encoding=encoding,
+            validate=validate,
+            timings=timings,
+            values=values,
+            backup_store=backup_store,
+        )
+
+    if shards < 2 or input_path.stat().st_size < MIN_SHARD_BYTES:
+        return serial()
+    with _io.map_file(input_path) as buf:
+        size = len(buf)
+        if validate:
+            with _phase(timings, "validate", bytes=size):
+                parser.validate_s_expr(bytes(buf).decode(encoding))
+        with _phase(timings, "shard_plan", bytes=size):
+            bounds = _plan_ranges(buf, shards)
+            newline = "\r\n" if buf.find(b"\r\n") != -1 else "\n"
+    if bounds is None:
+        return serial()
+
+    target = output_path or input_path
+    with _phase(timings, "shard_workers", bytes=size) as ph:
+        try:
+            results = _run_workers(
+                input_path,
+                bounds,
+                prop_names,
+                prop_value,
+                values,
+                newline,
+                encoding,
+                None if dry_run else target.parent,
+            )
+        except ValueError:
+            # A cut split a symbol, or the file is malformed: let the serial path decide.
+            return serial()
+        stats = AttachStats()
+        to_add: Additions = []
+        spans: list[parser.SymbolSpan] = []
+        for chunk_stats, chunk_to_add, _part in results:
+            stats.merge(chunk_stats)
+            to_add.extend(chunk_to_add)
+            assert chunk_stats.index is not None
+            spans.extend(chunk_stats.index)
+        stats.index = parser.SymbolIndex(spans)
+        ph.symbols = len(spans)
+
+    parts = [part for _stats, _to_add, part in results if part is not None]
+    try:
+        if not dry_run:
+            with _phase(timings, "backup", bytes=size):
+                _make_backup(input_path, backup_store)
+            # As in `_attach_mapped`, the writer wraps the mapping so the target is replaced last.
+            with (
+                _phase(timings, "stitch_write", symbols=len(to_add)) as ph,
+                _io.atomic_writer(target) as out,
+                _io.map_file(input_path) as buf,
+            ):
+                out.write(buf[: bounds[0]])
+                for part in parts:
+                    with part.open("rb") as f:
+                        while block := f.read(_COPY_BLOCK):
+                            out.write(block)
+                out.write(buf[bounds[-1] :])
+                ph.bytes = out.tell()
+    finally:
+        _remove(parts)
+    return stats, to_add
+
+
+def _plan_ranges(buf: mmap.mmap | bytes, shards: int) -> list[int] | None:
+    """Cut offsets `[c0, c1, ..., cn]`: worker i handles `buf[c(i):c(i+1)]`, all whole top-level symbols.
+
+    `c0` is the start of the first top-level symbol's line and `cn` the library's closing
+    parenthesis; everything outside is header/trailer copied verbatim.
+    """
+    first = next(parser.iter_symbol_spans(buf), None)
+    if first is None:
+        return None
+    line_start = buf.rfind(b"\n", 0, first.start) + 1
+    indent = bytes(buf[line_start : first.start])
+    root_close = buf.rfind(b")")
+    if indent.strip() or bytes(buf[root_close + 1 :]).strip():
+        return None
+    # Header and trailer must balance to exactly the library form around the symbols.
+    outside = bytes(buf[:line_start]) + bytes(buf[root_close:])
+    try:
+        if list(parser.iter_symbol_spans(outside)):
+            return None
+    except ValueError:
+        return None
+    cut = re.compile(b"\n" + re.escape(indent) + rb'\(symbol "')
+    bounds = [line_start]
+    span = root_close - line_start
+    for k in range(1, shards):
+        m = cut.search(buf, line_start + k * span // shards, root_close)
+        if m is None:
+            break
+        pos = m.start() + 1
+        if pos > bounds[-1]:
+            bounds.append(pos)
+    bounds.append(root_close)
+    return bounds if len(bounds) > 2 else None
+
+
+def _run_workers(
+    input_path: _pl.Path,
+    bounds: list[int],
+    prop_names: list[str],
+    prop_value: str,
+    values: Mapping[str, Mapping[str, str]] | None,
+    newline: str,
+    encoding: str,
+    part_dir: _pl.Path | None,
+) -> list[tuple[AttachStats, Additions, _pl.Path | None]]:
+    """Run one `_shard_worker` per range; on any failure remove the parts written and re-raise."""
+    import concurrent.futures as _cf
+
+    ranges = list(zip(bounds, bounds[1:]))
+    with _cf.ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+        futures = [
+            pool.submit(_shard_worker, input_path, a, b, prop_names, prop_value, values, newline, encoding, part_dir)
+            for a, b in ranges
+        ]
+        _cf.wait(futures)
+    results = [f.result() for f in futures if f.exception() is None]
+    error = next((exc for f in futures if (exc := f.exception()) is not None), None)
+    if error is not None:
+        _remove([part for _stats, _to_add, part in results if part is not None])
+        raise error
+    return results
+
+
+def _shard_worker(
+    input_path: _pl.Path,
+    start: int,
+    end: int,
+    prop_names: list[str],
+    prop_value: str,
+    values: Mapping[str, Mapping[str, str]] | None,
+    newline: str,
+    encoding: str,
+    part_dir: _pl.Path | None,
+) -> tuple[AttachStats, Additions, _pl.Path | None]:
+    with _io.map_file(input_path) as buf:
+        # Raises ValueError unless the range is a run of whole top-level symbols.
+        index = parser.SymbolIndex(parser.iter_symbol_spans(buf, encoding, start=start, end=end, depth=1))
+        stats = AttachStats(index=index)
+        to_add = _plan_additions(index, prop_names, prop_value, stats, values)
+        if part_dir is None:
+            return stats, to_add, None
+        fd, name = tempfile.mkstemp(dir=part_dir, prefix=f".{input_path.name}.", suffix=".part")
+        with os.fdopen(fd, "wb") as out, memoryview(buf) as view:
+            _io.write_chunks(
+                out, _iter_buffer_chunks(buf, view, to_add, newline=newline, encoding=encoding, start=start, end=end)
+            )
+    return stats, to_add, _pl.Path(name)
+
+
+def _remove(parts: list[_pl.Path]) -> None:
+    for part in parts:
+        with contextlib.suppress(OSError):
+            part.unlink()
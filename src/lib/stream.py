@@ -0,0 +1,230 @@
+"""
+Streaming attach over file objects (`attach --input -`).
+
+The library is read in chunks and scanned incrementally, tracking only the
+nesting depth. Every run of top-level forms completed by a chunk is indexed
+with the `parser.iter_symbol_spans` tokenizer, planned and written out with
+its insertions straight away, then dropped from the buffer. Memory is bounded
+by the largest top-level form plus one chunk rather than the library size, and
+output starts before the input has been fully read. In a schematic, only the
+`(lib_symbols ...)` form is indexed; it is buffered whole, like any top-level form.
+
+Inserted properties use CRLF once a CRLF has been read anywhere in the input, as the
+file paths do for the whole file. Forms written before the first CRLF arrives cannot
+be revisited, so only a library whose first CRLF follows an already-written symbol
+comes out differently from `--mmap`.
+"""
+
+from __future__ import annotations
+
+import dataclasses as _dc
+from collections.abc import Mapping
+from typing import BinaryIO
+
+from . import io as _io
+from . import parser
+from .attacher import AttachStats, _insertion_text, _plan_additions
+from .edits import Edit, iter_edit_chunks
+from .rules import RuleSet, plan_rules
+from .timing import Timings
+from .timing import phase as _phase
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+
+@_dc.dataclass(frozen=True)
+class _Options:
+    prop_names: list[str]
+    prop_value: str
+    values: Mapping[str, Mapping[str, str]] | None
+    rules: RuleSet | None
+    encoding: str
+    validate: bool
+
+
+@_dc.dataclass
+class _Scan:
+    """Incremental depth tracking over the buffered, not yet written input."""
+
+    pos: int = 0  # next offset to tokenize
+    depth: int = 0
+    header: int = 0  # offset just past the library's opening parenthesis while that is buffered
+    # Offset just past the last complete top-level form (depth back to 1), or 0.
+    boundary: int = 0
+    closed: bool = False  # the root form has been closed
+
+    def feed(self, buf: bytearray, eof: bool) -> None:
+        """Advance over the complete tokens in `buf`; a string cut off by the chunk end waits."""
+        for m in parser._TOKEN_RE_BYTES.finditer(buf, self.pos):
+            kind = m.lastindex
+            if kind == 5:
+                if eof:
+                    raise ValueError("Unterminated string literal in the input")
+                self.pos = m.start()
+                return
+            if kind in (2, 3):
+                self.depth += 1
+                if self.depth == 1 and not self.closed:
+                    self.header = m.end()
+            elif kind == 4:
+                self.depth -= 1
+                if self.depth < 0:
+                    raise ValueError("Unbalanced ')' in the input")
+                if self.depth == 1 and not self.closed:
+                    self.boundary = m.end()
+                self.closed = self.closed or self.depth == 0
+            self.pos = m.end()
+        self.pos = len(buf)
+
+    def consumed(self, n: int) -> None:
+        """The first `n` buffered bytes were written and dropped."""
+        self.pos -= n
+        self.header = max(self.header - n, 0)
+        self.boundary = max(self.boundary - n, 0)
+
+
+def attach_stream(
+    src: BinaryIO,
+    out: BinaryIO,
+    prop_names: list[str],
+    prop_value: str = "",
+    *,
+    values: Mapping[str, Mapping[str, str]] | None = None,
+    rules: RuleSet | None = None,
+    encoding: str = "utf-8",
+    validate: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    timings: Timings | None = None,
+) -> AttachStats:
+    """Copy the library read from `src` to `out`, attaching properties as `attach_properties` does.
+
+    Each run of complete top-level forms is written (and `out` flushed) as soon as a read
+    completes it. Input is handled as bytes: line endings are kept and inserted blocks use
+    the first line ending seen. With `validate`, each run is parsed with sexpdata before it
+    is written. Raises `ValueError` on malformed input, by which time the output before
+    the offending form has been written.
+    """
+    streamer = _Streamer(out, _Options(prop_names, prop_value, values, rules, encoding, validate))
+    stats = streamer.stats
+    with _phase(timings, "stream") as ph:
+        while chunk := src.read(chunk_size):
+            ph.bytes += len(chunk)
+            streamer.feed(chunk)
+        streamer.finish()
+        ph.symbols = stats.symbols_processed
+    if values is not None:
+        stats.unmatched_mapping_keys = [k for k in values if k not in streamer.matched]
+    stats.timings = timings
+    return stats
+
+
+class _Streamer:
+    """The buffered input not yet written, and how far it is known to be complete.
+
+    Runs of top-level symbols are normally cut before the last line that starts a
+    top-level `(symbol` at the library's indentation (as `shard` cuts ranges), and the
+    tokenizer's own balance check on the run confirms the cut. Until that indentation is
+    known, or when a cut is rejected, the exact depth scan (`_Scan`) finds the boundary.
+    """
+
+    def __init__(self, out: BinaryIO, options: _Options) -> None:
+        self.out = out
+        self.options = options
+        self.stats = AttachStats()
+        self.matched: set[str] = set()
+        self.buf = bytearray()
+        self.scan = _Scan()
+        # Like the file paths, CRLF as soon as the input has one anywhere; "\n" until then.
+        self.newline = "\n"
+        self.marker: bytes | None = None  # newline + indent + `(symbol "`
+        self.schematic: bool | None = None  # None until the root form's head has been read
+
+    def feed(self, chunk: bytes) -> None:
+        buf = self.buf
+        buf += chunk
+        # One byte of overlap catches a CRLF split across chunks.
+        if self.newline == "\n" and buf.find(b"\r\n", max(len(buf) - len(chunk) - 1, 0)) != -1:
+            self.newline = "\r\n"
+        if self.schematic is None:
+            # Wait until a head longer than `(kicad_sch` could be told apart from it.
+            if len(buf.lstrip()) <= len(parser.SCHEMATIC_ROOT) + 1:
+                return
+            self.schematic = parser.root_form(buf) == parser.SCHEMATIC_ROOT
+        if self.marker is not None and (cut := buf.rfind(self.marker)) != -1:
+            try:
+                index = self._index(cut + 1)
+            except ValueError:
+                pass  # not a boundary after all (e.g. inside a string): scan exactly
+            else:
+                self._write(cut + 1, index)
+                self.scan = _Scan(depth=1)
+                return
+        self._scan(eof=False)
+
+    def finish(self) -> None:
+        if self.schematic is None:
+            self.schematic = parser.root_form(self.buf) == parser.SCHEMATIC_ROOT
+        self._scan(eof=True)
+        if self.scan.depth:
+            raise ValueError(f"Unbalanced parentheses: {self.scan.depth} form(s) not closed at the end of the input")
+        self.out.write(self.buf)
+        self.out.flush()
+
+    def _scan(self, eof: bool) -> None:
+        scan, buf = self.scan, self.buf
+        scan.feed(buf, eof)
+        if scan.header:
+            self.out.write(buf[: scan.header])
+            self._consume(scan.header)
+        if scan.boundary:
+            index = self._index(scan.boundary)
+            if self.marker is None and len(index) and not self.schematic:
+                first = index.symbols[0].start
+                indent = bytes(buf[buf.rfind(b"\n", 0, first) + 1 : first])
+                if not indent.strip():
+                    self.marker = b"\n" + indent + b'(symbol "'
+            self._write(scan.boundary, index)
+
+    def _index(self, end: int) -> parser.SymbolIndex:
+        """Index `buf[:end]`, which must be whole top-level forms directly inside the library root."""
+        start = 0
+        if self.schematic:
+            section = parser.lib_symbols_range(self.buf, end=end, depth=1)
+            if section is None:
+                return parser.SymbolIndex(())
+            start, end = section
+        spans = parser.iter_symbol_spans(
+            self.buf,
+            self.options.encoding,
+            start=start,
+            end=end,
+            depth=1,
+            property_spans=self.options.rules is not None,
+        )
+        return parser.SymbolIndex(spans)
+
+    def _write(self, end: int, index: parser.SymbolIndex) -> None:
+        """Plan and write `buf[:end]`, then drop it from the buffer."""
+        options, buf, stats = self.options, self.buf, self.stats
+        encoding = options.encoding
+        newline = self.newline
+        if options.validate:
+            # One expression around the run's forms.
+            parser.validate_s_expr("(" + buf[:end].decode(encoding) + ")")
+        if options.values is not None:
+            self.matched.update(span.name for span in index if span.name in options.values)
+        edits: list[Edit]
+        if options.rules is not None:
+            edits = plan_rules(buf, index, options.rules, stats, newline=newline, encoding=encoding)
+        else:
+            to_add = _plan_additions(index, options.prop_names, options.prop_value, stats, options.values)
+            edits = [Edit(span.end - 1, _insertion_text(buf, span, props, newline)) for span, props in to_add]
+        # Release the view before the written bytes are dropped from `buf`.
+        with memoryview(buf)[:end] as view:
+            _io.write_chunks(self.out, iter_edit_chunks(view, edits, encoding))
+        self.out.flush()
+        self._consume(end)
+
+    def _consume(self, n: int) -> None:
+        del self.buf[:n]
+        self.scan.consumed(n)
@@ -0,0 +1,120 @@
+"""
+Per-phase timing and memory instrumentation for attachment runs.
+
+Pass a `Timings` to `attach_property_to_file(timings=...)` (or use the CLI
+`--timings` flag) to record wall time, bytes processed, symbol throughput
+and the `tracemalloc` peak of each phase. Tracing starts with the first phase
+and runs until `Timings.close()`; only the peak is reset between phases. It
+slows allocation-heavy code, so times taken with it are inflated.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import dataclasses as _dc
+import time
+import tracemalloc
+from collections.abc import Iterator
+from typing import Any
+
+
+@_dc.dataclass
+class PhaseTiming:
+    name: str
+    seconds: float = 0.0
+    bytes: int = 0
+    symbols: int = 0
+    # Peak traced Python allocation above the level at phase start; None when tracing is off.
+    peak_bytes: int | None = None
+
+    @property
+    def symbols_per_s(self) -> float | None:
+        return self.symbols / self.seconds if self.symbols and self.seconds else None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "phase": self.name,
+            "seconds": self.seconds,
+            "bytes": self.bytes,
+            "symbols": self.symbols,
+            "symbols_per_s": self.symbols_per_s,
+            "peak_bytes": self.peak_bytes,
+        }
+
+
+class Timings:
+    """Ordered per-phase measurements of one run (or the merge of several).
+
+    With `trace_memory`, `tracemalloc` is started on the first phase (unless already
+    tracing) and stopped by `close()`, or on leaving a `with Timings() as timings:` block.
+    """
+
+    def __init__(self, trace_memory: bool = True) -> None:
+        self.trace_memory = trace_memory
+        self.phases: list[PhaseTiming] = []
+        self._started_tracing = False
+
+    def __enter__(self) -> Timings:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop `tracemalloc` if these timings started it."""
+        if self._started_tracing:
+            self._started_tracing = False
+            tracemalloc.stop()
+
+    @contextlib.contextmanager
+    def phase(self, name: str, *, bytes: int = 0, symbols: int = 0) -> Iterator[PhaseTiming]:
+        """Time the block as phase `name`; the yielded record's counters may be filled in inside it."""
+        record = PhaseTiming(name, bytes=bytes, symbols=symbols)
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.seconds = time.perf_counter() - start
+            if self.trace_memory:
+                record.peak_bytes = max(0, tracemalloc.get_traced_memory()[1] - base)
+            self.phases.append(record)
+
+    @property
+    def traced(self) -> bool:
+        """True when any phase was measured under `tracemalloc`, which inflates its time."""
+        return any(p.peak_bytes is not None for p in self.phases)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(p.seconds for p in self.phases)
+
+    def merge(self, other: Timings) -> None:
+        """Accumulate `other` phase by phase (times, bytes and symbols add; peaks take the max)."""
+        by_name = {p.name: p for p in self.phases}
+        for p in other.phases:
+            mine = by_name.get(p.name)
+            if mine is None:
+                mine = PhaseTiming(p.name)
+                self.phases.append(mine)
+                by_name[p.name] = mine
+            mine.seconds += p.seconds
+            mine.bytes += p.bytes
+            mine.symbols += p.symbols
+            if p.peak_bytes is not None:
+                mine.peak_bytes = max(mine.peak_bytes or 0, p.peak_bytes)
+
+    def as_dicts(self) -> list[dict[str, Any]]:
+        return [p.as_dict() for p in self.phases]
+
+
+def phase(timings: Timings | None, name: str, **counters: int) -> contextlib.AbstractContextManager[PhaseTiming]:
+    """`timings.phase(...)`, or a no-op record when instrumentation is off."""
+    if timings is None:
+        return contextlib.nullcontext(PhaseTiming(name, **counters))
+    return timings.phase(name, **counters)
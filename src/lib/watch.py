@@ -0,0 +1,195 @@
+"""
+Watch mode: keep library indexes warm and backfill properties on change.
+
+Polls watched `.kicad_sym` files by (mtime, size), re-indexes only files whose
+stat changed, and writes a file back only when it is missing properties. A
+change must be stable for the debounce window before it is processed, so a
+burst of saves triggers a single write. Each change costs one read and one
+scan: the additions are planned and spliced from that index, and the index of
+the written file is derived from it rather than re-parsed.
+"""
+
+from __future__ import annotations
+
+import dataclasses as _dc
+import os
+import pathlib as _pl
+import time
+from collections.abc import Callable, Iterable, Mapping
+from io import TextIOWrapper
+from typing import cast
+
+from . import io as _io
+from . import parser
+from .attacher import Additions, _insertion_text, _make_backup, _plan_source
+from .backups import BackupStore
+from .batch import FileResult, expand_inputs
+from .edits import Edit, iter_edit_chunks, splice
+
+# (st_mtime_ns, st_size)
+Signature = tuple[int, int]
+
+
+@_dc.dataclass
+class _FileState:
+    signature: Signature | None = None  # stat of the content last indexed (or written by us)
+    index: parser.SymbolIndex | None = None
+    pending: Signature | None = None  # changed stat waiting out the debounce window
+    pending_since: float = 0.0
+
+
+class Watcher:
+    """Poll-based watcher holding one `SymbolIndex` per watched file.
+
+    Call `poll()` repeatedly (or `run()`); each call returns a `FileResult` for every file
+    processed in it. Files whose content already has every property are only re-indexed,
+    never rewritten. After writing a file the watcher records its new stat, so its own
+    writes do not trigger another pass.
+    """
+
+    def __init__(
+        self,
+        spec: _pl.Path,
+        prop_names: list[str],
+        prop_value: str = "",
+        *,
+        values: Mapping[str, Mapping[str, str]] | None = None,
+        encoding: str = "utf-8",
+        use_mmap: bool = False,
+        debounce: float = 0.5,
+        backup_store: bool = False,
+        backup_keep: int | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.spec = spec
+        self.prop_names = prop_names
+        self.prop_value = prop_value
+        self.values = values
+        self.encoding = encoding
+        self.use_mmap = use_mmap
+        self.debounce = debounce
+        self.backup_store = backup_store
+        self.backup_keep = backup_keep
+        self._clock = clock
+        self._files: dict[_pl.Path, _FileState] = {}
+
+    def index(self, path: _pl.Path) -> parser.SymbolIndex | None:
+        """The warm index of `path`, if it has been processed."""
+        state = self._files.get(path)
+        return state.index if state is not None else None
+
+    def poll(self) -> list[FileResult]:
+        now = self._clock()
+        paths = expand_inputs(self.spec)
+        for gone in self._files.keys() - set(paths):
+            del self._files[gone]
+        results = []
+        for path in paths:
+            sig = _signature(path)
+            state = self._files.setdefault(path, _FileState())
+            if sig is None or sig == state.signature:
+                state.pending = None
+                continue
+            if sig != state.pending:
+                # New or still changing: (re)start the debounce window.
+                state.pending, state.pending_since = sig, now
+            if now - state.pending_since >= self.debounce:
+                results.append(self._process(path, state, sig))
+        return results
+
+    def run(self, interval: float = 1.0, *, on_result: Callable[[FileResult], None] | None = None) -> None:
+        """Poll every `interval` seconds until interrupted."""
+        while True:
+            for result in self.poll():
+                if on_result is not None:
+                    on_result(result)
+            time.sleep(interval)
+
+    def _process(self, path: _pl.Path, state: _FileState, sig: Signature) -> FileResult:
+        # Record the stat seen before reading: a save racing the read shows up as a new change.
+        state.pending, state.signature = None, sig
+        try:
+            data = path.read_bytes()
+            # As `attach`: bytes with `--mmap`, otherwise text read with universal newlines.
+            source: str | bytes = data if self.use_mmap else _universal_newlines(data.decode(self.encoding))
+            stats, to_add = _plan_source(
+                source,
+                len(data),
+                self.prop_names,
+                self.prop_value,
+                validate=False,
+                timings=None,
+                values=self.values,
+                encoding=self.encoding,
+            )
+            assert stats.index is not None
+            if not to_add:
+                state.index = stats.index
+                return FileResult(path=path)
+            newline = "\r\n" if isinstance(source, bytes) and b"\r\n" in source else "\n"
+            edits = [Edit(span.end - 1, _insertion_text(source, span, props, newline)) for span, props in to_add]
+            _make_backup(path, BackupStore.beside(path, self.backup_keep) if self.backup_store else None)
+            with _io.atomic_writer(path) as out:
+                if isinstance(source, str):
+                    text = TextIOWrapper(out, encoding=self.encoding)
+                    text.write(cast(str, splice(source, edits)))
+                    text.flush()
+                    text.detach()
+                else:
+                    with memoryview(source) as view:
+                        _io.write_chunks(out, iter_edit_chunks(view, edits, self.encoding))
+                out.flush()
+                # The stat of what we wrote, taken from our own file: a save landing after the
+                # rename must still show up as a change.
+                st = os.fstat(out.fileno())
+            state.signature = st.st_mtime_ns, st.st_size
+            state.index = _index_after(stats.index, to_add, edits, None if isinstance(source, str) else self.encoding)
+        except Exception as exc:  # noqa: BLE001
+            # Keep the failing stat so a half-saved file is retried only once it changes again.
+            state.index = None
+            return FileResult(path=path, error=str(exc))
+        stats.index = state.index
+        return FileResult(path=path, stats=stats)
+
+
+def _signature(path: _pl.Path) -> Signature | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _universal_newlines(text: str) -> str:
+    # What `Path.read_text` returns for the same bytes.
+    return text.replace("\r\n", "\n").replace("\r", "\n") if "\r" in text else text
+
+
+def _index_after(
+    index: parser.SymbolIndex, to_add: Additions, edits: Iterable[Edit], encoding: str | None
+) -> parser.SymbolIndex:
+    """The index of the output, derived from the input's index and the insertions made into it.
+
+    Spans after an insertion shift by its length (bytes when `encoding` is given, otherwise
+    characters), and each grown symbol gains the added property names.
+    """
+    grown = {
+        id(span): ({name for name, _value in props}, len(edit.text.encode(encoding)) if encoding else len(edit.text))
+        for (span, props), edit in zip(to_add, edits)
+    }
+    spans = []
+    shift = 0
+    for span in index:
+        added, length = grown.get(id(span), (None, 0))
+        units = tuple(_dc.replace(u, start=u.start + shift, end=u.end + shift) for u in span.units)
+        spans.append(
+            _dc.replace(
+                span,
+                start=span.start + shift,
+                end=span.end + shift + length,
+                properties=span.properties | added if added else span.properties,
+                units=units,
+            )
+        )
+        shift += length
+    return parser.SymbolIndex(spans)
@@ -108,3 +108,64 @@ def test_cli_attach_permission_error_generates_error_report(tmp_path: pl.Path):
     assert report.exists()
     content = report.read_text("utf-8")
     assert "ERROR" in content
+
+
+def test_cli_attach_shards_single_file_only(tmp_path: pl.Path):
+    runner = CliRunner()
+    target = tmp_path / "lib.kicad_sym"
+    target.write_bytes((FIXTURES / "official-Device-no-prop.kicad_sym").read_bytes())
+    args = ["attach", "--property-name", "SzlcscCode", "--shards", "2", "--report", str(tmp_path / "r.md")]
+    result = runner.invoke(kicad_sym_prop, [*args, "--input", str(target)])
+    assert result.exit_code == 0, result.output
+    assert not any(True for _ in parser.SymbolIndex.from_path(target).missing(["SzlcscCode"]))
+
+    bad = runner.invoke(kicad_sym_prop, [*args, "--input", str(tmp_path)])
+    assert bad.exit_code != 0
+    assert "--shards" in bad.output
+
+
+def test_cli_attach_rules_file(tmp_path: pl.Path):
+    runner = CliRunner()
+    target = tmp_path / "lib.kicad_sym"
+    target.write_bytes((FIXTURES / "official-Device-no-prop.kicad_sym").read_bytes())
+    doc = tmp_path / "rules.json"
+    doc.write_text('[{"op": "rename", "name": "Datasheet", "to": "Doc"}, {"op": "delete", "name": "ki_keywords"}]')
+    args = ["attach", "--input", str(target), "--rules", str(doc), "--property-name", "SzlcscCode"]
+    result = runner.invoke(kicad_sym_prop, [*args, "--report", str(tmp_path / "r.md")])
+    assert result.exit_code == 0, result.output
+    assert "renamed=" in result.output and "deleted=" in result.output
+    index = parser.SymbolIndex.from_path(target)
+    assert not any(True for _ in index.missing(["SzlcscCode", "Doc"]))
+    assert not any(index.has_property(s.name, "ki_keywords") for s in index)
+
+    bad = runner.invoke(kicad_sym_prop, [*args, "--shards", "2"])
+    assert bad.exit_code != 0 and "--rules" in bad.output
+    doc.write_text('[{"op": "move", "name": "A"}]')
+    bad = runner.invoke(kicad_sym_prop, args)
+    assert bad.exit_code != 0 and "Unknown rule op" in bad.output
+
+
+def test_cli_attach_streams_stdin_to_stdout(tmp_path: pl.Path):
+    runner = CliRunner(mix_stderr=False)
+    data = (FIXTURES / "official-Device-no-prop.kicad_sym").read_bytes()
+    expected = tmp_path / "lib.kicad_sym"
+    expected.write_bytes(data)
+    args = ["attach", "--property-name", "SzlcscCode", "--report", str(tmp_path / "r.md")]
+    runner.invoke(kicad_sym_prop, [*args, "--input", str(expected), "--mmap"])
+
+    result = runner.invoke(kicad_sym_prop, [*args, "--input", "-", "--output", "-"], input=data)
+    assert result.exit_code == 0, result.stderr
+    assert result.stdout_bytes == expected.read_bytes()
+    assert "added=" in result.stderr
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["lib.kicad_sym", "lib.kicad_sym.orig", "r.md"]
+
+    out = tmp_path / "out.kicad_sym"
+    result = runner.invoke(
+        kicad_sym_prop, ["attach", "--input", "-", "--output", str(out), "--property-name", "X"], input=b"("
+    )
+    assert result.exit_code == 2 and "not closed" in result.stderr
+    assert not out.exists()
+
+    for extra in (["--jobs", "2"], ["--mmap"], ["--pipeline"]):
+        result = runner.invoke(kicad_sym_prop, [*args, "--input", "-", *extra], input=data)
+        assert result.exit_code == 2 and "--input - cannot be combined" in result.stderr
@@ -0,0 +1,298 @@
+import pathlib as pl
+
+from click.testing import CliRunner
+
+from src.cli.main import kicad_sym_prop
+from src.lib import parser
+
+FIXTURES = pl.Path("tests/fixtures/kicad_v9")
+
+
+def _make_repo(tmp_path: pl.Path) -> list[pl.Path]:
+    src = FIXTURES / "official-mixed-some-prop-SzlcscCode.kicad_sym"
+    files = [tmp_path / "a.kicad_sym", tmp_path / "sub" / "b.kicad_sym"]
+    for f in files:
+        f.parent.mkdir(parents=True, exist_ok=True)
+        f.write_bytes(src.read_bytes())
+    (tmp_path / "notes.txt").write_text("not a library", encoding="utf-8")
+    return files
+
+
+def test_cli_attach_directory_with_jobs_aggregates(tmp_path: pl.Path):
+    files = _make_repo(tmp_path)
+    single = parser.SymbolIndex.from_path(files[0])
+    missing = sum(1 for _ in single.missing(["SzlcscCode"]))
+    report = tmp_path / "batch.report.md"
+    result = CliRunner().invoke(
+        kicad_sym_prop,
+        ["attach", "--input", str(tmp_path), "--property-name", "SzlcscCode", "--jobs", "2", "--report", str(report)],
+    )
+    assert result.exit_code == 0, result.output
+    assert f"Files=2 failed=0 Processed={2 * len(single)} added={2 * missing}" in result.output
+    for f in files:
+        assert not any(True for _ in parser.SymbolIndex.from_path(f).missing(["SzlcscCode"]))
+    assert "- Files: **2**" in report.read_text("utf-8")
+
+
+def test_cli_attach_glob_dry_run_rejects_output(tmp_path: pl.Path):
+    files = _make_repo(tmp_path)
+    before = [f.read_bytes() for f in files]
+    pattern = str(tmp_path / "**" / "*.kicad_sym")
+    runner = CliRunner()
+    result = runner.invoke(
+        kicad_sym_prop,
+        ["attach", "--input", pattern, "--property-name", "X", "--dry-run", "--report", str(tmp_path / "r.md")],
+    )
+    assert result.exit_code == 0, result.output
+    assert "Files=2 failed=0" in result.output
+    assert [f.read_bytes() for f in files] == before
+
+    bad = runner.invoke(
+        kicad_sym_prop,
+        ["attach", "--input", pattern, "--property-name", "X", "--output", str(tmp_path / "o.kicad_sym")],
+    )
+    assert bad.exit_code != 0
+
+
+def test_cli_attach_values_from_without_property_name(tmp_path: pl.Path):
+    files = _make_repo(tmp_path)
+    name = next(iter(parser.SymbolIndex.from_path(files[0]))).name
+    mapping = tmp_path / "values.csv"
+    mapping.write_text(f"Symbol,MPN\n{name},PART-1\nNoSuchSymbol,X\n", encoding="utf-8")
+    report = tmp_path / "batch.report.md"
+    result = CliRunner().invoke(
+        kicad_sym_prop,
+        ["attach", "--input", str(tmp_path), "--values-from", str(mapping), "--report", str(report)],
+    )
+    assert result.exit_code == 0, result.output
+    assert "added=2" in result.output
+    for f in files:
+        assert parser.SymbolIndex.from_path(f).has_property(name, "MPN")
+    assert "- `NoSuchSymbol`" in report.read_text("utf-8")
+
+    result = CliRunner().invoke(kicad_sym_prop, ["attach", "--input", str(files[0])])
+    assert result.exit_code != 0
+    assert "--values-from" in result.output
+
+
+def test_cli_attach_batch_ndjson_report_streams_one_record_per_file(tmp_path: pl.Path):
+    import json
+
+    files = _make_repo(tmp_path)
+    (tmp_path / "broken.kicad_sym").write_text('(kicad_symbol_lib (symbol "x', encoding="utf-8")
+    result = CliRunner(mix_stderr=False).invoke(
+        kicad_sym_prop,
+        [
+            "attach",
+            "--input",
+            str(tmp_path),
+            "--property-name",
+            "SzlcscCode",
+            "--property-name",
+            "Extra",
+            "--dry-run",
+            "--timings",
+            "--report-format",
+            "ndjson",
+            "--report",
+            "-",
+        ],
+    )
+    assert result.exit_code == 2
+    records = [json.loads(line) for line in result.stdout.splitlines()]
+    assert sorted(r["path"] for r in records) == sorted(str(p) for p in [*files, tmp_path / "broken.kicad_sym"])
+    (broken,) = (r for r in records if not r["ok"])
+    assert broken["stats"] is None and broken["error"]
+    ok = [r for r in records if r["ok"]][0]
+    assert ok["stats"]["properties_added"] == sum(len(a["added"]) for a in ok["actions"])
+    assert {"Extra"} <= {p for a in ok["actions"] for p in a["added"]}
+    assert ok["timings"] and ok["timings"][0]["phase"]
+    assert "Files=3 failed=1" in result.stderr
+
+
+def test_cli_attach_markdown_report_to_stdout(tmp_path: pl.Path, monkeypatch):
+    files = _make_repo(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    runner = CliRunner(mix_stderr=False)
+    for spec in (files[0], tmp_path):
+        args = ["attach", "--input", str(spec), "--property-name", "X", "--dry-run", "--report", "-"]
+        result = runner.invoke(kicad_sym_prop, args)
+        assert result.exit_code == 0, result.stderr
+        assert result.stdout.startswith("#") and "added=" not in result.stdout
+        assert "added=" in result.stderr
+        assert not (tmp_path / "-").exists()
+
+
+def test_cli_attach_single_file_json_report(tmp_path: pl.Path):
+    import json
+
+    lib = _make_repo(tmp_path)[0]
+    report = tmp_path / "r.json"
+    result = CliRunner().invoke(
+        kicad_sym_prop,
+        ["attach", "--input", str(lib), "--property-name", "X", "--report-format", "json", "--report", str(report)],
+    )
+    assert result.exit_code == 0, result.output
+    (record,) = json.loads(report.read_text("utf-8"))
+    assert record["ok"] and record["stats"]["units"] >= record["stats"]["symbols_processed"]
+
+
+def test_cli_check_exit_codes(tmp_path: pl.Path):
+    files = _make_repo(tmp_path)
+    before = [f.read_bytes() for f in files]
+    runner = CliRunner(mix_stderr=False)
+    result = runner.invoke(kicad_sym_prop, ["check", "--input", str(tmp_path), "--property-name", "MPN"])
+    assert result.exit_code == 1
+    missing = len(parser.SymbolIndex.from_path(files[0]))
+    assert len(result.stdout.splitlines()) == 2 * missing
+    assert f"incomplete={2 * missing} errors=0" in result.stderr
+
+    fast = runner.invoke(kicad_sym_prop, ["check", "--input", str(tmp_path), "--property-name", "X", "--fail-fast"])
+    assert fast.exit_code == 1
+    assert len(fast.stdout.splitlines()) == 1
+    assert [f.read_bytes() for f in files] == before
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.kicad_sym", "notes.txt", "sub"]
+
+    runner.invoke(
+        kicad_sym_prop, ["attach", "--input", str(tmp_path), "--property-name", "X", "--report", str(tmp_path / "r.md")]
+    )
+    ok = runner.invoke(kicad_sym_prop, ["check", "--input", str(tmp_path), "--property-name", "X"])
+    assert ok.exit_code == 0, ok.stderr
+    assert ok.stdout == ""
+
+    files[1].write_text('(kicad_symbol_lib (symbol "x', encoding="utf-8")
+    broken = runner.invoke(kicad_sym_prop, ["check", "--input", str(tmp_path), "--property-name", "X"])
+    assert broken.exit_code == 2
+    assert "Error:" in broken.stderr
+
+    # A path or glob matching nothing must fail the gate, not pass it.
+    nothing = runner.invoke(
+        kicad_sym_prop, ["check", "--input", str(tmp_path / "missing_dir" / "*.kicad_sym"), "--property-name", "X"]
+    )
+    assert nothing.exit_code == 2
+    assert "No .kicad_sym files matched" in nothing.stderr
+
+
+def test_cli_emit_edits_then_apply(tmp_path: pl.Path):
+    files = _make_repo(tmp_path)
+    before = [f.read_bytes() for f in files]
+    runner = CliRunner(mix_stderr=False)
+    doc = tmp_path / "edits.json"
+    args = ["attach", "--input", str(tmp_path), "--property-name", "MPN"]
+    result = runner.invoke(kicad_sym_prop, [*args, "--emit-edits", str(doc)])
+    assert result.exit_code == 0, result.stderr
+    assert "changed=2" in result.stderr
+    diff = runner.invoke(kicad_sym_prop, [*args, "--emit-edits", "-", "--edits-format", "diff"])
+    assert diff.stdout.count("+++ b/") == 2
+    assert [f.read_bytes() for f in files] == before
+
+    applied = runner.invoke(kicad_sym_prop, ["apply", "--edits", str(doc)])
+    assert applied.exit_code == 0, applied.stderr
+    assert applied.stdout.count("applied") == 2
+    assert not any(True for _ in parser.SymbolIndex.from_path(files[1]).missing(["MPN"]))
+
+    stale = runner.invoke(kicad_sym_prop, ["apply", "--edits", str(doc)])
+    assert stale.exit_code == 2
+    assert "differs from the edit list base" in stale.stderr
+    bad = runner.invoke(kicad_sym_prop, ["apply", "--edits", str(doc), "--input", str(files[0])])
+    assert bad.exit_code != 0
+
+
+def test_cli_diff_of_absolute_input_applies_with_git(tmp_path: pl.Path, monkeypatch):
+    import shutil
+    import subprocess
+
+    import pytest
+
+    if shutil.which("git") is None:
+        pytest.skip("git not installed")
+    lib = tmp_path / "libs" / "lib.kicad_sym"
+    lib.parent.mkdir()
+    lib.write_bytes((FIXTURES / "official-mixed-some-prop-SzlcscCode.kicad_sym").read_bytes())
+    monkeypatch.chdir(tmp_path)
+    args = ["attach", "--input", str(lib.resolve()), "--property-name", "MPN"]
+    diff = CliRunner(mix_stderr=False).invoke(kicad_sym_prop, [*args, "--emit-edits", "-", "--edits-format", "diff"])
+    assert diff.exit_code == 0, diff.stderr
+    assert diff.stdout.startswith("--- a/libs/lib.kicad_sym\n+++ b/libs/lib.kicad_sym\n")
+    (tmp_path / "edits.diff").write_text(diff.stdout, encoding="utf-8")
+    for check in (["--check"], []):
+        subprocess.run(["git", "apply", *check, "edits.diff"], cwd=tmp_path, check=True, capture_output=True)
+    assert not any(True for _ in parser.SymbolIndex.from_path(lib).missing(["MPN"]))
+
+
+def test_cli_attach_project_updates_schematics_and_libraries(tmp_path: pl.Path):
+    sch = FIXTURES / "schematic-lib_symbols.kicad_sch"
+    (tmp_path / "demo.kicad_pro").write_text('{"meta": {"filename": "demo.kicad_pro"}}', encoding="utf-8")
+    files = [tmp_path / "demo.kicad_sch", tmp_path / "sheets" / "power.kicad_sch"]
+    for f in files:
+        f.parent.mkdir(parents=True, exist_ok=True)
+        f.write_bytes(sch.read_bytes())
+    lib = tmp_path / "lib" / "parts.kicad_sym"
+    lib.parent.mkdir()
+    lib.write_bytes((FIXTURES / "official-mixed-some-prop-SzlcscCode.kicad_sym").read_bytes())
+    libs = len(parser.SymbolIndex.from_path(lib))
+
+    runner = CliRunner(mix_stderr=False)
+    result = runner.invoke(
+        kicad_sym_prop, ["attach", "--input", str(tmp_path / "demo.kicad_pro"), "--property-name", "MPN"]
+    )
+    assert result.exit_code == 0, result.stderr
+    assert f"Files=3 failed=0 Processed={libs + 4} added={libs + 4}" in result.stdout
+    before = sch.read_text("utf-8")
+    for f in files:
+        after = f.read_text("utf-8")
+        assert parser.SymbolIndex.from_text(after).has_property("Device:R", "MPN")
+        # Everything after the embedded symbols (placed instances included) is untouched.
+        assert after[parser.lib_symbols_range(after)[1] :] == before[parser.lib_symbols_range(before)[1] :]
+    assert any(tmp_path.glob("kicad-sym-prop.*.report.md"))
+
+    check = runner.invoke(kicad_sym_prop, ["check", "--input", str(tmp_path), "--property-name", "MPN"])
+    assert check.exit_code == 0, check.stderr
+    assert f"Files=3 symbols={libs + 4}" in check.stderr
+
+
+def test_cli_scan_inventory_and_coverage(tmp_path: pl.Path):
+    import json
+
+    files = _make_repo(tmp_path)
+    before = [f.read_bytes() for f in files]
+    index = parser.SymbolIndex.from_path(files[0])
+    having = sum(1 for s in index if "SzlcscCode" in s.properties)
+    runner = CliRunner(mix_stderr=False)
+    table, coverage = tmp_path / "inventory.ndjson", tmp_path / "coverage.ndjson"
+    result = runner.invoke(
+        kicad_sym_prop,
+        [
+            "scan",
+            "--input",
+            str(tmp_path),
+            "--property-name",
+            "SzlcscCode",
+            "--property-name",
+            "MPN",
+            "--output",
+            str(table),
+            "--format",
+            "ndjson",
+            "--coverage",
+            str(coverage),
+        ],
+    )
+    assert result.exit_code == 0, result.stderr
+    assert f"Files=2 symbols={2 * len(index)} rows={2 * having} errors=0" in result.stderr
+    rows = [json.loads(line) for line in table.read_text("utf-8").splitlines()]
+    assert len(rows) == 2 * having and {row["property"] for row in rows} == {"SzlcscCode"}
+    assert rows[0].keys() == {"library", "symbol", "property", "value_len", "value_hash"}
+    assert [json.loads(line)["property"] for line in coverage.read_text("utf-8").splitlines()] == ["SzlcscCode", "MPN"]
+    assert [f.read_bytes() for f in files] == before
+
+    printed = runner.invoke(kicad_sym_prop, ["scan", "--input", str(tmp_path)])
+    assert printed.exit_code == 0, printed.stderr
+    assert printed.stdout.splitlines()[0] == "library,symbol,property,value_len,value_hash"
+    assert f"SzlcscCode: {2 * having}/{2 * len(index)} symbols" in printed.stderr
+
+    clash = runner.invoke(kicad_sym_prop, ["scan", "--input", str(tmp_path), "--coverage", "-"])
+    assert clash.exit_code == 2 and "stdout" in clash.stderr
+
+    nothing = runner.invoke(kicad_sym_prop, ["scan", "--input", str(tmp_path / "missing_dir" / "*.kicad_sym")])
+    assert nothing.exit_code == 2 and "No .kicad_sym files matched" in nothing.stderr
@@ -0,0 +1,53 @@
+import re
+import statistics
+import subprocess
+import sys
+
+# Modules the entry point must not load until a command actually needs them.
+HEAVY_MODULES = (
+    "sexpdata",
+    "sqlite3",
+    "concurrent.futures",
+    "tracemalloc",
+    "src.lib.attacher",
+    "src.lib.parser",
+    "src.lib.report",
+    "src.lib.batch",
+    "src.lib.cache",
+)
+# Cumulative `-X importtime` of `src.cli.main` (click included), median of several runs. The
+# lazy entry point takes well under 100 ms; the bound leaves room for slow CI runners while
+# still failing when a heavy import slips back in. `benchmarks/run.py` tracks the exact time.
+IMPORT_BUDGET_US = 300_000
+IMPORT_RUNS = 5
+
+
+def _run(*args: str) -> subprocess.CompletedProcess[str]:
+    return subprocess.run([sys.executable, *args], capture_output=True, text=True, check=True)
+
+
+def test_entry_point_import_is_lazy():
+    probe = f"import sys, src.cli.main; print([m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    assert _run("-c", probe).stdout.strip() == "[]"
+
+
+def test_help_does_not_load_library_modules():
+    probe = (
+        "import sys\n"
+        "from click.testing import CliRunner\n"
+        "from src.cli.main import kicad_sym_prop\n"
+        "assert CliRunner().invoke(kicad_sym_prop, ['attach', '--help']).exit_code == 0\n"
+        f"print([m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    )
+    assert _run("-c", probe).stdout.strip() == "[]"
+
+
+def test_entry_point_import_time_budget():
+    times = []
+    for _ in range(IMPORT_RUNS):
+        err = _run("-X", "importtime", "-c", "import src.cli.main").stderr
+        m = re.search(r"^import time:\s+\d+ \|\s+(\d+) \| src\.cli\.main$", err, re.MULTILINE)
+        assert m is not None, err
+        times.append(int(m.group(1)))
+    median = statistics.median(times)
+    assert median <= IMPORT_BUDGET_US, f"src.cli.main import took {median:.0f} us (median of {times})"
@@ -1,6 +1,10 @@
+import builtins
 import pathlib as pl
 
-from src.lib.attacher import attach_property_to_file
+import pytest
+
+from src.lib.attacher import attach_properties, attach_property_to_file
+from src.lib.rules import Rule, RuleSet
 
 FIXTURES = pl.Path("tests/fixtures/kicad_v9")
 
@@ -34,3 +38,86 @@ def test_attach_dry_run_mixed_skips(tmp_path: pl.Path):
     )
     # Should have some skipped due to existing property
     assert stats.properties_skipped >= 1
+
+
+def test_attach_single_pass_ignores_parens_in_strings(tmp_path: pl.Path):
+    src = tmp_path / "lib.kicad_sym"
+    src.write_text(
+        "(kicad_symbol_lib\n"
+        '\t(symbol "A"\n'
+        '\t\t(property "Value" "a)b("\n'
+        "\t\t)\n"
+        "\t)\n"
+        '\t(symbol "B"\n'
+        "\t)\n"
+        ")\n",
+        encoding="utf-8",
+    )
+    out_path = tmp_path / "out.kicad_sym"
+    stats = attach_property_to_file(src, ["X", "Y", "Value"], "1", output_path=out_path)
+    assert (stats.properties_added, stats.properties_skipped) == (5, 1)
+    out = out_path.read_text("utf-8")
+    assert out.count("(") == out.count(")")
+    a_block = out[out.index('(symbol "A"') : out.index('(symbol "B"')]
+    assert a_block.index('(property "X" "1"') < a_block.index('(property "Y" "1"')
+    assert '(property "Value" "1"' in out[out.index('(symbol "B"') :]
+
+
+def test_attach_mmap_matches_text_mode_and_keeps_crlf(tmp_path: pl.Path):
+    src = FIXTURES / "official-mixed-some-prop-SzlcscCode.kicad_sym"
+    lf_in = tmp_path / "lf.kicad_sym"
+    lf_in.write_bytes(src.read_bytes())
+    crlf_in = tmp_path / "crlf.kicad_sym"
+    crlf_in.write_bytes(src.read_bytes().replace(b"\n", b"\r\n"))
+
+    text_out = tmp_path / "text.kicad_sym"
+    attach_property_to_file(lf_in, ["SzlcscCode", "Extra"], "v", output_path=text_out)
+    mmap_out = tmp_path / "mmap.kicad_sym"
+    stats = attach_property_to_file(crlf_in, ["SzlcscCode", "Extra"], "v", output_path=mmap_out, use_mmap=True)
+
+    assert stats.properties_added > 0
+    assert mmap_out.read_bytes() == text_out.read_bytes().replace(b"\n", b"\r\n")
+
+
+@pytest.mark.parametrize("crlf", [False, True])
+def test_attach_properties_in_memory_matches_file_paths(tmp_path: pl.Path, monkeypatch: pytest.MonkeyPatch, crlf: bool):
+    data = (FIXTURES / "official-mixed-some-prop-SzlcscCode.kicad_sym").read_bytes().replace(b"\r\n", b"\n")
+    if crlf:
+        data = data.replace(b"\n", b"\r\n")
+    values = {"R": {"Vendor": 'say "hi"'}}
+    expected = {}
+    for name, mmap_mode in (("text", False), ("mmap", True)):
+        path = tmp_path / f"{name}.kicad_sym"
+        path.write_bytes(data)
+        attach_property_to_file(path, ["MPN", "SzlcscCode"], "v", use_mmap=mmap_mode, values=values)
+        expected[name] = path.read_bytes()
+    ruleset = RuleSet([Rule("rename", "Datasheet", to="Doc"), Rule("add", "MPN", "v")])
+    ruled = tmp_path / "rules.kicad_sym"
+    ruled.write_bytes(data)
+    attach_property_to_file(ruled, [], "", rules=ruleset)
+    expected["rules"] = ruled.read_bytes()
+    # The text path reads with universal newlines.
+    text = data.decode().replace("\r\n", "\n")
+
+    def no_io(*args, **kwargs):
+        raise AssertionError("attach_properties touched the filesystem")
+
+    monkeypatch.setattr(builtins, "open", no_io)
+    monkeypatch.setattr(pl.Path, "open", no_io)
+    out_text, stats = attach_properties(text, ["MPN", "SzlcscCode"], "v", values=values)
+    out_bytes, byte_stats = attach_properties(data, ["MPN", "SzlcscCode"], "v", values=values)
+    assert out_text.encode() == expected["text"]
+    assert out_bytes == expected["mmap"]
+    assert stats == byte_stats and stats.properties_added > 0
+    assert stats.index is not None and len(stats.index) == stats.symbols_processed
+
+    out_rules, rule_stats = attach_properties(data, rules=ruleset)
+    assert out_rules == expected["rules"]
+    assert attach_properties(data.decode(), rules=ruleset)[0].encode() == expected["rules"]
+    assert rule_stats.properties_renamed > 0
+
+
+def test_attach_properties_returns_input_unchanged_when_complete():
+    text = '(kicad_symbol_lib (symbol "A" (property "P" "1")))'
+    out, stats = attach_properties(text, ["P"])
+    assert out == text and stats.properties_skipped == 1
@@ -0,0 +1,85 @@
+import pathlib as pl
+
+from src.lib.attacher import attach_property_to_file
+from src.lib.backups import STORE_DIR, BackupStore
+
+LIB = '(kicad_symbol_lib\n\t(symbol "A"\n\t)\n)\n'
+
+
+def test_backup_store_dedupes_copies_and_prunes(tmp_path: pl.Path):
+    lib = tmp_path / "lib.kicad_sym"
+    lib.write_text("v1", encoding="utf-8")
+    store = BackupStore.beside(lib, keep=2)
+    first = store.backup(lib)
+    assert store.backup(lib) == first  # unchanged content: no new entry
+    assert [e["n"] for e in store.entries(lib.name)] == [1]
+    assert first.read_text("utf-8") == "v1"
+    assert first.stat().st_ino != lib.stat().st_ino  # copied unless linking is asked for
+    linked = BackupStore(tmp_path / "linked", link=True).backup(lib)
+    assert linked.stat().st_ino == lib.stat().st_ino
+
+    for text in ("v2", "v3"):
+        lib.unlink()
+        lib.write_text(text, encoding="utf-8")
+        store.backup(lib)
+    entries = store.entries(lib.name)
+    assert [e["n"] for e in entries] == [2, 3]
+    assert not first.exists()  # v1 pruned and no longer referenced
+    assert sorted(p.name for p in (tmp_path / STORE_DIR / "objects").iterdir()) == sorted(e["sha256"] for e in entries)
+
+
+def test_backup_store_reflinks_where_supported(tmp_path: pl.Path, monkeypatch):
+    import os
+
+    from src.lib import backups
+
+    lib = tmp_path / "lib.kicad_sym"
+    lib.write_text("v1", encoding="utf-8")
+    cloned: list[int] = []
+
+    def fake_reflink(src_fd: int, dst_fd: int) -> None:
+        cloned.append(dst_fd)
+        os.write(dst_fd, os.read(src_fd, 1 << 16))
+
+    monkeypatch.setattr(backups, "_reflink", fake_reflink)
+    obj = BackupStore.beside(lib).backup(lib)
+    assert len(cloned) == 1 and obj.read_text("utf-8") == "v1"
+
+    def unsupported(src_fd: int, dst_fd: int) -> None:
+        raise OSError("EOPNOTSUPP")
+
+    monkeypatch.setattr(backups, "_reflink", unsupported)
+    lib.write_text("v2", encoding="utf-8")
+    assert BackupStore.beside(lib).backup(lib).read_text("utf-8") == "v2"  # falls back to a copy
+
+
+def test_backup_store_concurrent_writers_keep_every_referenced_object(tmp_path: pl.Path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    libs = [tmp_path / f"lib{i}.kicad_sym" for i in range(4)]
+
+    def churn(lib: pl.Path) -> None:
+        store = BackupStore.beside(lib, keep=1)
+        for n in range(30):
+            lib.write_text(f"v{n % 3}", encoding="utf-8")  # contents shared across libraries
+            store.backup(lib)
+
+    with ThreadPoolExecutor(len(libs)) as pool:
+        list(pool.map(churn, libs))
+    store = BackupStore.beside(libs[0])
+    for lib in libs:
+        (entry,) = store.entries(lib.name)
+        assert entry["n"] == 30
+        assert store.object_path(entry["sha256"]).read_text("utf-8") == lib.read_text("utf-8")
+
+
+def test_attach_with_backup_store_keeps_original_content(tmp_path: pl.Path):
+    lib = tmp_path / "lib.kicad_sym"
+    lib.write_text(LIB, encoding="utf-8")
+    store = BackupStore.beside(lib)
+    for use_mmap in (False, True):
+        attach_property_to_file(lib, ["P" + str(use_mmap)], "", backup_store=store, use_mmap=use_mmap)
+    (first, second) = store.entries(lib.name)
+    assert store.object_path(first["sha256"]).read_text("utf-8") == LIB
+    assert '"PFalse"' in store.object_path(second["sha256"]).read_text("utf-8")
+    assert not list(tmp_path.glob("*.orig*"))
@@ -0,0 +1,20 @@
+from benchmarks.generate import generate_library
+from benchmarks.run import compare
+from src.lib import parser
+
+
+def test_generated_library_is_valid_and_indexable():
+    text = generate_library(5, units=3, existing=("SzlcscCode",), existing_ratio=1.0, newline="\r\n")
+    assert "\r\n" in text and text.replace("\r\n", "").count("\n") == 0
+    parser.validate_s_expr(text)
+    index = parser.index_symbols(text)
+    assert len(index) == 5
+    assert all(len(span.units) == 3 for span in index)
+    assert not list(index.missing(["SzlcscCode", "Description"]))
+
+
+def test_compare_flags_regressions_over_threshold():
+    baseline = {"results": {"index": {"best_s": 1.0}, "write": {"best_s": 1.0}}}
+    current = {"results": {"index": {"best_s": 1.5}, "write": {"best_s": 1.1}}}
+    regressions = compare(current, baseline, threshold=1.25)
+    assert len(regressions) == 1 and regressions[0].startswith("index:")
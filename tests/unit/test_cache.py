@@ -0,0 +1,63 @@
+import pathlib as pl
+
+from src.lib.attacher import attach_property_to_file
+from src.lib.cache import Inventory, InventoryCache
+
+FIXTURES = pl.Path("tests/fixtures/kicad_v9")
+
+
+def test_second_run_skips_complete_file_without_backup(tmp_path: pl.Path):
+    lib = tmp_path / "lib.kicad_sym"
+    lib.write_bytes((FIXTURES / "official-basic-no-prop-SzlcscCode.kicad_sym").read_bytes())
+    with InventoryCache(tmp_path / "cache") as cache:
+        first = attach_property_to_file(lib, ["SzlcscCode"], "", cache=cache)
+        assert not first.cached and first.properties_added > 0
+        backups = sorted(p.name for p in tmp_path.glob("lib.kicad_sym.orig*"))
+        content = lib.read_bytes()
+
+        second = attach_property_to_file(lib, ["SzlcscCode"], "", cache=cache)
+        assert second.cached
+        assert second.properties_added == 0
+        assert second.symbols_processed == first.symbols_processed
+        assert sorted(p.name for p in tmp_path.glob("lib.kicad_sym.orig*")) == backups
+        assert lib.read_bytes() == content
+
+        # A property the cached inventory lacks forces a real run.
+        third = attach_property_to_file(lib, ["SzlcscCode", "Other"], "", dry_run=True, cache=cache)
+        assert not third.cached and third.properties_added == first.symbols_processed
+
+
+def test_cache_evicts_least_recently_used(tmp_path: pl.Path):
+    inv = Inventory([(f"S{i}", frozenset({f"P{i}"})) for i in range(200)])
+    size = len(inv.to_bytes())
+    with InventoryCache(tmp_path, max_bytes=2 * size) as cache:
+        cache.store("a", inv)
+        cache.store("b", inv)
+        assert cache.lookup("a") is not None  # refresh "a"
+        cache.store("c", inv)
+        assert cache.lookup("b") is None
+        found = cache.lookup("a")
+        assert found is not None and found.is_complete([]) and not found.is_complete(["P0"])
+        assert cache.lookup("c") is not None
+
+
+def test_run_batch_opens_the_cache_once_per_process(tmp_path: pl.Path, monkeypatch):
+    from src.lib import batch
+
+    opened: list[pl.Path] = []
+    init = InventoryCache.__init__
+
+    def counting_init(self: InventoryCache, cache_dir: pl.Path, max_bytes: int = 1 << 20) -> None:
+        opened.append(cache_dir)
+        init(self, cache_dir, max_bytes)
+
+    monkeypatch.setattr(InventoryCache, "__init__", counting_init)
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"lib{i}.kicad_sym"
+        path.write_text('(kicad_symbol_lib\n\t(symbol "A"\n\t)\n)\n', encoding="utf-8")
+        paths.append(path)
+    result = batch.run_batch(paths, ["P"], "", jobs=1, cache_dir=tmp_path / "cache")
+    assert not result.errors and result.stats.properties_added == 3
+    assert opened == [tmp_path / "cache"]
+    assert not batch._CACHES
@@ -0,0 +1,38 @@
+import pathlib as pl
+
+from src.lib import parser
+from src.lib.check import check_paths, iter_missing
+
+FIXTURES = pl.Path("tests/fixtures/kicad_v9")
+
+
+def test_iter_missing_matches_index():
+    path = FIXTURES / "official-mixed-some-prop-SzlcscCode.kicad_sym"
+    index = parser.SymbolIndex.from_path(path)
+    expected = [(span.name, absent) for span, absent in index.missing(["SzlcscCode", "MPN"])]
+    assert len(expected) == len(index)
+    assert list(iter_missing(path, ["SzlcscCode", "MPN"])) == expected
+
+
+def test_iter_missing_requires_mapped_properties(tmp_path: pl.Path):
+    path = tmp_path / "lib.kicad_sym"
+    path.write_text('(kicad_symbol_lib\n  (symbol "A" (property "P" "1"))\n  (symbol "B" (property "P" "2"))\n)\n')
+    assert list(iter_missing(path, ["P"])) == []
+    assert list(iter_missing(path, ["P"], values={"B": {"MPN": "x"}, "Z": {"MPN": "y"}})) == [("B", ["MPN"])]
+
+
+def test_check_paths_fail_fast_stops_at_first_hit(tmp_path: pl.Path):
+    good = tmp_path / "good.kicad_sym"
+    good.write_text('(kicad_symbol_lib\n  (symbol "A" (property "P" "1"))\n)\n')
+    bad = tmp_path / "bad.kicad_sym"
+    bad.write_text('(kicad_symbol_lib\n  (symbol "B")\n  (symbol "C")\n  (symbol "D" (property "P"\n')
+    seen = []
+    summary = check_paths([good, bad], ["P"], on_missing=lambda p, n, a: seen.append((p.name, n, a)))
+    assert seen == [("bad.kicad_sym", "B", ["P"]), ("bad.kicad_sym", "C", ["P"])]
+    assert (summary.files, summary.incomplete, summary.errors, summary.ok) == (2, 2, 1, False)
+
+    errors = []
+    summary = check_paths([bad, good], ["P"], fail_fast=True, on_error=lambda p, m: errors.append(m))
+    assert (summary.files, summary.symbols, summary.incomplete, summary.errors) == (1, 1, 1, 0)
+    assert errors == []
+    assert check_paths([good], ["P"]).ok
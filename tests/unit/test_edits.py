@@ -0,0 +1,119 @@
+import io
+import pathlib as pl
+import re
+
+import pytest
+
+from src.lib import edits
+from src.lib.attacher import attach_property_to_file
+
+FIXTURES = pl.Path("tests/fixtures/kicad_v9")
+
+
+def _library(tmp_path: pl.Path, crlf: bool) -> pl.Path:
+    data = (FIXTURES / "official-mixed-some-prop-SzlcscCode.kicad_sym").read_bytes().replace(b"\r\n", b"\n")
+    path = tmp_path / "lib.kicad_sym"
+    path.write_bytes(data.replace(b"\n", b"\r\n") if crlf else data)
+    return path
+
+
+def _apply_diff(original: list[str], diff: str) -> list[str]:
+    """Minimal unified-diff applier that checks every context and removed line."""
+    out, pos = [], 0
+    lines = diff.splitlines(keepends=True)
+    assert lines[0].startswith("--- a/") and lines[1].startswith("+++ b/")
+    i = 2
+    while i < len(lines):
+        m = re.match(r"@@ -(\d+),(\d+) \+(\d+),(\d+) @@\n", lines[i])
+        assert m is not None, lines[i]
+        start, old_count, new_count = int(m.group(1)) - 1, int(m.group(2)), int(m.group(4))
+        out.extend(original[pos:start])
+        assert int(m.group(3)) == len(out) + 1
+        pos = start
+        i += 1
+        seen_old = seen_new = 0
+        while i < len(lines) and not lines[i].startswith("@@"):
+            tag, text = lines[i][0], lines[i][1:]
+            if i + 1 < len(lines) and lines[i + 1].startswith("\\ No newline"):
+                text = text[:-1]
+                i += 1
+            if tag in " -":
+                assert original[pos] == text
+                pos += 1
+                seen_old += 1
+            if tag in " +":
+                out.append(text)
+                seen_new += 1
+            i += 1
+        assert (seen_old, seen_new) == (old_count, new_count)
+    return out + original[pos:]
+
+
+@pytest.mark.parametrize("crlf", [False, True])
+def test_edit_list_round_trips_to_mmap_output(tmp_path: pl.Path, crlf: bool):
+    path = _library(tmp_path, crlf)
+    base = path.read_bytes()
+    file_edits, stats = edits.plan_file_edits(path, ["MPN", "SzlcscCode"], 'a"b', values={"R": {"Vendor": "x"}})
+    assert len(file_edits.edits) == len(list(stats.iter_added())) > 0
+    assert path.read_bytes() == base
+
+    buf = io.StringIO()
+    edits.dump_json([file_edits], buf)
+    doc = tmp_path / "edits.json"
+    doc.write_text(buf.getvalue(), encoding="utf-8")
+    diff = "".join(edits.unified_diff(file_edits))
+
+    expected = tmp_path / "expected.kicad_sym"
+    attach_property_to_file(
+        path, ["MPN", "SzlcscCode"], 'a"b', output_path=expected, use_mmap=True, values={"R": {"Vendor": "x"}}
+    )
+    [loaded] = edits.load_json(doc)
+    assert edits.apply_file_edits(loaded) == len(file_edits.edits)
+    assert path.read_bytes() == expected.read_bytes()
+
+    original = base.decode().splitlines(keepends=True)
+    assert "".join(_apply_diff(original, diff)).encode() == expected.read_bytes()
+
+    # The file changed since the edits were computed: refuse, leave it untouched.
+    with pytest.raises(ValueError, match="differs from the edit list base"):
+        edits.apply_file_edits(loaded)
+    assert path.read_bytes() == expected.read_bytes()
+
+
+def test_diff_hunks_merge_nearby_edits_and_mark_missing_newline(tmp_path: pl.Path):
+    path = tmp_path / "lib.kicad_sym"
+    path.write_bytes(b'(kicad_symbol_lib\n  (symbol "A"\n  )\n  (symbol "B"\n  ))')
+    original = path.read_text().splitlines(keepends=True)
+    file_edits, _ = edits.plan_file_edits(path, ["P"], "1")
+    diff = "".join(edits.unified_diff(file_edits, context=1))
+    assert diff.count("@@ ") == 1
+    assert diff.endswith("\n\\ No newline at end of file\n")
+
+    edits.apply_file_edits(file_edits)
+    assert "".join(_apply_diff(original, diff)) == path.read_text()
+    assert list(edits.unified_diff(edits.FileEdits("x", file_edits.base_sha256, 0))) == []
+
+
+def test_diff_of_replacing_and_removing_edits(tmp_path: pl.Path):
+    from src.lib.rules import Rule, RuleSet
+
+    path = _library(tmp_path, crlf=False)
+    original = path.read_text().splitlines(keepends=True)
+    ruleset = RuleSet([Rule("delete", "Datasheet"), Rule("rename", "Reference", to="Ref"), Rule("set", "Value", "v")])
+    file_edits, stats = edits.plan_file_edits(path, [], "", rules=ruleset)
+    assert all(e.length for e in file_edits.edits) and stats.properties_deleted > 1
+    diff = "".join(edits.unified_diff(file_edits, context=1))
+    assert diff.count("@@ ") > 1
+
+    edits.apply_file_edits(file_edits)
+    assert "".join(_apply_diff(original, diff)) == path.read_text()
+
+
+def test_load_json_rejects_other_documents(tmp_path: pl.Path):
+    doc = tmp_path / "x.json"
+    doc.write_text('{"version": 99, "files": []}', encoding="utf-8")
+    with pytest.raises(ValueError, match="not a version 1 edit list"):
+        edits.load_json(doc)
+    doc.write_text('{"version": 1, "files": [{"path": "x"}]}', encoding="utf-8")
+    with pytest.raises(ValueError, match="Malformed"):
+        edits.load_json(doc)
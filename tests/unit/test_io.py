@@ -11,3 +11,96 @@ def test_make_backup_and_write(tmp_path: pl.Path):
     # original path now moved (does not exist), we can write new content
     io.write_text(f, "new", encoding="utf-8")
     assert f.read_text("utf-8") == "new"
+
+
+def test_atomic_writer_replaces_on_success_only(tmp_path: pl.Path):
+    import pytest
+
+    f = tmp_path / "lib.kicad_sym"
+    f.write_bytes(b"old")
+    with pytest.raises(RuntimeError), io.atomic_writer(f) as out:
+        out.write(b"partial")
+        raise RuntimeError("boom")
+    assert f.read_bytes() == b"old"
+    with io.atomic_writer(f) as out:
+        out.write(b"new")
+    assert f.read_bytes() == b"new"
+    assert [p.name for p in tmp_path.iterdir()] == ["lib.kicad_sym"]
+
+
+def test_atomic_writer_writes_through_symlinks(tmp_path: pl.Path):
+    import pytest
+
+    from src.lib.attacher import attach_property_to_file
+
+    real = tmp_path / "shared" / "lib.kicad_sym"
+    real.parent.mkdir()
+    real.write_text('(kicad_symbol_lib\n\t(symbol "A"\n\t)\n)\n', encoding="utf-8")
+    link = tmp_path / "lib.kicad_sym"
+    try:
+        link.symlink_to(real)
+    except OSError:
+        pytest.skip("symlinks not available")
+    io.write_text(link, "(kicad_symbol_lib\n)\n")
+    assert link.is_symlink() and real.read_text("utf-8") == "(kicad_symbol_lib\n)\n"
+    assert [p.name for p in real.parent.iterdir()] == ["lib.kicad_sym"]
+
+    real.write_text('(kicad_symbol_lib\n\t(symbol "A"\n\t)\n)\n', encoding="utf-8")
+    for use_mmap in (False, True):
+        attach_property_to_file(link, [f"P{use_mmap}"], "", use_mmap=use_mmap)
+    assert link.is_symlink() and '"PTrue"' in real.read_text("utf-8") and '"PFalse"' in real.read_text("utf-8")
+
+
+def test_write_text_chunks_streams_and_keeps_mode(tmp_path: pl.Path):
+    import os
+    import stat
+
+    f = tmp_path / "lib.kicad_sym"
+    f.write_text("old", encoding="utf-8")
+    os.chmod(f, 0o640)
+    io.write_text_chunks(f, iter(["(kicad_symbol_lib", "\n", ")"]), encoding="utf-8")
+    assert f.read_text("utf-8") == "(kicad_symbol_lib\n)"
+    assert stat.S_IMODE(f.stat().st_mode) == 0o640
+
+
+def test_make_numbered_backup_continues_after_highest(tmp_path: pl.Path):
+    f = tmp_path / "lib.kicad_sym"
+    f.write_text("v1", encoding="utf-8")
+    assert io.make_numbered_backup(f).name == "lib.kicad_sym.orig"
+    assert io.make_numbered_backup(f).name == "lib.kicad_sym.orig.1"
+    (tmp_path / "lib.kicad_sym.orig.7").write_text("old", encoding="utf-8")
+    (tmp_path / "lib.kicad_sym.orig.x").write_text("other", encoding="utf-8")
+    (tmp_path / "lib.kicad_sym.orig.²").write_text("other", encoding="utf-8")
+    (tmp_path / "lib.kicad_sym.orig.١٢").write_text("other", encoding="utf-8")
+    assert io.make_numbered_backup(f).name == "lib.kicad_sym.orig.8"
+
+
+def test_write_chunks_batches_and_resumes_short_writes(tmp_path: pl.Path, monkeypatch):
+    import io as _stdio
+    import os
+
+    data = b'(kicad_symbol_lib\n\t(symbol "R")\n)\n'
+    view = memoryview(data)
+    chunks = [view[:5], b"", b"<added>", view[5:20], view[20:]]
+    expected = b"".join(chunks)
+
+    calls: list[int] = []
+    real_writev = os.writev
+
+    def short_writev(fd, buffers):
+        calls.append(len(buffers))
+        # Write at most 3 bytes per call, splitting buffers.
+        return real_writev(fd, [b"".join(buffers)[:3]])
+
+    monkeypatch.setattr(os, "writev", short_writev)
+    monkeypatch.setattr(io, "WRITEV_BATCH", 2)
+    out_path = tmp_path / "out.bin"
+    with out_path.open("wb") as out:
+        out.write(b"head:")  # buffered before the direct writes
+        assert io.write_chunks(out, chunks) == len(expected)
+    assert out_path.read_bytes() == b"head:" + expected
+    assert max(calls) <= 2  # empty chunks skipped, batches capped
+
+    buffer = _stdio.BytesIO()  # no file descriptor: plain writes
+    assert io.write_chunks(buffer, iter(chunks)) == len(expected)
+    assert buffer.getvalue() == expected
@@ -0,0 +1,73 @@
+import json
+import pathlib as pl
+
+import pytest
+
+from src.lib import parser
+from src.lib.attacher import attach_property_to_file
+from src.lib.mapping import load_values
+
+LIB = (
+    "(kicad_symbol_lib\n"
+    '\t(symbol "A"\n'
+    '\t\t(property "Reference" "U"\n'
+    "\t\t)\n"
+    "\t)\n"
+    '\t(symbol "B"\n'
+    '\t\t(property "LCSC" "C1"\n'
+    "\t\t)\n"
+    "\t)\n"
+    ")\n"
+)
+
+
+def test_load_values_wide_long_and_json(tmp_path: pl.Path):
+    wide = tmp_path / "wide.csv"
+    wide.write_text("Symbol,LCSC,Link\nA,C99,\nB,C2,http://x\n", encoding="utf-8")
+    assert load_values(wide) == {"A": {"LCSC": "C99"}, "B": {"LCSC": "C2", "Link": "http://x"}}
+
+    long = tmp_path / "long.csv"
+    long.write_text("symbol,property,value\nA,LCSC,C99\nA,Link,\n", encoding="utf-8")
+    assert load_values(long) == {"A": {"LCSC": "C99", "Link": ""}}
+
+    js = tmp_path / "m.json"
+    js.write_text(json.dumps({"A": {"LCSC": "C99"}}), encoding="utf-8")
+    assert load_values(js) == {"A": {"LCSC": "C99"}}
+
+    js.write_text("[]", encoding="utf-8")
+    with pytest.raises(ValueError, match="JSON object"):
+        load_values(js)
+
+
+def test_load_values_ignores_utf8_bom(tmp_path: pl.Path):
+    # Excel's "CSV UTF-8" export starts with a BOM; the long header must still be recognised.
+    long = tmp_path / "long.csv"
+    long.write_bytes(b"\xef\xbb\xbfsymbol,property,value\nR,LCSC,C1\n")
+    assert load_values(long) == {"R": {"LCSC": "C1"}}
+
+    wide = tmp_path / "wide.csv"
+    wide.write_bytes(b"\xef\xbb\xbfSymbol,LCSC\nR,C1\n")
+    assert load_values(wide) == {"R": {"LCSC": "C1"}}
+
+    js = tmp_path / "m.json"
+    js.write_bytes(b"\xef\xbb\xbf" + json.dumps({"R": {"LCSC": "C1"}}).encode())
+    assert load_values(js) == {"R": {"LCSC": "C1"}}
+
+
+def test_attach_with_values_applies_per_symbol_in_one_pass(tmp_path: pl.Path):
+    src = tmp_path / "lib.kicad_sym"
+    src.write_text(LIB, encoding="utf-8")
+    out = tmp_path / "out.kicad_sym"
+    values = {"A": {"LCSC": 'C"9\\9'}, "B": {"LCSC": "C2", "Link": "L"}, "Z": {"LCSC": "C0"}}
+    stats = attach_property_to_file(src, ["Datasheet"], "~", output_path=out, values=values)
+
+    # A: Datasheet + LCSC; B: Datasheet + Link (LCSC already present, never overwritten).
+    assert (stats.properties_added, stats.properties_skipped) == (4, 1)
+    assert stats.unmatched_mapping_keys == ["Z"]
+    text = out.read_text("utf-8")
+    assert '(property "LCSC" "C\\"9\\\\9"' in text
+    assert '(property "LCSC" "C1"' in text and '"C2"' not in text
+    index = parser.index_symbols(text)
+    assert index.get("A").properties >= {"Datasheet", "LCSC"}
+    assert index.get("B").properties >= {"Datasheet", "LCSC", "Link"}
+    parser.validate_s_expr(text)
@@ -29,3 +29,98 @@ def test_dump_s_expr_returns_string():
     sx = parser.load_s_expr(path)
     out = parser.dump_s_expr(sx)
     assert isinstance(out, str)
+
+
+def test_index_symbols_matches_sexpdata():
+    path = FIXTURES / "official-mixed-some-prop-SzlcscCode.kicad_sym"
+    text = path.read_text("utf-8")
+    spans = list(parser.index_symbols(text))
+    symbols = parser.iter_symbols(parser.load_s_expr(path))
+    assert [s.name for s in spans] == [parser.symbol_name(sx) for sx, _ in symbols]
+    for span, (sym_sx, _) in zip(spans, symbols, strict=True):
+        assert text[span.start : span.end].startswith(f'(symbol "{span.name}"')
+        assert text[span.end - 1] == ")"
+        assert ("SzlcscCode" in span.properties) == parser.has_property(sym_sx, "SzlcscCode")
+
+
+def test_index_symbols_rejects_unbalanced():
+    import pytest
+
+    with pytest.raises(ValueError):
+        parser.index_symbols('(kicad_symbol_lib (symbol "MissingParen" ')
+
+
+def test_scan_errors_release_mapped_buffer(tmp_path: pl.Path):
+    import pytest
+
+    from src.lib import io
+
+    path = tmp_path / "broken.kicad_sym"
+    for text in ('(kicad_symbol_lib (symbol "x', '(kicad_symbol_lib (symbol "x"))) (a)'):
+        path.write_text(text)
+        # The mapping must still close: a BufferError here would mask the ValueError.
+        with pytest.raises(ValueError), io.map_file(path) as buf:
+            parser.SymbolIndex.from_buffer(buf)
+
+
+def test_symbol_index_lookups_and_units():
+    text = (
+        "(kicad_symbol_lib\n"
+        '\t(symbol "R"\n'
+        '\t\t(property "Reference" "R")\n'
+        '\t\t(symbol "R_0_1" (rectangle (start 0 0) (end 1 1)))\n'
+        '\t\t(symbol "R_1_1" (pin passive line))\n'
+        "\t)\n"
+        '\t(symbol "C" (property "Value" "C"))\n'
+        ")\n"
+    )
+    index = parser.index_symbols(text)
+    assert len(index) == 2
+    assert "R" in index and "R_0_1" not in index
+    assert index.has_property("R", "Reference")
+    assert not index.has_property("C", "Reference")
+    r = index.get("R")
+    assert r is not None
+    assert [u.name for u in r.units] == ["R_0_1", "R_1_1"]
+    assert text[r.units[0].start : r.units[0].end].startswith('(symbol "R_0_1"')
+    assert index.unit_count == 2
+    assert [(s.name, m) for s, m in index.missing(["Reference", "Value"])] == [("R", ["Value"]), ("C", ["Reference"])]
+
+
+def test_property_spans_locate_names_and_values():
+    text = (
+        "(kicad_symbol_lib\n"
+        '  (symbol "R" (property "Reference" "R" (at 0 0 0)) (property "Empty")\n'
+        '    (symbol "R_0_1" (property "Inner" "x")))\n'
+        ")\n"
+    )
+    for source in (text, text.encode()):
+        (span,) = parser.iter_symbol_spans(source, property_spans=True)
+        ref, empty = span.property_spans
+        raw = text.encode()
+        assert raw[ref.start : ref.end] == b'(property "Reference" "R" (at 0 0 0))'
+        assert raw[ref.name_start : ref.name_end] == b'"Reference"'
+        assert raw[ref.value_start : ref.value_end] == b'"R"'
+        assert empty.name == "Empty" and empty.value_start == empty.value_end == empty.end - 1
+    assert next(parser.iter_symbol_spans(text)).property_spans == ()
+
+
+def test_schematic_indexes_embedded_lib_symbols_only():
+    import pytest
+
+    sch = FIXTURES / "schematic-lib_symbols.kicad_sch"
+    text = sch.read_text("utf-8")
+    assert parser.root_form(text) == parser.SCHEMATIC_ROOT
+    start, end = parser.lib_symbols_range(text)
+    assert text[start - len("(lib_symbols") : start] == "(lib_symbols" and text[end] == ")"
+
+    # Placed instances and the `(lib_symbols (symbol ...` inside a text item are not symbols.
+    index = parser.SymbolIndex.from_text(text)
+    assert [s.name for s in index] == ["Device:C", "Device:R"]
+    assert [u.name for u in index.get("Device:R").units] == ["R_0_1", "R_1_1"]
+    assert index.has_property("Device:C", "SzlcscCode") and not index.has_property("Device:R", "SzlcscCode")
+    assert [s.start for s in parser.SymbolIndex.from_buffer(sch.read_bytes())] == [s.start for s in index]
+
+    assert list(parser.iter_library_symbols("(kicad_sch (version 1))")) == []
+    with pytest.raises(ValueError, match="not closed"):
+        parser.lib_symbols_range('(kicad_sch (lib_symbols (symbol "A")')
@@ -0,0 +1,47 @@
+import pathlib as pl
+
+from src.lib import parser
+from src.lib.batch import run_batch
+from src.lib.pipeline import run_pipelined
+
+FIXTURES = pl.Path("tests/fixtures/kicad_v9")
+
+
+def _copies(root: pl.Path, n: int) -> list[pl.Path]:
+    src = (FIXTURES / "official-basic-no-prop-SzlcscCode.kicad_sym").read_bytes()
+    paths = []
+    for i in range(n):
+        path = root / f"lib{i}.kicad_sym"
+        path.write_bytes(src if i != 3 else b'(kicad_symbol_lib (symbol "x')
+        paths.append(path)
+    return paths
+
+
+def test_pipelined_matches_serial_batch(tmp_path: pl.Path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    serial = _copies(tmp_path / "a", 6)
+    piped = _copies(tmp_path / "b", 6)
+    expected = run_batch(serial, ["SzlcscCode"], "x")
+    seen = []
+    result = run_pipelined(
+        piped, ["SzlcscCode"], "x", read_concurrency=2, write_concurrency=1, timings=True, on_result=seen.append
+    )
+    assert sorted(r.path for r in seen) == piped
+    assert result.files == []  # streamed to on_result instead
+    assert result.stats.properties_added == expected.stats.properties_added
+    assert [r.path.name for r in seen if r.error] == ["lib3.kicad_sym"]
+    for a, b in zip(serial, piped):
+        assert a.read_bytes() == b.read_bytes()
+        assert b.with_name(b.name + ".orig").exists() or b.name == "lib3.kicad_sym"
+    assert {ph.name for r in seen if r.stats for ph in r.stats.timings.phases} >= {"read", "index", "splice_write"}
+
+
+def test_pipelined_dry_run_keeps_input_order(tmp_path: pl.Path):
+    paths = _copies(tmp_path, 5)
+    before = [p.read_bytes() for p in paths]
+    result = run_pipelined(paths, ["SzlcscCode"], "", dry_run=True)
+    assert [r.path for r in result.files] == paths
+    assert [p.read_bytes() for p in paths] == before
+    assert result.stats.properties_added > 0
+    assert any(True for _ in parser.SymbolIndex.from_path(paths[0]).missing(["SzlcscCode"]))
@@ -25,3 +25,29 @@ def test_write_markdown_report(tmp_path: pl.Path):
     content = report_path.read_text("utf-8")
     assert "Attachment Report" in content
     assert "Warnings" in content or "WARNING" in content
+
+
+def test_report_lists_skipped_per_symbol_and_truncates(tmp_path: pl.Path):
+    from src.lib.attacher import AttachStats
+
+    stats = AttachStats()
+    a, b = stats.property_bit("A"), stats.property_bit("B")
+    for i in range(5):
+        stats.record(f"S{i}", 0, a | b if i == 0 else a)
+    other = AttachStats()
+    other.record("T", 0, other.property_bit("B"))
+    stats.merge(other)
+    assert stats.skipped_symbols == ["S0", "S0", "S1", "S2", "S3", "S4", "T"]
+
+    report_path = tmp_path / "report.md"
+    write_markdown_report(
+        report_path=report_path,
+        input_path="in",
+        output_path="out",
+        stats=stats,
+        errors=[],
+        warnings=[],
+        max_listed=2,
+    )
+    content = report_path.read_text("utf-8")
+    assert "- `S0` (A, B)\n- `S1` (A)\n- … and 4 more" in content
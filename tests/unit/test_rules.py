@@ -0,0 +1,135 @@
+import pathlib as pl
+
+import pytest
+
+from src.lib import edits, parser, rules
+from src.lib.attacher import attach_property_to_file
+from src.lib.rules import Rule, RuleSet
+
+LIBRARY = (
+    "(kicad_symbol_lib\n"
+    "  (version 20231120)\n"
+    '  (symbol "R_Small"\n'
+    '    (property "Reference" "R" (at 0 0 0))\n'
+    '    (property "LCSC" "C1234" (at 0 0 0) (effects (hide yes)))\n'
+    '    (property "Datasheet" "" (at 0 0 0))\n'
+    '    (property "ki_fp_filters" "R_*")\n'
+    '    (symbol "R_Small_0_1" (property "LCSC" "inner"))\n'
+    "  )\n"
+    '  (symbol "C"\n'
+    '    (property "Reference" "C")\n'
+    '    (property "SzlcscCode" "C99")\n'
+    '    (property "LCSC" "C5")\n'
+    "  )\n"
+    ")\n"
+)
+
+RULES = RuleSet(
+    [
+        Rule("rename", "LCSC", to="SzlcscCode"),
+        Rule("set", "Datasheet", "~", symbols="R_*"),
+        Rule("add", "SzlcscCode"),
+        Rule("delete", "ki_fp_filters"),
+        Rule("set", "MPN", 'x"y'),
+    ]
+)
+
+
+def _write(tmp_path: pl.Path, text: str, crlf: bool = False) -> pl.Path:
+    path = tmp_path / "lib.kicad_sym"
+    path.write_bytes(text.replace("\n", "\r\n" if crlf else "\n").encode())
+    return path
+
+
+@pytest.mark.parametrize("crlf", [False, True])
+def test_rules_apply_in_one_pass(tmp_path: pl.Path, crlf: bool):
+    path = _write(tmp_path, LIBRARY, crlf)
+    stats = attach_property_to_file(path, [], "", rules=RULES)
+    data = path.read_bytes()
+    assert (b"\r\n" in data) == crlf
+    text = data.decode().replace("\r\n", "\n")
+    r, c = ([p.name for p in s.property_spans] for s in parser.iter_symbol_spans(text, property_spans=True))
+    assert r == ["Reference", "SzlcscCode", "Datasheet", "MPN"]
+    # The rename is blocked where the target exists; the unit's own property is untouched.
+    assert c == ["Reference", "SzlcscCode", "LCSC", "MPN"]
+    assert '(property "SzlcscCode" "C1234" (at 0 0 0) (effects (hide yes)))\n' in text
+    assert '(property "Datasheet" "~" (at 0 0 0))' in text
+    assert '(property "LCSC" "inner")' in text and "ki_fp_filters" not in text
+    assert '(property "MPN" "x\\"y"' in text
+    assert (stats.properties_renamed, stats.properties_updated, stats.properties_deleted) == (1, 1, 1)
+    assert (stats.properties_added, stats.properties_skipped) == (2, 2)
+    assert dict(stats.iter_added()) == {"R_Small": ["MPN"], "C": ["MPN"]}
+
+    again = attach_property_to_file(path, [], "", rules=RULES)
+    assert path.read_bytes() == data
+    assert again.properties_added == again.properties_updated == again.properties_renamed == 0
+
+
+def test_set_fills_missing_value_and_skips_equal_one(tmp_path: pl.Path):
+    path = _write(tmp_path, '(kicad_symbol_lib\n  (symbol "A" (property "P") (property "Q" "1"))\n)\n')
+    stats = attach_property_to_file(path, [], "", rules=RuleSet([Rule("set", "P", "v"), Rule("set", "Q", "1")]))
+    assert path.read_text() == '(kicad_symbol_lib\n  (symbol "A" (property "P" "v") (property "Q" "1"))\n)\n'
+    assert stats.properties_updated == 1
+
+
+def test_later_rules_see_earlier_ones(tmp_path: pl.Path):
+    path = _write(tmp_path, LIBRARY)
+    ruleset = RuleSet(
+        [
+            Rule("add", "New", "1"),
+            Rule("rename", "New", to="Newer"),
+            Rule("delete", "Reference"),
+            Rule("add", "Reference"),
+        ]
+    )
+    stats, planned = rules.apply_rules_to_file(path, ruleset, dry_run=True)
+    assert path.read_text() == LIBRARY
+    assert stats.properties_deleted == 2 and stats.properties_added == 4
+    assert all("Newer" in e.text and "Reference" in e.text for e in planned if not e.length)
+
+
+def test_rule_edits_round_trip_through_edit_list(tmp_path: pl.Path):
+    path = _write(tmp_path, LIBRARY, crlf=True)
+    expected = tmp_path / "expected.kicad_sym"
+    attach_property_to_file(path, [], "", rules=RULES, output_path=expected, backup_store=None)
+    file_edits, _stats = edits.plan_file_edits(path, [], "", rules=RULES)
+    assert any(e.length for e in file_edits.edits)
+    loaded = edits.FileEdits.from_dict(file_edits.as_dict())
+    assert edits.apply_file_edits(loaded) == len(file_edits.edits)
+    assert path.read_bytes() == expected.read_bytes()
+
+
+def test_load_rules_json_and_yaml(tmp_path: pl.Path):
+    doc = tmp_path / "rules.json"
+    doc.write_text('{"rules": [{"op": "rename", "name": "LCSC", "to": "SzlcscCode"}, {"op": "add", "name": "X"}]}')
+    assert rules.load_rules(doc).rules == (Rule("rename", "LCSC", to="SzlcscCode"), Rule("add", "X"))
+    pytest.importorskip("yaml")
+    yml = tmp_path / "rules.yaml"
+    yml.write_text("- op: set\n  name: Datasheet\n  value: 0\n  symbols: 'R_*'\n")
+    assert rules.load_rules(yml).rules == (Rule("set", "Datasheet", "0", symbols="R_*"),)
+
+
+@pytest.mark.parametrize(
+    ("doc", "message"),
+    [
+        ('{"op": "add"}', "expected a list"),
+        ('[{"op": "move", "name": "A"}]', "Unknown rule op"),
+        ('[{"op": "rename", "name": "A"}]', "needs a target"),
+        ('[{"op": "add", "name": "A", "vaule": "1"}]', "unknown keys: vaule"),
+    ],
+)
+def test_load_rules_rejects_bad_documents(tmp_path: pl.Path, doc: str, message: str):
+    path = tmp_path / "rules.json"
+    path.write_text(doc)
+    with pytest.raises(ValueError, match=message):
+        rules.load_rules(path)
+
+
+def test_scoped_rules_are_memoised_and_picklable():
+    import pickle
+
+    ruleset = RuleSet([Rule("add", "A"), Rule("delete", "B", symbols="R_*")])
+    assert ruleset.for_symbol("R_1") == ruleset.rules
+    assert ruleset.for_symbol("C") == (Rule("add", "A"),)
+    assert ruleset.for_symbol.cache_info().misses == 2
+    assert pickle.loads(pickle.dumps(ruleset)).for_symbol("C") == (Rule("add", "A"),)
@@ -0,0 +1,56 @@
+import io
+import pathlib as pl
+
+from src.lib import parser, scan
+
+FIXTURES = pl.Path("tests/fixtures/kicad_v9")
+
+
+def test_inventory_file_columns_and_coverage(tmp_path: pl.Path):
+    lib = tmp_path / "a.kicad_sym"
+    lib.write_text(
+        '(kicad_symbol_lib\n  (symbol "A"\n    (property "Value" "say \\"hi\\"")\n    (property "MPN" "")\n  )\n'
+        '  (symbol "B"\n    (property "Value" "say \\"hi\\"")\n'
+        '    (symbol "B_0_1"\n      (property "MPN" "x")\n    )\n  )\n)\n',
+        encoding="utf-8",
+    )
+    inventory = scan.inventory_file(lib)
+    assert inventory.symbol_count == 2
+    rows = list(inventory.rows())
+    assert [(r[1], r[2], r[3]) for r in rows] == [("A", "Value", 8), ("A", "MPN", 0), ("B", "Value", 8)]
+    assert rows[0][4] == rows[2][4] != rows[1][4]  # equal values hash alike; unit properties are not direct
+    assert inventory.having == {"Value": 2, "MPN": 1} and inventory.non_empty == {"Value": 2}
+
+    only = scan.inventory_file(lib, frozenset({"MPN"}))
+    assert only.properties == ["MPN"] and only.symbol_count == 2
+
+
+def test_inventory_file_counts_only_string_values(tmp_path: pl.Path):
+    lib = tmp_path / "a.kicad_sym"
+    lib.write_text('(kicad_symbol_lib\n  (symbol "A"\n    (property "Qty" 10)\n  )\n)\n', encoding="utf-8")
+    inventory = scan.inventory_file(lib)
+    assert list(inventory.rows()) == [(str(lib), "A", "Qty", 0, "")]
+    assert inventory.having == {"Qty": 1} and not inventory.non_empty
+
+
+def test_scan_paths_in_workers_matches_serial_and_reports_errors(tmp_path: pl.Path):
+    sch = FIXTURES / "schematic-lib_symbols.kicad_sch"
+    broken = tmp_path / "broken.kicad_sym"
+    broken.write_text('(kicad_symbol_lib (symbol "x', encoding="utf-8")
+    paths = [sch, broken, sch]
+
+    def run(jobs: int) -> tuple[str, scan.ScanSummary]:
+        out = io.StringIO()
+        table = scan.TableWriter(out, "csv", scan.ROW_FIELDS)
+        summary = scan.scan_paths(paths, jobs=jobs, on_file=lambda inv: table.write_rows(inv.rows()))
+        return out.getvalue(), summary
+
+    serial, summary = run(1)
+    assert run(2)[0] == serial
+    assert (summary.files, summary.symbols, summary.errors) == (3, 4, 1)
+    index = parser.SymbolIndex.from_path(sch)
+    assert summary.rows == 2 * sum(len(s.properties) for s in index)
+    assert serial.splitlines()[0] == ",".join(scan.ROW_FIELDS)
+
+    (coverage,) = summary.coverage(["SzlcscCode"])
+    assert coverage == {"property": "SzlcscCode", "symbols": 2, "non_empty": 2, "total": 4, "coverage": 0.5}
@@ -0,0 +1,85 @@
+import pathlib as pl
+
+import pytest
+
+from src.lib import parser, shard
+from src.lib.attacher import attach_property_to_file
+from src.lib.timing import Timings
+
+FIXTURES = pl.Path("tests/fixtures/kicad_v9")
+
+
+@pytest.fixture(autouse=True)
+def _shard_small_files(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(shard, "MIN_SHARD_BYTES", 0)
+
+
+def _pair(tmp_path: pl.Path, data: bytes) -> tuple[pl.Path, pl.Path]:
+    (tmp_path / "serial").mkdir()
+    (tmp_path / "sharded").mkdir()
+    a, b = tmp_path / "serial" / "lib.kicad_sym", tmp_path / "sharded" / "lib.kicad_sym"
+    a.write_bytes(data)
+    b.write_bytes(data)
+    return a, b
+
+
+@pytest.mark.parametrize("name", ["official-Device-no-prop.kicad_sym", "official-mixed-some-prop-SzlcscCode.kicad_sym"])
+@pytest.mark.parametrize("crlf", [False, True])
+def test_sharded_output_matches_mmap(tmp_path: pl.Path, name: str, crlf: bool):
+    data = (FIXTURES / name).read_bytes()
+    if crlf:
+        data = data.replace(b"\r\n", b"\n").replace(b"\n", b"\r\n")
+    serial, sharded = _pair(tmp_path, data)
+    values = {"R": {"Vendor": 'say "hi"'}, "NoSuchSymbol": {"Vendor": "x"}}
+    expected = attach_property_to_file(serial, ["SzlcscCode", "MPN"], "v", use_mmap=True, values=values)
+    timings = Timings(trace_memory=False)
+    stats = attach_property_to_file(sharded, ["SzlcscCode", "MPN"], "v", shards=4, values=values, timings=timings)
+
+    assert sharded.read_bytes() == serial.read_bytes()
+    assert sharded.with_name(sharded.name + ".orig").read_bytes() == data
+    assert stats == expected
+    assert list(stats.iter_added()) == list(expected.iter_added())
+    assert stats.unmatched_mapping_keys == ["NoSuchSymbol"]
+    assert [s.name for s in stats.index] == [s.name for s in expected.index]
+    assert "stitch_write" in {ph.name for ph in timings.phases}
+    assert not list(sharded.parent.glob("*.part"))
+
+
+def test_plan_ranges_cut_between_top_level_symbols():
+    data = (FIXTURES / "official-Device-no-prop.kicad_sym").read_bytes()
+    bounds = shard._plan_ranges(data, 8)
+    assert bounds is not None and len(bounds) > 2
+    starts = {span.start for span in parser.iter_symbol_spans(data)}
+    for cut in bounds[1:-1]:
+        assert cut + data[cut:].index(b"(") in starts
+    spans = [
+        span for a, b in zip(bounds, bounds[1:]) for span in parser.iter_symbol_spans(data, start=a, end=b, depth=1)
+    ]
+    assert spans == list(parser.iter_symbol_spans(data))
+
+
+def test_range_scan_rejects_split_symbol():
+    data = b'(kicad_symbol_lib\n  (symbol "A" (property "P" "1"))\n  (symbol "B")\n)\n'
+    with pytest.raises(ValueError, match="Unbalanced"):
+        list(parser.iter_symbol_spans(data, start=data.index(b"(property"), end=data.index(b"\n)"), depth=1))
+
+
+def test_unusual_layout_falls_back_to_serial(tmp_path: pl.Path):
+    # Every symbol on one line: no line-start cut points.
+    data = b'(kicad_symbol_lib (version 1) (symbol "A" (property "P" "1")) (symbol "B"))\n'
+    assert shard._plan_ranges(data, 4) is None
+    serial, sharded = _pair(tmp_path, data)
+    attach_property_to_file(serial, ["X"], "1", use_mmap=True)
+    stats = attach_property_to_file(sharded, ["X"], "1", shards=4)
+    assert stats.properties_added == 2
+    assert sharded.read_bytes() == serial.read_bytes()
+
+
+def test_sharded_dry_run_writes_nothing(tmp_path: pl.Path):
+    path = tmp_path / "lib.kicad_sym"
+    data = (FIXTURES / "official-Device-no-prop.kicad_sym").read_bytes()
+    path.write_bytes(data)
+    stats = attach_property_to_file(path, ["SzlcscCode"], "", dry_run=True, shards=3)
+    assert stats.properties_added == stats.symbols_processed > 0
+    assert path.read_bytes() == data
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["lib.kicad_sym"]
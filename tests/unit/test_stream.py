@@ -0,0 +1,107 @@
+import io
+import pathlib as pl
+
+import pytest
+
+from src.lib.attacher import attach_properties
+from src.lib.rules import Rule, RuleSet
+from src.lib.stream import attach_stream
+
+FIXTURES = pl.Path("tests/fixtures/kicad_v9")
+
+
+def _stream(data: bytes, *args, **kwargs) -> tuple[bytes, object]:
+    out = io.BytesIO()
+    stats = attach_stream(io.BytesIO(data), out, *args, **kwargs)
+    return out.getvalue(), stats
+
+
+@pytest.mark.parametrize("crlf", [False, True])
+@pytest.mark.parametrize("chunk_size", [1, 97, 1 << 16])
+def test_stream_matches_in_memory_output(crlf: bool, chunk_size: int):
+    data = (FIXTURES / "official-mixed-some-prop-SzlcscCode.kicad_sym").read_bytes().replace(b"\r\n", b"\n")
+    if crlf:
+        data = data.replace(b"\n", b"\r\n")
+    values = {"R": {"Vendor": 'say "hi"'}, "NoSuchSymbol": {"Vendor": "x"}}
+    expected, expected_stats = attach_properties(data, ["MPN", "SzlcscCode"], "v", values=values)
+    out, stats = _stream(data, ["MPN", "SzlcscCode"], "v", values=values, chunk_size=chunk_size)
+    assert out == expected
+    assert list(stats.iter_added()) == list(expected_stats.iter_added())
+    assert stats.unmatched_mapping_keys == ["NoSuchSymbol"]
+
+    ruleset = RuleSet([Rule("rename", "Datasheet", to="Doc"), Rule("delete", "ki_keywords"), Rule("add", "MPN")])
+    assert _stream(data, [], rules=ruleset, chunk_size=chunk_size)[0] == attach_properties(data, rules=ruleset)[0]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 97, 1 << 16])
+def test_stream_mixed_line_endings_match_mmap(tmp_path: pl.Path, chunk_size: int):
+    from src.lib.attacher import attach_property_to_file
+
+    # LF first, CRLF later in the header: every insertion must use CRLF, as with `--mmap`.
+    body = b'  (symbol "A"\n  )\n  (symbol "B"\r\n  )\n)\n'
+    data = b"(kicad_symbol_lib\n  (version 20241209)\r\n" + body
+    lib = tmp_path / "lib.kicad_sym"
+    lib.write_bytes(data)
+    attach_property_to_file(lib, ["Q"], "", use_mmap=True)
+    out, _stats = _stream(data, ["Q"], chunk_size=chunk_size)
+    assert out == lib.read_bytes() and out.count(b"\r\n") > 3
+
+
+def test_symbols_are_written_before_the_input_ends():
+    head = b'(kicad_symbol_lib\n  (version 1)\n  (symbol "A"\n    (property "P" "1")\n  )\n'
+    rest = b'  (symbol "B"\n  )\n  (symbol "C"\n  )\n)\n'
+    out = io.BytesIO()
+
+    class Source(io.RawIOBase):
+        reads = [head, rest[:20], rest[20:]]
+
+        def readable(self) -> bool:
+            return True
+
+        def read(self, size: int = -1) -> bytes:
+            if len(self.reads) == 2:
+                # The first read completed symbol A: it is out before B is read.
+                assert b'(symbol "A"' in out.getvalue() and b'"P" "1"' in out.getvalue()
+            return self.reads.pop(0) if self.reads else b""
+
+    stats = attach_stream(Source(), out, ["Q"])
+    assert out.getvalue() == attach_properties(head + rest, ["Q"])[0]
+    assert stats.properties_added == 3
+
+
+def test_cut_inside_string_falls_back_to_exact_scan():
+    # A value holding a raw newline and ending like the start of a top-level symbol line.
+    data = (
+        b"(kicad_symbol_lib\n"
+        b'  (symbol "A"\n    (property "P" "1")\n  )\n'
+        b'  (symbol "B"\n    (property "Note" "x\n  (symbol ")\n  )\n'
+        b'  (symbol "C"\n  )\n'
+        b")\n"
+    )
+    for chunk_size in (1, 8, 60, 1 << 16):
+        out, stats = _stream(data, ["Q"], chunk_size=chunk_size)
+        assert out == attach_properties(data, ["Q"])[0]
+        assert stats.symbols_processed == 3
+
+
+@pytest.mark.parametrize(
+    ("data", "message"),
+    [
+        (b'(kicad_symbol_lib (symbol "A" (property "P" "1)))', "Unterminated string"),
+        (b'(kicad_symbol_lib (symbol "A" (property "P" "1"))', "not closed"),
+        (b'(kicad_symbol_lib (symbol "A")))', "Unbalanced"),
+    ],
+)
+def test_stream_rejects_malformed_input(data: bytes, message: str):
+    with pytest.raises(ValueError, match=message):
+        _stream(data, ["P"], chunk_size=4)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 97, 1 << 16])
+def test_stream_schematic_lib_symbols(chunk_size: int):
+    data = (FIXTURES / "schematic-lib_symbols.kicad_sch").read_bytes()
+    expected, expected_stats = attach_properties(data, ["MPN", "SzlcscCode"])
+    out, stats = _stream(data, ["MPN", "SzlcscCode"], chunk_size=chunk_size)
+    assert out == expected
+    assert stats.symbols_processed == expected_stats.symbols_processed == 2
+    assert stats.properties_added == 3
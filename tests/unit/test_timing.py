@@ -0,0 +1,41 @@
+import pathlib as pl
+
+from src.lib.attacher import attach_property_to_file
+from src.lib.report import ReportOptions
+from src.lib.timing import Timings
+
+FIXTURES = pl.Path("tests/fixtures/kicad_v9")
+
+
+def test_attach_records_phases_and_report_section(tmp_path: pl.Path):
+    lib = tmp_path / "lib.kicad_sym"
+    lib.write_bytes((FIXTURES / "official-mixed-some-prop-SzlcscCode.kicad_sym").read_bytes())
+    report = tmp_path / "report.md"
+    import tracemalloc
+
+    with Timings() as timings:
+        stats = attach_property_to_file(
+            lib, ["Extra"], "", timings=timings, report_options=ReportOptions(report_path=report)
+        )
+        assert tracemalloc.is_tracing()  # started once, kept across phases
+    assert not tracemalloc.is_tracing()
+    assert stats.timings is timings
+    names = [p.name for p in timings.phases]
+    assert names == ["read", "index", "plan", "backup", "splice_write", "report"]
+    index = timings.phases[1]
+    assert index.bytes == (FIXTURES / "official-mixed-some-prop-SzlcscCode.kicad_sym").stat().st_size
+    assert index.symbols == stats.symbols_processed
+    assert index.peak_bytes is not None and index.symbols_per_s
+    assert {"phase", "seconds", "bytes", "symbols_per_s", "peak_bytes"} <= set(timings.as_dicts()[0])
+    assert "## Timings" in report.read_text("utf-8") and "inflated" in report.read_text("utf-8")
+
+
+def test_timings_merge_sums_and_keeps_peak():
+    a, b = Timings(trace_memory=False), Timings(trace_memory=False)
+    with a.phase("index", bytes=10, symbols=2):
+        pass
+    with b.phase("index", bytes=5, symbols=1):
+        pass
+    a.merge(b)
+    (index,) = a.phases
+    assert (index.bytes, index.symbols, index.peak_bytes) == (15, 3, None)
@@ -0,0 +1,74 @@
+import pathlib as pl
+
+from src.lib import parser
+from src.lib.watch import Watcher
+
+LIB = '(kicad_symbol_lib\n\t(symbol "A"\n\t)\n\t(symbol "B"\n\t)\n)\n'
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_watcher_debounces_and_ignores_its_own_writes(tmp_path: pl.Path):
+    lib = tmp_path / "lib.kicad_sym"
+    lib.write_text(LIB, encoding="utf-8")
+    clock = FakeClock()
+    watcher = Watcher(tmp_path, ["LCSC"], "C1", debounce=1.0, clock=clock)
+
+    assert watcher.poll() == []  # change seen, debounce window starts
+    clock.now = 1.0
+    (result,) = watcher.poll()
+    assert result.error is None and result.stats is not None
+    assert result.stats.properties_added == 2
+    assert not any(True for _ in watcher.index(lib).missing(["LCSC"]))
+    clock.now = 5.0
+    assert watcher.poll() == []  # our own write is not a change
+
+    # A burst of saves: only the last, once stable, is processed.
+    for i, name in enumerate(["C", "D"]):
+        text = lib.read_text("utf-8")
+        lib.write_text(text[: text.rindex(")")] + f'\t(symbol "{name}"\n\t)\n)\n', encoding="utf-8")
+        clock.now = 5.5 + i * 0.5
+        assert watcher.poll() == []
+    clock.now = 7.0
+    (result,) = watcher.poll()
+    assert result.stats is not None and result.stats.properties_added == 2
+    assert watcher.index(lib).has_property("D", "LCSC")
+
+
+def test_watcher_complete_file_is_indexed_not_rewritten(tmp_path: pl.Path):
+    lib = tmp_path / "lib.kicad_sym"
+    lib.write_text(LIB.replace('"B"\n', '"B"\n\t\t(property "LCSC" "x"\n\t\t)\n'), encoding="utf-8")
+    watcher = Watcher(lib, ["LCSC"], values={"A": {"LCSC": "C9"}}, debounce=0.0)
+    (result,) = watcher.poll()
+    assert result.stats is not None and result.stats.properties_added == 1
+    before = lib.read_bytes()
+    lib.write_bytes(before + b"\n")
+    (result,) = watcher.poll()
+    assert result.stats is None and result.error is None
+    assert isinstance(watcher.index(lib), parser.SymbolIndex)
+    assert not list(tmp_path.glob("*.orig.1"))
+
+
+def test_watcher_derives_the_written_index_without_reparsing(tmp_path: pl.Path, monkeypatch):
+    import pytest
+
+    lib = tmp_path / "lib.kicad_sym"
+    text = '(kicad_symbol_lib\n\t(symbol "Ω"\n\t\t(symbol "Ω_0_1"\n\t\t)\n\t)\n' + LIB.split("\n", 1)[1]
+    for use_mmap in (False, True):
+        lib.write_bytes(text.replace("\n", "\r\n").encode("utf-8"))
+        watcher = Watcher(lib, ["LCSC"], "C1", use_mmap=use_mmap, debounce=0.0)
+        with monkeypatch.context() as m:
+            m.setattr(parser.SymbolIndex, "from_path", pytest.fail)
+            (result,) = watcher.poll()
+        assert result.error is None and result.stats is not None and result.stats.properties_added == 3
+        written = lib.read_bytes()
+        expected = parser.SymbolIndex.from_buffer(written) if use_mmap else parser.SymbolIndex.from_path(lib)
+        assert watcher.index(lib).symbols == expected.symbols
+        st = lib.stat()
+        assert watcher.poll() == [] and (st.st_mtime_ns, st.st_size) == watcher._files[lib].signature